@@ -0,0 +1,29 @@
+SELECT
+    n.nspname AS table_schema,
+    c.relname AS table_name,
+    md5(
+        c.xmin::text
+        || ':' || COALESCE((
+            SELECT string_agg(a.xmin::text, ',' ORDER BY a.attnum)
+            FROM pg_catalog.pg_attribute a
+            WHERE a.attrelid = c.oid
+            AND a.attnum > 0
+        ), '')
+        || ':' || COALESCE((
+            SELECT string_agg(d.xmin::text, ',' ORDER BY d.adnum)
+            FROM pg_catalog.pg_attrdef d
+            WHERE d.adrelid = c.oid
+        ), '')
+        || ':' || COALESCE((
+            SELECT string_agg(con.conname || '@' || con.xmin::text, ',' ORDER BY con.conname)
+            FROM pg_catalog.pg_constraint con
+            WHERE con.conrelid = c.oid
+        ), '')
+    ) AS signature
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n
+    ON n.oid = c.relnamespace
+WHERE n.nspname NOT IN ('information_schema', 'pg_catalog')
+AND n.nspname NOT LIKE 'pg\_toast%'
+AND n.nspname NOT LIKE 'pg\_temp\_%'
+AND c.relkind IN ('r', 'p', 'v', 'm', 'f');
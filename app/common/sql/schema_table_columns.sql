@@ -0,0 +1,52 @@
+SELECT
+    n.nspname AS table_schema,
+    c.relname AS table_name,
+    a.attname AS column_name,
+    format_type(a.atttypid, NULL) AS data_type,
+    CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+    pg_get_expr(d.adbin, d.adrelid) AS column_default,
+    COALESCE(pk.is_primary_key, FALSE) AS is_primary_key,
+    fk.foreign_references
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n
+    ON n.oid = c.relnamespace
+JOIN pg_catalog.pg_attribute a
+    ON a.attrelid = c.oid
+    AND a.attnum > 0
+    AND NOT a.attisdropped
+LEFT JOIN pg_catalog.pg_attrdef d
+    ON d.adrelid = c.oid
+    AND d.adnum = a.attnum
+LEFT JOIN LATERAL (
+    SELECT TRUE AS is_primary_key
+    FROM pg_catalog.pg_constraint con
+    WHERE con.conrelid = c.oid
+    AND con.contype = 'p'
+    AND a.attnum = ANY (con.conkey)
+) pk ON TRUE
+-- Every distinct [schema, table, column] the column references through any of
+-- its foreign keys (composite keys pair it with its own referenced column),
+-- sorted, so the result does not depend on constraint order
+LEFT JOIN LATERAL (
+    SELECT array_agg(
+        DISTINCT ARRAY[rn.nspname::text, rc.relname::text, ra.attname::text]
+    ) AS foreign_references
+    FROM pg_catalog.pg_constraint con
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, ref_attnum)
+    JOIN pg_catalog.pg_class rc
+        ON rc.oid = con.confrelid
+    JOIN pg_catalog.pg_namespace rn
+        ON rn.oid = rc.relnamespace
+    JOIN pg_catalog.pg_attribute ra
+        ON ra.attrelid = con.confrelid
+        AND ra.attnum = k.ref_attnum
+    WHERE con.conrelid = c.oid
+    AND con.contype = 'f'
+    AND k.attnum = a.attnum
+) fk ON TRUE
+WHERE n.nspname NOT IN ('information_schema', 'pg_catalog')
+AND n.nspname NOT LIKE 'pg\_toast%'
+AND n.nspname NOT LIKE 'pg\_temp\_%'
+AND (:schema_name IS NULL OR n.nspname = :schema_name)
+AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+ORDER BY n.nspname, c.relname, a.attnum;
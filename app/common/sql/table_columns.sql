@@ -1,45 +1,48 @@
-SELECT 
-    c.column_name,
-    c.data_type,
-    c.is_nullable,
-    c.column_default,
-    CASE WHEN pk.column_name IS NOT NULL THEN TRUE ELSE FALSE END AS is_primary_key,
-    fk.foreign_table_name,
-    fk.foreign_column_name
-FROM information_schema.columns c
-LEFT JOIN (
-    SELECT 
-        kcu.table_schema,
-        kcu.table_name,
-        kcu.column_name
-    FROM information_schema.table_constraints tc
-    JOIN information_schema.key_column_usage kcu
-        ON tc.constraint_name = kcu.constraint_name
-        AND tc.table_schema = kcu.table_schema
-    WHERE tc.constraint_type = 'PRIMARY KEY'
-) pk
-    ON c.table_schema = pk.table_schema
-    AND c.table_name = pk.table_name
-    AND c.column_name = pk.column_name
-LEFT JOIN (
-    SELECT
-        kcu.table_schema,
-        kcu.table_name,
-        kcu.column_name,
-        ccu.table_name AS foreign_table_name,
-        ccu.column_name AS foreign_column_name
-    FROM information_schema.table_constraints tc
-    JOIN information_schema.key_column_usage kcu
-        ON tc.constraint_name = kcu.constraint_name
-        AND tc.table_schema = kcu.table_schema
-    JOIN information_schema.constraint_column_usage ccu
-        ON ccu.constraint_name = tc.constraint_name
-        AND ccu.table_schema = tc.table_schema
-    WHERE tc.constraint_type = 'FOREIGN KEY'
-) fk
-    ON c.table_schema = fk.table_schema
-    AND c.table_name = fk.table_name
-    AND c.column_name = fk.column_name
-WHERE c.table_schema = :schema_name
-AND c.table_name = :table_name
-ORDER BY c.ordinal_position;
+SELECT
+    a.attname AS column_name,
+    format_type(a.atttypid, NULL) AS data_type,
+    CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+    pg_get_expr(d.adbin, d.adrelid) AS column_default,
+    COALESCE(pk.is_primary_key, FALSE) AS is_primary_key,
+    fk.foreign_references
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n
+    ON n.oid = c.relnamespace
+JOIN pg_catalog.pg_attribute a
+    ON a.attrelid = c.oid
+    AND a.attnum > 0
+    AND NOT a.attisdropped
+LEFT JOIN pg_catalog.pg_attrdef d
+    ON d.adrelid = c.oid
+    AND d.adnum = a.attnum
+LEFT JOIN LATERAL (
+    SELECT TRUE AS is_primary_key
+    FROM pg_catalog.pg_constraint con
+    WHERE con.conrelid = c.oid
+    AND con.contype = 'p'
+    AND a.attnum = ANY (con.conkey)
+) pk ON TRUE
+-- Every distinct [schema, table, column] the column references through any of
+-- its foreign keys (composite keys pair it with its own referenced column),
+-- sorted, so the result does not depend on constraint order
+LEFT JOIN LATERAL (
+    SELECT array_agg(
+        DISTINCT ARRAY[rn.nspname::text, rc.relname::text, ra.attname::text]
+    ) AS foreign_references
+    FROM pg_catalog.pg_constraint con
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, ref_attnum)
+    JOIN pg_catalog.pg_class rc
+        ON rc.oid = con.confrelid
+    JOIN pg_catalog.pg_namespace rn
+        ON rn.oid = rc.relnamespace
+    JOIN pg_catalog.pg_attribute ra
+        ON ra.attrelid = con.confrelid
+        AND ra.attnum = k.ref_attnum
+    WHERE con.conrelid = c.oid
+    AND con.contype = 'f'
+    AND k.attnum = a.attnum
+) fk ON TRUE
+WHERE n.nspname = :schema_name
+AND c.relname = :table_name
+AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+ORDER BY a.attnum;
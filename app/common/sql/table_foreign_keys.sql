@@ -0,0 +1,25 @@
+SELECT
+    a.attname AS column_name,
+    rn.nspname AS foreign_table_schema,
+    rc.relname AS foreign_table_name,
+    ra.attname AS foreign_column_name
+FROM pg_catalog.pg_constraint con
+JOIN pg_catalog.pg_class c
+    ON c.oid = con.conrelid
+JOIN pg_catalog.pg_namespace n
+    ON n.oid = c.relnamespace
+JOIN pg_catalog.pg_class rc
+    ON rc.oid = con.confrelid
+JOIN pg_catalog.pg_namespace rn
+    ON rn.oid = rc.relnamespace
+CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, ref_attnum, ord)
+JOIN pg_catalog.pg_attribute a
+    ON a.attrelid = con.conrelid
+    AND a.attnum = k.attnum
+JOIN pg_catalog.pg_attribute ra
+    ON ra.attrelid = con.confrelid
+    AND ra.attnum = k.ref_attnum
+WHERE con.contype = 'f'
+AND n.nspname = :schema_name
+AND c.relname = :table_name
+ORDER BY con.conname, k.ord;
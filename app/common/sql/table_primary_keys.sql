@@ -0,0 +1,15 @@
+SELECT
+    a.attname AS column_name
+FROM pg_catalog.pg_constraint con
+JOIN pg_catalog.pg_class c
+    ON c.oid = con.conrelid
+JOIN pg_catalog.pg_namespace n
+    ON n.oid = c.relnamespace
+CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+JOIN pg_catalog.pg_attribute a
+    ON a.attrelid = con.conrelid
+    AND a.attnum = k.attnum
+WHERE con.contype = 'p'
+AND n.nspname = :schema_name
+AND c.relname = :table_name
+ORDER BY k.ord;
@@ -20,6 +20,8 @@ IMPORTANT CLARIFICATION:
   You CANNOT return messages like “Insufficient metadata” in this case.
 - If required metadata is missing (e.g., the table has zero columns), you MUST request it 
   via TOOL_CALL, never return FINAL_SQL with an empty SQL string.
+- To describe several tables of one schema, call describe_table once with
+  "tables": ["<table>", ...] instead of "table".
 
 Allowed formats:
 
@@ -29,9 +31,41 @@ TOOL_CALL
   "arguments": { ... }
 }
 
+Several independent tool calls (e.g. the metadata of every table of a JOIN)
+go in one TOOL_CALL array; they run in parallel and return together:
+
+TOOL_CALL
+[
+  { "name": "<tool_name>", "arguments": { ... } },
+  { "name": "<tool_name>", "arguments": { ... } }
+]
+
 FINAL_SQL
 {
   "sql": "<query>",
   "explanation": "<short explanation>"
 }
 """
+
+# Appended to the prompt when the agent runs with a pre-computed schema digest
+SCHEMA_PRIMED_RULES = """
+SCHEMA DIGEST MODE:
+- SCHEMA_DIGEST below was fetched from the live database and is authoritative.
+- It overrides the rules that require list_schemas and list_tables: do NOT call them.
+- Format: schema.table(column type, ...). "*" marks a primary key column,
+  "->table.column" marks a foreign key, "+N cols" means columns were omitted.
+- If every column you need is listed, return FINAL_SQL immediately.
+- Call get_columns or describe_table only for tables whose columns were omitted.
+"""
+
+# Appended instead of SCHEMA_PRIMED_RULES when the digest only holds the
+# tables ranked most relevant to the question
+SCHEMA_RANKED_RULES = """
+RELEVANT SCHEMA MODE:
+- SCHEMA_DIGEST below lists the tables of the live database most relevant to USER_INPUT.
+- It overrides the rules that require list_schemas and list_tables: start from these tables.
+- Format: schema.table(column type, ...). "*" marks a primary key column,
+  "->table.column" marks a foreign key, "+N cols" means columns were omitted.
+- If every column you need is listed, return FINAL_SQL immediately.
+- Call list_tables only if the question clearly needs a table that is not listed.
+"""
@@ -0,0 +1,8 @@
+
+# Global catalog poller, re-baselined after every successful connect
+from app.services.catalog_change_detector import CatalogChangeDetector
+from app.services.database_service import db_session
+
+
+catalog_change_detector = CatalogChangeDetector()
+db_session.add_connect_listener(catalog_change_detector.on_connect)
@@ -0,0 +1,6 @@
+
+# Global registry of live target database engines, keyed by connection id
+from app.services.connection_registry import ConnectionRegistry
+
+
+connection_registry = ConnectionRegistry()
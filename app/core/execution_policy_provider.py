@@ -0,0 +1,6 @@
+
+# Global policy for guarded execution of generated SQL
+from app.services.execution_policy import ExecutionPolicy
+
+
+execution_policy = ExecutionPolicy()
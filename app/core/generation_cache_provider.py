@@ -0,0 +1,8 @@
+
+# Global cache of generated SQL answers, dropped per connection on any DDL seen by the monitor
+from app.services.database_service import db_session
+from app.services.generation_cache import GenerationCache
+
+
+generation_cache = GenerationCache()
+db_session.schema_monitor.add_listener(generation_cache.on_schema_change)
@@ -1,6 +1,21 @@
 
 # Global metadata cache instance with automatic TTL
-from app.services.metadata_cache import MetadataCache
+import os
+from app.services.metadata_cache import NamespacedMetadataCache
 
 
-metadata_cache = MetadataCache(ttl_seconds=300)
+# Long by default: catalog changes are detected by CatalogChangeDetector
+METADATA_CACHE_TTL = int(os.getenv("METADATA_CACHE_TTL", "3600"))
+
+
+def _active_connection_key():
+    # Imported here: database_service itself depends on this provider
+    from app.services.database_service import current_session
+
+    return current_session().connection_key
+
+
+# One namespace per connection; calls without a key use the active one
+metadata_cache = NamespacedMetadataCache(
+    current_key=_active_connection_key, ttl_seconds=METADATA_CACHE_TTL
+)
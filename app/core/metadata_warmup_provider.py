@@ -0,0 +1,16 @@
+
+# Global catalog warm-up, started after every successful connect
+from app.core.metadata_cache_provider import metadata_cache
+from app.services.database_service import db_session
+from app.services.metadata_snapshot_service import (
+    METADATA_SNAPSHOT_ENABLED,
+    MetadataSnapshotService,
+)
+from app.services.metadata_warmup import MetadataWarmupService
+
+
+metadata_warmup = MetadataWarmupService(
+    metadata_cache,
+    snapshots=MetadataSnapshotService() if METADATA_SNAPSHOT_ENABLED else None,
+)
+db_session.add_connect_listener(metadata_warmup.on_connect)
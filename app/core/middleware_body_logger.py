@@ -6,6 +6,9 @@ from starlette.requests import Request
 from starlette.responses import Response
 from app.core.logger import logger
 
+# Responses passed through unbuffered and without logging their body
+STREAMED_CONTENT_TYPES = ("text/event-stream", "application/x-ndjson", "text/csv")
+
 class BodyLoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         start_time = time.time()
@@ -28,6 +31,15 @@ class BodyLoggingMiddleware(BaseHTTPMiddleware):
 
         response = await call_next(request)
 
+        # Streaming responses (SSE, NDJSON, CSV) must reach the client chunk by chunk
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith(STREAMED_CONTENT_TYPES):
+            logger.info(
+                f"RESPONSE {request.method} {request.url.path} | "
+                f"Status={response.status_code} | Body=[streamed]"
+            )
+            return response
+
         response_body = b""
         async for chunk in response.body_iterator:
             response_body += chunk
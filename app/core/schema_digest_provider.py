@@ -0,0 +1,8 @@
+
+# Global schema digest cache, dropped whenever DDL goes through execute_sql
+from app.services.database_service import db_session
+from app.services.schema_digest import SchemaDigestService
+
+
+schema_digest = SchemaDigestService()
+db_session.schema_monitor.add_listener(schema_digest.on_schema_change)
@@ -0,0 +1,8 @@
+
+# Global per-connection schema relevance indexes, dropped on DDL
+from app.services.database_service import db_session
+from app.services.schema_retrieval import SchemaRetrievalService
+
+
+schema_retrieval = SchemaRetrievalService()
+db_session.schema_monitor.add_listener(schema_retrieval.on_schema_change)
@@ -0,0 +1,10 @@
+
+# Global memo of agent tool results, invalidated by DDL on the active connection
+from app.services.database_service import current_session, db_session
+from app.services.tool_result_cache import ToolResultCache
+
+
+tool_result_cache = ToolResultCache()
+db_session.schema_monitor.add_listener(
+    lambda affected: tool_result_cache.on_schema_change(affected, current_session().connection_key)
+)
@@ -3,7 +3,6 @@ from fastapi.staticfiles import StaticFiles
 from app.core.logger_middleware import RequestLoggingMiddleware
 from app.core.middleware_body_logger import BodyLoggingMiddleware
 from app.internal_db import init_internal_db
-from app.services.database_service import DatabaseService
 from app.router.connections_router import router as connections_router
 from app.router.llm_sql_router import router as llm_sql_router
 from app.router.schema_router import router as schema_router
@@ -42,7 +41,6 @@ def list_routes():
 app.add_middleware(RequestLoggingMiddleware)
 app.add_middleware(BodyLoggingMiddleware)
 
-db_service = DatabaseService()
 app.include_router(connections_router)
 app.include_router(llm_sql_router)
 app.include_router(schema_router)
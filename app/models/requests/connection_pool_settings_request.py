@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ConnectionPoolSettingsRequest(BaseModel):
+    pool_size: Optional[int] = Field(None, ge=1, le=100)
+    max_overflow: Optional[int] = Field(None, ge=0, le=100)
+    pool_timeout: Optional[float] = Field(None, gt=0)
+    pool_recycle: Optional[int] = Field(None, ge=-1)
+    pre_ping: Optional[bool] = None
+    statement_timeout_ms: Optional[int] = Field(None, ge=0)
+    application_name: Optional[str] = Field(None, max_length=63)
@@ -1,5 +1,35 @@
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 
 
 class ExecuteRequest(BaseModel):
-    sql: str
\ No newline at end of file
+    sql: str
+    # Saved connection to run against; the active connection when omitted
+    connection_id: Optional[int] = None
+    # Timeouts, EXPLAIN cost gate and row cap; EXECUTION_POLICY_ENABLED when omitted.
+    # false is only accepted when EXECUTION_ALLOW_UNGUARDED is set
+    guarded: Optional[bool] = None
+    # What to do when the plan estimate exceeds the policy (EXECUTION_ON_EXCEED)
+    on_exceed: Optional[Literal["reject", "limit"]] = None
+    # Can only lower EXECUTION_STATEMENT_TIMEOUT_MS
+    statement_timeout_ms: Optional[int] = Field(None, ge=1)
+
+
+class ExecuteStreamRequest(BaseModel):
+    sql: str
+    connection_id: Optional[int] = None
+    format: Literal["ndjson", "csv"] = "ndjson"
+    # Lower the server caps (EXECUTE_STREAM_MAX_ROWS / EXECUTE_STREAM_MAX_BYTES)
+    max_rows: Optional[int] = Field(None, ge=1)
+    max_bytes: Optional[int] = Field(None, ge=1)
+
+
+class ExecutePageRequest(BaseModel):
+    sql: str
+    connection_id: Optional[int] = None
+    page_size: Optional[int] = Field(None, ge=1)
+    # next_cursor of the previous page
+    cursor: Optional[str] = None
+    # Result columns that identify a row, for keyset pagination
+    order_by: Optional[List[str]] = None
+    max_bytes: Optional[int] = Field(None, ge=1)
\ No newline at end of file
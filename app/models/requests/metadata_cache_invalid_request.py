@@ -5,6 +5,10 @@ from pydantic import BaseModel, Field
 class MetadataCacheInvalidateRequest(BaseModel):
     schema_name: Optional[str] = Field(None, alias="schema")
     table_name: Optional[str] = Field(None, alias="table")
+    # Full invalidation clears only the active connection unless this is set
+    all_connections: bool = False
+    # Saved connection to invalidate; the active connection when omitted
+    connection_id: Optional[int] = None
 
     class Config:
         populate_by_name = True  
@@ -1,5 +1,18 @@
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 
 class QueryRequest(BaseModel):
     user_input: str
+    # "tools": discover the schema step by step through tool calls
+    # "schema_primed": start from a cached schema digest embedded in the prompt
+    # "schema_ranked": like schema_primed, limited to the tables most relevant to the question
+    mode: Literal["tools", "schema_primed", "schema_ranked"] = "tools"
+    # Keep every tool result of the run as chat history instead of only the last one
+    transcript: bool = False
+    # Reuse a previous answer to the same question (same model, schema and mode)
+    use_cache: bool = True
+    # EXPLAIN the final SQL and let the model repair it when Postgres rejects it
+    validate_sql: bool = False
+    # Saved connection to run against; the active connection when omitted
+    connection_id: Optional[int] = None
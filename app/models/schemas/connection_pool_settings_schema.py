@@ -0,0 +1,41 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class ConnectionPoolSettings(SQLModel, table=True):
+    """
+    Engine pool and session settings of a saved Connection. Kept in its own
+    table so existing connection rows need no migration; connections without
+    a row use these defaults.
+    """
+
+    __tablename__ = "connection_pool_settings"
+
+    id: int | None = Field(default=None, primary_key=True)
+    connection_id: int | None = Field(
+        default=None, foreign_key="connection.id", unique=True
+    )
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pre_ping: bool = True
+    # 0 (the default) leaves the server's statement_timeout untouched
+    statement_timeout_ms: int = 0
+    application_name: str = "llm-db-connector"
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    def as_dict(self):
+        return {
+            "connection_id": self.connection_id,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pre_ping": self.pre_ping,
+            "statement_timeout_ms": self.statement_timeout_ms,
+            "application_name": self.application_name,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
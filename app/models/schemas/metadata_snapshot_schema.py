@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class MetadataSnapshot(SQLModel, table=True):
+    """Last bulk-loaded catalog metadata of a connection, zlib-compressed JSON."""
+
+    __tablename__ = "metadata_snapshot"
+
+    id: int | None = Field(default=None, primary_key=True)
+    connection_key: str = Field(index=True, unique=True)
+
+    catalog_fingerprint: str
+    table_count: int = 0
+    size_bytes: int = 0
+    payload: bytes
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from sqlmodel import select
+
+from app.internal_db import get_local_session
+from app.models.schemas.connection_pool_settings_schema import ConnectionPoolSettings
+from app.repository.base_repository import BaseRepository
+
+
+class ConnectionPoolSettingsRepository(BaseRepository):
+    model = ConnectionPoolSettings
+
+    def __init__(self):
+        super().__init__(session_factory=get_local_session)
+
+    def get_by_connection_id(self, connection_id: int) -> ConnectionPoolSettings | None:
+        with self._session() as session:
+            return session.exec(
+                select(ConnectionPoolSettings).where(
+                    ConnectionPoolSettings.connection_id == connection_id
+                )
+            ).first()
+
+    def upsert(self, connection_id: int, **fields) -> ConnectionPoolSettings:
+        with self._session() as session:
+            settings = session.exec(
+                select(ConnectionPoolSettings).where(
+                    ConnectionPoolSettings.connection_id == connection_id
+                )
+            ).first()
+
+            if settings is None:
+                settings = ConnectionPoolSettings(connection_id=connection_id)
+                session.add(settings)
+
+            for key, value in fields.items():
+                setattr(settings, key, value)
+            settings.updated_at = datetime.utcnow()
+
+            session.commit()
+            session.refresh(settings)
+            return settings
+
+    def delete_by_connection_id(self, connection_id: int) -> bool:
+        with self._session() as session:
+            settings = session.exec(
+                select(ConnectionPoolSettings).where(
+                    ConnectionPoolSettings.connection_id == connection_id
+                )
+            ).first()
+
+            if not settings:
+                return False
+
+            session.delete(settings)
+            session.commit()
+            return True
@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlmodel import select
+
+from app.internal_db import get_local_session
+from app.models.schemas.metadata_snapshot_schema import MetadataSnapshot
+from app.repository.base_repository import BaseRepository
+
+
+class MetadataSnapshotRepository(BaseRepository):
+    model = MetadataSnapshot
+
+    def __init__(self):
+        super().__init__(session_factory=get_local_session)
+
+    def get_by_connection_key(self, connection_key: str) -> MetadataSnapshot | None:
+        with self._session() as session:
+            return session.exec(
+                select(MetadataSnapshot).where(
+                    MetadataSnapshot.connection_key == connection_key
+                )
+            ).first()
+
+    # One snapshot per connection: replace it in place
+    def upsert(self, connection_key: str, **fields) -> MetadataSnapshot:
+        with self._session() as session:
+            snapshot = session.exec(
+                select(MetadataSnapshot).where(
+                    MetadataSnapshot.connection_key == connection_key
+                )
+            ).first()
+
+            if snapshot is None:
+                snapshot = MetadataSnapshot(connection_key=connection_key, **fields)
+                session.add(snapshot)
+            else:
+                for key, value in fields.items():
+                    setattr(snapshot, key, value)
+                snapshot.created_at = datetime.utcnow()
+
+            session.commit()
+            session.refresh(snapshot)
+            return snapshot
+
+    def delete_by_connection_key(self, connection_key: str) -> bool:
+        with self._session() as session:
+            snapshot = session.exec(
+                select(MetadataSnapshot).where(
+                    MetadataSnapshot.connection_key == connection_key
+                )
+            ).first()
+
+            if not snapshot:
+                return False
+
+            session.delete(snapshot)
+            session.commit()
+            return True
@@ -1,33 +1,148 @@
 import json
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import HTMLResponse
 
+from app.core.catalog_change_provider import catalog_change_detector
+from app.core.generation_cache_provider import generation_cache
 from app.core.metadata_cache_provider import metadata_cache
+from app.core.metadata_warmup_provider import metadata_warmup
+from app.core.schema_digest_provider import schema_digest
+from app.core.schema_retrieval_provider import schema_retrieval
+from app.core.tool_result_cache_provider import tool_result_cache
 from app.models.requests.metadata_cache_invalid_request import MetadataCacheInvalidateRequest
+from app.services.connections import resolve_session
+from app.services.database_service import use_session
 
 router = APIRouter(prefix="/cache", tags=["cache"])
 
 
+def _connected_session(connection_id: Optional[int]):
+    session = resolve_session(connection_id)
+    if not session.is_connected():
+        raise HTTPException(status_code=400, detail="No active database connection")
+    return session
+
+
 @router.post("/metadata/invalidate")
 def invalidate_metadata_cache(payload: MetadataCacheInvalidateRequest):
     schema = payload.schema_name.lower().strip() if payload.schema_name else None
     table = payload.table_name.lower().strip() if payload.table_name else None
+    connection_key = resolve_session(payload.connection_id).connection_key
+
+    # Any metadata invalidation also makes the prompt digest stale
+    if payload.all_connections:
+        schema_digest.invalidate()
+        schema_retrieval.invalidate()
+        generation_cache.invalidate_all()
+    else:
+        schema_digest.invalidate(connection_key)
+        schema_retrieval.invalidate(connection_key)
+        generation_cache.invalidate_connection(connection_key)
 
     if schema and table:
-        metadata_cache.invalidate_table(schema, table)
+        metadata_cache.namespace(connection_key).invalidate_table(schema, table)
+        tool_result_cache.invalidate_table(schema, table, connection_key)
         return {"status": "ok", "message": f"Invalidated cache for {schema}.{table}"}
 
     if schema and not table:
-        metadata_cache.invalidate_schema(schema)
+        metadata_cache.namespace(connection_key).invalidate_schema(schema)
+        tool_result_cache.invalidate_schema(schema, connection_key)
         return {"status": "ok", "message": f"Invalidated cache for schema {schema}"}
 
+    if not schema and not table and payload.all_connections:
+        metadata_cache.invalidate_everything()
+        tool_result_cache.invalidate_all()
+        return {"status": "ok", "message": "Invalidated metadata cache of every connection"}
+
     if not schema and not table:
-        metadata_cache.invalidate_all()
+        metadata_cache.namespace(connection_key).invalidate_all()
+        tool_result_cache.invalidate_all(connection_key)
         return {"status": "ok", "message": "Invalidated entire metadata cache"}
 
     raise HTTPException(status_code=400, detail="Invalid cache invalidation request")
 
 
 @router.get("/metadata/status")
-def get_metadata_cache_status():
-    return metadata_cache.get_status()
+def get_metadata_cache_status(
+    connection_id: Optional[int] = None,
+    schema: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    schema = schema.lower().strip() if schema else None
+    with use_session(resolve_session(connection_id)):
+        return metadata_cache.get_status(schema, page, limit)
+
+
+@router.get("/metadata/warmup")
+def get_metadata_warmup_status(connection_id: Optional[int] = None):
+    return metadata_warmup.get_status(resolve_session(connection_id).connection_key)
+
+
+@router.post("/metadata/warmup")
+def start_metadata_warmup(connection_id: Optional[int] = None):
+    session = _connected_session(connection_id)
+
+    metadata_warmup.start_warmup(session)
+    metadata_warmup.start_refresher()
+    return {"status": "ok", "message": "Metadata warm-up started"}
+
+
+@router.get("/metadata/snapshot")
+def get_metadata_snapshot(connection_id: Optional[int] = None):
+    if metadata_warmup.snapshots is None:
+        raise HTTPException(status_code=400, detail="Metadata snapshots are disabled")
+    session = _connected_session(connection_id)
+
+    info = metadata_warmup.snapshots.get_info(session.connection_key)
+    if info is None:
+        raise HTTPException(status_code=404, detail="No snapshot for this connection")
+    return info
+
+
+@router.delete("/metadata/snapshot")
+def delete_metadata_snapshot(connection_id: Optional[int] = None):
+    if metadata_warmup.snapshots is None:
+        raise HTTPException(status_code=400, detail="Metadata snapshots are disabled")
+    session = _connected_session(connection_id)
+
+    if not metadata_warmup.snapshots.delete(session.connection_key):
+        raise HTTPException(status_code=404, detail="No snapshot for this connection")
+    return {"status": "ok", "message": "Deleted metadata snapshot"}
+
+
+@router.get("/metadata/changes")
+def get_catalog_change_status(connection_id: Optional[int] = None):
+    return catalog_change_detector.get_status(resolve_session(connection_id).connection_key)
+
+
+@router.post("/metadata/changes/poll")
+def poll_catalog_changes(connection_id: Optional[int] = None):
+    session = _connected_session(connection_id)
+
+    affected = catalog_change_detector.poll(session)
+    return {
+        "status": "ok",
+        "changed": [f"{schema}.{table}" for schema, table in affected],
+    }
+
+
+@router.get("/tools/status")
+def get_tool_cache_status():
+    return tool_result_cache.get_status()
+
+
+@router.get("/generation/status")
+def get_generation_cache_status():
+    return generation_cache.get_status()
+
+
+@router.post("/generation/invalidate")
+def invalidate_generation_cache(connection_id: Optional[int] = None):
+    if connection_id is None:
+        generation_cache.invalidate_all()
+        return {"status": "ok", "message": "Invalidated generation cache"}
+
+    generation_cache.invalidate_connection(resolve_session(connection_id).connection_key)
+    return {"status": "ok", "message": f"Invalidated generation cache of connection {connection_id}"}
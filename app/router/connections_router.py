@@ -2,12 +2,20 @@ from fastapi import APIRouter, HTTPException
 
 from pydantic import BaseModel
 from app.models.requests.models_db_connector import PGDBConnector
+from app.models.requests.connection_pool_settings_request import (
+    ConnectionPoolSettingsRequest,
+)
 from app.services.connections import (
     create_connection,
     delete_connection_by_id,
     get_connections,
     activate_connection,
     disconnect_connection,
+    get_pool_settings,
+    update_pool_settings,
+    get_pool_stats,
+    get_open_connections,
+    close_open_connection,
 )
 
 router = APIRouter(prefix="/connections", tags=["Database Connections"])
@@ -37,6 +45,36 @@ def list_connections():
     return {"total": len(connections), "connections": connections}
 
 
+@router.get("/pool/stats")
+def pool_stats(connection_id: int | None = None):
+    """Checked-out, overflow and checkout wait time of the active pool."""
+    return get_pool_stats(connection_id)
+
+
+@router.get("/open")
+def list_open_connections():
+    """Engines opened by requests that select a connection_id."""
+    return get_open_connections()
+
+
+@router.delete("/open/{connection_id}")
+def close_connection(connection_id: int):
+    return close_open_connection(connection_id)
+
+
+@router.get("/{connection_id}/pool")
+def read_pool_settings(connection_id: int):
+    return get_pool_settings(connection_id)
+
+
+@router.put("/{connection_id}/pool")
+def write_pool_settings(connection_id: int, body: ConnectionPoolSettingsRequest):
+    """Update pool settings; applied on the next /use of the connection."""
+    updates = body.model_dump(exclude_unset=True, exclude_none=True)
+    settings = update_pool_settings(connection_id, updates)
+    return {"message": "Pool settings saved.", "settings": settings}
+
+
 @router.delete("/{connection_id}")
 def delete_connection(connection_id: int):
     """Delete a connection by ID."""
@@ -1,8 +1,31 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from app.models.requests.execute_sql_request import ExecuteRequest
+from fastapi.responses import StreamingResponse
+from app.models.requests.execute_sql_request import (
+    ExecutePageRequest,
+    ExecuteRequest,
+    ExecuteStreamRequest,
+)
 from app.models.requests.query_request import QueryRequest
-from app.services.sql_agent import SQLAssistantService
-from app.services.database_service import DatabaseService
+from app.services.sql_agent import AgentBusyError, SQLAssistantService
+from app.services.connections import resolve_session
+from app.services.database_service import use_session
+from app.services.execution_policy import (
+    EXECUTION_ALLOW_UNGUARDED,
+    EXECUTION_POLICY_ENABLED,
+    ExecutionPolicyError,
+)
+from app.core.execution_policy_provider import execution_policy
+from app.services.result_pagination import fetch_page
+from app.utils.result_stream import (
+    EXECUTE_STREAM_MAX_BYTES,
+    EXECUTE_STREAM_MAX_ROWS,
+    StreamLimits,
+    clamp_limit,
+    stream_csv,
+    stream_ndjson,
+)
+from app.utils.sse import format_sse
 
 router = APIRouter(
     prefix="/llmsql",
@@ -11,7 +34,6 @@ router = APIRouter(
 )
 
 assistant = SQLAssistantService()
-db_service = DatabaseService()
 
 
 @router.post("/generate_sql")
@@ -25,8 +47,21 @@ async def generate_sql(req: QueryRequest):
     if not user_input:
         raise HTTPException(status_code=400, detail="Input is empty")
 
+    # First use of a saved connection looks it up and opens an engine
+    session = await asyncio.to_thread(resolve_session, req.connection_id)
+
     try:
-        agent_response = assistant.run(user_input)
+        with use_session(session):
+            agent_response = await assistant.arun(
+                user_input,
+                mode=req.mode,
+                transcript=req.transcript,
+                use_cache=req.use_cache,
+                validate_sql=req.validate_sql,
+            )
+
+    except AgentBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
@@ -44,22 +79,114 @@ async def generate_sql(req: QueryRequest):
         "generated_sql": sql_code,
         "explanation": explanation,
         "preview": "Review this SQL before execution.",
+        "cached": agent_response.get("cached", False),
+        "validation": agent_response.get("validation"),
     }
 
 
+@router.post("/generate_sql/stream")
+async def generate_sql_stream(req: QueryRequest):
+    """
+    Same agent as /generate_sql, streamed as Server-Sent Events:
+    `model` (latency per step), `tool_call`, `tool_result` (size and latency),
+    `cache_hit`, `final_sql`, `error` and a closing `done` event.
+    """
+    user_input = req.user_input.strip()
+
+    if not user_input:
+        raise HTTPException(status_code=400, detail="Input is empty")
+
+    session = await asyncio.to_thread(resolve_session, req.connection_id)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: dict):
+        # arun reports some events from worker threads (asyncio.to_thread)
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def worker():
+        try:
+            with use_session(session):
+                agent_response = await assistant.arun(
+                    user_input,
+                    on_event=emit,
+                    mode=req.mode,
+                    transcript=req.transcript,
+                    use_cache=req.use_cache,
+                    validate_sql=req.validate_sql,
+                )
+            if "error" in agent_response:
+                emit("error", {"detail": agent_response["error"]})
+        except Exception as e:
+            emit("error", {"detail": f"Agent error: {str(e)}"})
+        finally:
+            emit("done", {})
+
+    async def event_stream():
+        task = asyncio.create_task(worker())
+        try:
+            while True:
+                event, data = await queue.get()
+                yield format_sse(event, data)
+                if event == "done":
+                    break
+        finally:
+            # Client went away mid-run: stop the agent instead of finishing it
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/queue")
+def get_agent_queue_status():
+    """Concurrency slots and waiting requests for the model backend."""
+    return assistant.get_queue_status()
+
+
 @router.post("/execute_sql")
-def execute_sql(req: ExecuteRequest):
+async def execute_sql(req: ExecuteRequest):
     """
     Executes the SQL safely through the internal database service.
+    Guarded calls run under statement/lock timeouts, are checked with
+    EXPLAIN first (rejected or auto-limited above the cost/row thresholds)
+    and return at most EXECUTION_ROW_LIMIT rows plus the plan estimate.
     """
     sql = req.sql.strip()
 
     if not sql:
         raise HTTPException(status_code=400, detail="SQL is empty")
 
+    # Only the server can allow requests to skip the policy
+    if req.guarded is False and EXECUTION_POLICY_ENABLED and not EXECUTION_ALLOW_UNGUARDED:
+        raise HTTPException(
+            status_code=403, detail="Unguarded execution is disabled on this server"
+        )
+
+    session = await asyncio.to_thread(resolve_session, req.connection_id)
+    guarded = EXECUTION_POLICY_ENABLED if req.guarded is None else req.guarded
+
     try:
-        result = db_service.execute(sql)
-        return {"executed_sql": sql, "result": result}
+        # Keeps a registry engine open until the statement is done
+        with session.lease():
+            if not guarded:
+                result = await session.aexecute(sql)
+                return {"executed_sql": sql, "result": result}
+
+            outcome = await execution_policy.aexecute(
+                session,
+                sql,
+                on_exceed=req.on_exceed,
+                statement_timeout_ms=req.statement_timeout_ms,
+            )
+        return {"executed_sql": sql, **outcome}
+
+    except ExecutionPolicyError as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "plan": e.plan})
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -68,6 +195,90 @@ def execute_sql(req: ExecuteRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _leased(session, body):
+    """Stream body holding a lease on the session until the last chunk."""
+    with session.lease():
+        yield from body
+
+
+@router.post("/execute_sql/stream")
+def execute_sql_stream(req: ExecuteStreamRequest):
+    """
+    Streams the rows of a read-only query from a server-side cursor, as
+    NDJSON (columns line, one object per row, summary line) or CSV, with
+    bounded memory. Stops at max_rows / max_bytes.
+    """
+    sql = req.sql.strip()
+
+    if not sql:
+        raise HTTPException(status_code=400, detail="SQL is empty")
+
+    session = resolve_session(req.connection_id)
+
+    try:
+        columns, batches = session.open_stream(sql)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    limits = StreamLimits(
+        clamp_limit(req.max_rows, EXECUTE_STREAM_MAX_ROWS),
+        clamp_limit(req.max_bytes, EXECUTE_STREAM_MAX_BYTES),
+    )
+
+    if req.format == "csv":
+        body, media_type = stream_csv(columns, batches, limits), "text/csv"
+    else:
+        body, media_type = stream_ndjson(columns, batches, limits), "application/x-ndjson"
+
+    return StreamingResponse(_leased(session, body), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/execute_sql/page")
+def execute_sql_page(req: ExecutePageRequest):
+    """
+    One page of a read-only query. Pass `order_by` for keyset pagination and
+    the returned `next_cursor` to get the following page.
+    """
+    sql = req.sql.strip()
+
+    if not sql:
+        raise HTTPException(status_code=400, detail="SQL is empty")
+
+    session = resolve_session(req.connection_id)
+
+    try:
+        with session.lease():
+            page = fetch_page(
+                session,
+                sql,
+                page_size=req.page_size,
+                cursor=req.cursor,
+                order_by=req.order_by,
+                max_bytes=req.max_bytes,
+            )
+        return {"executed_sql": sql, **page}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/execution_policy")
+def get_execution_policy():
+    """Thresholds and timeouts applied to guarded /execute_sql calls."""
+    return {
+        "enabled": EXECUTION_POLICY_ENABLED,
+        "allow_unguarded": EXECUTION_ALLOW_UNGUARDED,
+        **execution_policy.get_settings(),
+    }
+
+
 @router.get("/history")
 def get_sql_history():
     return "..."
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logger import create_logger
+from app.services.database_service import DatabaseService, current_session, use_session
+from app.services.schema_service import SchemaService
+
+CATALOG_CHANGE_DETECTION = os.getenv("CATALOG_CHANGE_DETECTION", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+CATALOG_POLL_INTERVAL = int(os.getenv("CATALOG_POLL_INTERVAL", "10"))
+
+
+def catalog_fingerprint(signatures: Dict[Tuple[str, str], str]) -> str:
+    """Single hash over every relation signature, for whole-catalog comparisons."""
+    digest = hashlib.sha256()
+    for (schema, table), signature in sorted(signatures.items()):
+        digest.update(f"{schema}.{table}={signature};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CatalogChangeDetector:
+    """
+    Polls a per-relation catalog signature (xmin of the pg_class, pg_attribute,
+    pg_attrdef and pg_constraint rows) and reports the relations that were
+    created, altered or dropped since the last poll to SqlSchemaChangeMonitor.
+    Catches DDL from migrations and other clients, not only /execute_sql.
+    Every connected session (db_session and the connection registry's) is
+    tracked with its own baseline, one entry per connection_key.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CATALOG_CHANGE_DETECTION,
+        poll_interval: int = CATALOG_POLL_INTERVAL,
+    ):
+        self.logger = create_logger()
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+
+        # connection_key -> {"session", "signatures", poll and change counters}
+        self._tracked: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _new_state(self, session: DatabaseService) -> Dict[str, Any]:
+        return {
+            "session": session,
+            "signatures": None,
+            "last_poll_at": None,
+            "last_poll_ms": None,
+            "last_change_at": None,
+            "changes_detected": 0,
+        }
+
+    def on_connect(self, session: DatabaseService) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # Next poll takes a fresh baseline for the new connection
+            self._tracked[session.connection_key] = self._new_state(session)
+        self.start()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._poll_loop, name="catalog-change-detector", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _sessions(self) -> List[DatabaseService]:
+        """Tracked sessions still connected to their database; forgets the others."""
+        with self._lock:
+            for key, state in list(self._tracked.items()):
+                session = state["session"]
+                if not session.is_connected() or session.connection_key != key:
+                    del self._tracked[key]
+            return [state["session"] for state in self._tracked.values()]
+
+    def _poll_loop(self) -> None:
+        # First poll right away to record the baselines
+        while True:
+            for session in self._sessions():
+                try:
+                    self.poll(session)
+                except Exception as e:
+                    self.logger.warning(
+                        "Catalog change poll failed for %s: %s", session.connection_key, e
+                    )
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def diff(
+        self,
+        previous: Dict[Tuple[str, str], str],
+        current: Dict[Tuple[str, str], str],
+    ) -> List[Tuple[str, str]]:
+        """Relations added, dropped or whose signature changed."""
+        changed = [key for key, sig in current.items() if previous.get(key) != sig]
+        dropped = [key for key in previous if key not in current]
+        return sorted(changed + dropped)
+
+    def poll(self, session: Optional[DatabaseService] = None) -> List[Tuple[str, str]]:
+        """Compare the session's catalog with its last poll and invalidate what changed."""
+        session = session or current_session()
+        if not session.is_connected():
+            return []
+
+        connection_key = session.connection_key
+        started = time.time()
+        with use_session(session):
+            current = SchemaService().get_catalog_signatures()
+
+        with self._lock:
+            if connection_key != session.connection_key:
+                return []
+
+            state = self._tracked.get(connection_key)
+            if state is None or state["session"] is not session:
+                state = self._tracked[connection_key] = self._new_state(session)
+
+            state["last_poll_at"] = time.time()
+            state["last_poll_ms"] = round((state["last_poll_at"] - started) * 1000, 2)
+            previous = state["signatures"]
+            state["signatures"] = current
+
+        if previous is None:
+            self.logger.info(
+                "Catalog baseline for %s: %d relations", connection_key, len(current)
+            )
+            return []
+
+        affected = self.diff(previous, current)
+        if not affected:
+            return []
+
+        with self._lock:
+            state["changes_detected"] += len(affected)
+            state["last_change_at"] = time.time()
+
+        self.logger.info("Catalog changes detected on %s: %s", connection_key, affected)
+        # Listeners scope their invalidation to current_session().connection_key
+        with use_session(session):
+            session.schema_monitor.apply_changes(affected)
+        return affected
+
+    def get_status(self, connection_key: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            state = self._tracked.get(connection_key) or self._new_state(None)
+            return {
+                "enabled": self.enabled,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "poll_interval": self.poll_interval,
+                "connection_key": connection_key,
+                "tracked_connections": sorted(self._tracked),
+                "relations": len(state["signatures"] or {}),
+                "last_poll_at": state["last_poll_at"],
+                "last_poll_ms": state["last_poll_ms"],
+                "last_change_at": state["last_change_at"],
+                "changes_detected": state["changes_detected"],
+            }
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.logger import create_logger
+from app.models.requests.models_db_connector import PGDBConnector
+from app.models.schemas.connection_pool_settings_schema import ConnectionPoolSettings
+from app.services.database_service import DatabaseService, db_session
+
+# Engines unused for this many seconds are disposed
+CONNECTION_IDLE_TIMEOUT = int(os.getenv("CONNECTION_IDLE_TIMEOUT", "900"))
+# Live engines kept at once; the least recently used one is closed beyond it
+CONNECTION_REGISTRY_MAX = int(os.getenv("CONNECTION_REGISTRY_MAX", "16"))
+CONNECTION_EVICT_INTERVAL = int(os.getenv("CONNECTION_EVICT_INTERVAL", "60"))
+
+
+class ConnectionRegistry:
+    """
+    Live DatabaseService instances keyed by saved connection id, so several
+    target databases can be used at the same time. Each one has its own
+    engine and pool; idle ones are disposed by a background sweeper. The
+    global db_session (/connections/use) is not part of the registry.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: int = CONNECTION_IDLE_TIMEOUT,
+        max_sessions: int = CONNECTION_REGISTRY_MAX,
+        evict_interval: int = CONNECTION_EVICT_INTERVAL,
+    ):
+        self.logger = create_logger()
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.evict_interval = evict_interval
+
+        # connection_id -> {"session", "opened_at", "last_used"}, least recently used first
+        self._sessions: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes connects so concurrent first uses open a single engine
+        self._open_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.evictions = 0
+
+    def get(self, connection_id: int) -> Optional[DatabaseService]:
+        with self._lock:
+            entry = self._sessions.get(connection_id)
+            if entry is None:
+                return None
+            entry["last_used"] = time.time()
+            self._sessions.move_to_end(connection_id)
+            return entry["session"]
+
+    def get_or_open(
+        self,
+        connection_id: int,
+        load_config: Callable[[], Tuple[PGDBConnector, Optional[ConnectionPoolSettings]]],
+    ) -> Optional[DatabaseService]:
+        session = self.get(connection_id)
+        if session is not None:
+            return session
+
+        with self._open_lock:
+            session = self.get(connection_id)
+            if session is None:
+                config, pool_settings = load_config()
+                session = self.open(connection_id, config, pool_settings)
+            return session
+
+    def open(
+        self,
+        connection_id: int,
+        config: PGDBConnector,
+        pool_settings: Optional[ConnectionPoolSettings] = None,
+    ) -> Optional[DatabaseService]:
+        """Connect and register a new engine; None when the connection fails."""
+        # Same listeners as db_session: warm-up, snapshot and catalog change detection
+        session = DatabaseService(
+            schema_monitor=db_session.schema_monitor,
+            connect_listeners=db_session.connect_listeners,
+        )
+        if not session.connect(config, pool_settings):
+            return None
+
+        now = time.time()
+        with self._lock:
+            previous = self._sessions.pop(connection_id, None)
+            self._sessions[connection_id] = {
+                "session": session,
+                "opened_at": now,
+                "last_used": now,
+            }
+            # Least recently used first; sessions still serving a request are kept
+            overflow = []
+            excess = len(self._sessions) - self.max_sessions
+            for cid, entry in list(self._sessions.items()):
+                if len(overflow) >= excess:
+                    break
+                if cid != connection_id and not entry["session"].in_use:
+                    overflow.append((cid, self._sessions.pop(cid)))
+            self.evictions += len(overflow)
+
+        if previous is not None:
+            previous["session"].disconnect()
+        for evicted_id, entry in overflow:
+            entry["session"].disconnect()
+            self.logger.info("Closed least recently used connection %s", evicted_id)
+
+        self.logger.info("Registered connection %s (%s)", connection_id, session.connection_key)
+        self.start()
+        return session
+
+    def close(self, connection_id: int) -> bool:
+        with self._lock:
+            entry = self._sessions.pop(connection_id, None)
+
+        if entry is None:
+            return False
+
+        entry["session"].disconnect()
+        self.logger.info("Closed connection %s", connection_id)
+        return True
+
+    def evict_idle(self) -> List[int]:
+        """Dispose engines idle for longer than idle_timeout and not in use."""
+        deadline = time.time() - self.idle_timeout
+        with self._lock:
+            idle = [
+                (cid, entry)
+                for cid, entry in self._sessions.items()
+                if entry["last_used"] < deadline and not entry["session"].in_use
+            ]
+            for cid, _ in idle:
+                del self._sessions[cid]
+            self.evictions += len(idle)
+
+        for cid, entry in idle:
+            # Checked-out connections stay usable until returned to the pool
+            entry["session"].disconnect()
+            self.logger.info("Closed idle connection %s", cid)
+
+        return [cid for cid, _ in idle]
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._evict_loop, name="connection-registry-evictor", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _evict_loop(self) -> None:
+        while not self._stop.wait(self.evict_interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                self.logger.warning("Idle connection eviction failed: %s", e)
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            sessions = {
+                cid: {
+                    "connection_key": entry["session"].connection_key,
+                    "opened_at": entry["opened_at"],
+                    "idle_seconds": round(now - entry["last_used"], 1),
+                    "in_use": entry["session"].in_use,
+                }
+                for cid, entry in self._sessions.items()
+            }
+
+        return {
+            "idle_timeout": self.idle_timeout,
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "sessions": sessions,
+        }
@@ -4,12 +4,18 @@ from sqlalchemy.exc import IntegrityError
 
 from app.models.requests.models_db_connector import PGDBConnector
 from app.models.schemas.connection_schema import Connection
+from app.models.schemas.connection_pool_settings_schema import ConnectionPoolSettings
 from app.repository.connection_repository import ConnectionRepository
+from app.repository.connection_pool_settings_repository import (
+    ConnectionPoolSettingsRepository,
+)
 from app.services.database_service import db_session
+from app.core.connection_registry_provider import connection_registry
 
 
 # Repository instance
 connection_repo = ConnectionRepository()
+pool_settings_repo = ConnectionPoolSettingsRepository()
 
 
 def create_connection(
@@ -65,7 +71,8 @@ def activate_connection(connection_id: int, password: str):
         name=conn.name,
     )
 
-    success = db_session.connect(config)
+    pool_settings = pool_settings_repo.get_by_connection_id(connection_id)
+    success = db_session.connect(config, pool_settings)
     if not success:
         raise HTTPException(status_code=400, detail="Failed to connect to database.")
 
@@ -88,7 +95,84 @@ def delete_connection_by_id(connection_id: int):
         if not deleted:
             return {"error": "Connection not found."}
 
+        pool_settings_repo.delete_by_connection_id(connection_id)
+        connection_registry.close(connection_id)
+
         return {"message": "Connection deleted successfully."}
 
     except Exception as e:
         return {"error": str(e)}
+
+
+def get_pool_settings(connection_id: int):
+    """Pool settings of a saved connection (defaults when never customised)."""
+    if not connection_repo.get_by_id(connection_id):
+        raise HTTPException(status_code=404, detail="Connection not found.")
+
+    settings = pool_settings_repo.get_by_connection_id(connection_id)
+    if settings is None:
+        settings = ConnectionPoolSettings(connection_id=connection_id)
+    return settings.as_dict()
+
+
+def update_pool_settings(connection_id: int, fields: dict):
+    """Store pool settings; they apply the next time the connection is activated."""
+    if not connection_repo.get_by_id(connection_id):
+        raise HTTPException(status_code=404, detail="Connection not found.")
+
+    settings = pool_settings_repo.upsert(connection_id, **fields)
+    return settings.as_dict()
+
+
+def get_pool_stats(connection_id: int | None = None):
+    """Pool usage of a registered connection, or of the active one."""
+    if connection_id is not None:
+        session = connection_registry.get(connection_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Connection is not open.")
+        return session.get_pool_stats()
+
+    if not db_session.is_connected():
+        raise HTTPException(status_code=400, detail="No active database connection.")
+    return db_session.get_pool_stats()
+
+
+def resolve_session(connection_id: int | None):
+    """
+    Database session for a request: the registered engine of `connection_id`
+    (opened with the saved credentials on first use), or the active
+    connection when no id is given.
+    """
+    if connection_id is None:
+        return db_session
+
+    def load_config():
+        conn = connection_repo.get_by_id(connection_id)
+        if not conn:
+            raise HTTPException(status_code=404, detail="Connection not found.")
+
+        config = PGDBConnector(
+            host=conn.host,
+            port=conn.port,
+            user=conn.user,
+            password=conn.password,
+            database=conn.database,
+            name=conn.name,
+        )
+        return config, pool_settings_repo.get_by_connection_id(connection_id)
+
+    session = connection_registry.get_or_open(connection_id, load_config)
+    if session is None:
+        raise HTTPException(status_code=400, detail="Failed to connect to database.")
+    return session
+
+
+def get_open_connections():
+    """Engines currently held by the connection registry."""
+    return connection_registry.get_status()
+
+
+def close_open_connection(connection_id: int):
+    if not connection_registry.close(connection_id):
+        raise HTTPException(status_code=404, detail="Connection is not open.")
+    return {"message": "Connection closed."}
@@ -1,9 +1,27 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
 from app.models.requests.models_db_connector import PGDBConnector
+from app.models.schemas.connection_pool_settings_schema import ConnectionPoolSettings
+from app.core.logger import create_logger
 
 # CHANGE: imports for automatic schema-change invalidation
 from app.core.metadata_cache_provider import metadata_cache
 from app.services.sql_schema_change_monitor import SqlSchemaChangeMonitor
+from app.utils.sql_lexer import has_multiple_statements
+
+# Rows fetched per round trip by server-side cursors
+EXECUTE_STREAM_BATCH = int(os.getenv("EXECUTE_STREAM_BATCH", "1000"))
+# Catalog lookups and execute_sql on an asyncpg engine instead of worker threads
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "true").lower() in ("1", "true", "yes")
 
 
 class DatabaseService:
@@ -11,34 +29,256 @@ class DatabaseService:
     Manages a single persistent database connection for the local environment.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        schema_monitor: Optional[SqlSchemaChangeMonitor] = None,
+        connect_listeners: Optional[list] = None,
+    ):
+        self.logger = create_logger()
         self.engine = None
         self.db_url = None
+        # asyncpg engine, created lazily on the event loop that first needs it
+        self.async_engine = None
+        self.async_db_url = None
+        self._async_loop = None
+        # Password-free identity of the connected database, used for cache keys
+        self.connection_key = None
+        self.pool_settings = ConnectionPoolSettings()
+
+        # Time spent waiting for a pooled connection
+        self._wait_lock = threading.Lock()
+        self._reset_wait_stats()
+
+        # Requests and workers currently using this session, see lease()
+        self._leases = 0
+        self._lease_lock = threading.Lock()
+
+        # Sessions of the connection registry share the global monitor and its listeners
+        self.schema_monitor = schema_monitor or SqlSchemaChangeMonitor(metadata_cache)
+        # Called with this session after every successful connect
+        self.connect_listeners = connect_listeners if connect_listeners is not None else []
+
+    @contextmanager
+    def lease(self):
+        """Mark the session as in use, so the connection registry does not close it."""
+        with self._lease_lock:
+            self._leases += 1
+        try:
+            yield self
+        finally:
+            with self._lease_lock:
+                self._leases -= 1
+
+    @property
+    def in_use(self) -> bool:
+        return self._leases > 0
+
+    def add_connect_listener(self, listener) -> None:
+        self.connect_listeners.append(listener)
+
+    def _notify_connect(self) -> None:
+        for listener in self.connect_listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                self.logger.warning("Connect listener failed: %s", e)
+
+    def _engine_options(self, settings: ConnectionPoolSettings) -> dict:
+        connect_args = {"application_name": settings.application_name}
+        if settings.statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={int(settings.statement_timeout_ms)}"
+
+        return {
+            "pool_size": settings.pool_size,
+            "max_overflow": settings.max_overflow,
+            "pool_timeout": settings.pool_timeout,
+            "pool_recycle": settings.pool_recycle,
+            "pool_pre_ping": settings.pre_ping,
+            "connect_args": connect_args,
+        }
+
+    def _async_engine_options(self, settings: ConnectionPoolSettings) -> dict:
+        # asyncpg takes server settings instead of libpq options
+        server_settings = {"application_name": settings.application_name}
+        if settings.statement_timeout_ms:
+            server_settings["statement_timeout"] = str(int(settings.statement_timeout_ms))
 
-        self.schema_monitor = SqlSchemaChangeMonitor(metadata_cache)
+        options = self._engine_options(settings)
+        options["connect_args"] = {"server_settings": server_settings}
+        return options
 
-    def connect(self, config: PGDBConnector) -> bool:
+    def connect(
+        self,
+        config: PGDBConnector,
+        pool_settings: Optional[ConnectionPoolSettings] = None,
+    ) -> bool:
         self.db_url = f"postgresql://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
-        engine = create_engine(self.db_url)
+        settings = pool_settings or ConnectionPoolSettings()
+        engine = create_engine(self.db_url, **self._engine_options(settings))
 
         try:
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
+            if self.engine is not None:
+                self.engine.dispose()
+            self._dispose_async_engine()
             self.engine = engine
+            self.async_db_url = (
+                f"postgresql+asyncpg://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
+            )
+            self.pool_settings = settings
+            self.connection_key = (
+                f"{config.user}@{config.host}:{config.port}/{config.database}"
+            )
+            self._reset_wait_stats()
+            self._notify_connect()
             return True
         except Exception:
+            engine.dispose()
+            self._dispose_async_engine()
             self.engine = None
+            self.async_db_url = None
+            self.connection_key = None
             return False
 
-    def execute(self, query: str):
+    def _reset_wait_stats(self) -> None:
+        with self._wait_lock:
+            self._checkouts = 0
+            self._wait_total_ms = 0.0
+            self._wait_max_ms = 0.0
+            self._checkout_timeouts = 0
+
+    def _record_checkout(self, started: Optional[float]) -> None:
+        """Checkout that began at `started` (perf_counter); None records a timeout."""
+        with self._wait_lock:
+            if started is None:
+                self._checkout_timeouts += 1
+                return
+            waited_ms = (time.perf_counter() - started) * 1000
+            self._checkouts += 1
+            self._wait_total_ms += waited_ms
+            self._wait_max_ms = max(self._wait_max_ms, waited_ms)
+
+    @contextmanager
+    def connection(self):
+        """Pooled connection of the active engine, timing the checkout."""
         if not self.engine:
             raise ValueError("No active database connection. Call /connect_db first.")
 
-        with self.engine.connect() as conn:
+        started = time.perf_counter()
+        try:
+            conn = self.engine.connect()
+        except PoolTimeoutError:
+            self._record_checkout(None)
+            raise
+        self._record_checkout(started)
+
+        with conn:
+            yield conn
+
+    @property
+    def async_enabled(self) -> bool:
+        return ASYNC_DB_ENABLED and self.engine is not None and self.async_db_url is not None
+
+    def _get_async_engine(self):
+        """
+        Async engine of the running event loop. asyncpg connections belong to
+        the loop that opened them, so another loop gets a new engine.
+        """
+        if not self.async_enabled:
+            raise ValueError("No active database connection. Call /connect_db first.")
+
+        loop = asyncio.get_running_loop()
+        if self.async_engine is None or self._async_loop is not loop:
+            self._dispose_async_engine()
+            self.async_engine = create_async_engine(
+                self.async_db_url, **self._async_engine_options(self.pool_settings)
+            )
+            self._async_loop = loop
+        return self.async_engine
+
+    def _dispose_async_engine(self) -> None:
+        engine, loop = self.async_engine, self._async_loop
+        self.async_engine = None
+        self._async_loop = None
+        if engine is None:
+            return
+
+        if loop is not None and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                loop.create_task(engine.dispose())
+            else:
+                asyncio.run_coroutine_threadsafe(engine.dispose(), loop)
+        else:
+            # The loop that owned the connections is gone; just drop the pool
+            engine.sync_engine.dispose(close=False)
+
+    @asynccontextmanager
+    async def aconnection(self):
+        """Async counterpart of connection(), on the asyncpg engine."""
+        engine = self._get_async_engine()
+
+        started = time.perf_counter()
+        try:
+            conn = await engine.connect()
+        except PoolTimeoutError:
+            self._record_checkout(None)
+            raise
+        self._record_checkout(started)
+
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    def get_pool_stats(self) -> dict:
+        if not self.engine:
+            raise ValueError("No active database connection. Call /connect_db first.")
+
+        pool = self.engine.pool
+        with self._wait_lock:
+            waits = {
+                "checkouts": self._checkouts,
+                "total_ms": round(self._wait_total_ms, 2),
+                "avg_ms": round(self._wait_total_ms / self._checkouts, 3)
+                if self._checkouts
+                else None,
+                "max_ms": round(self._wait_max_ms, 2),
+                "timeouts": self._checkout_timeouts,
+            }
+
+        async_pool = None
+        if self.async_engine is not None:
+            apool = self.async_engine.pool
+            async_pool = {
+                "pool_size": apool.size(),
+                "checked_out": apool.checkedout(),
+                "checked_in": apool.checkedin(),
+                "overflow": apool.overflow(),
+            }
+
+        return {
+            "connection_key": self.connection_key,
+            "settings": self.pool_settings.as_dict(),
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "async_pool": async_pool,
+            "wait": waits,
+        }
+
+    def execute(self, query: str):
+        with self.connection() as conn:
             result = conn.execute(text(query))
 
             # CHANGE: detect and process schema changes after SQL execution
-            self.schema_monitor.handle_schema_change(query)
+            with use_session(self):
+                self.schema_monitor.handle_schema_change(query, conn)
 
             try:
                 rows = result.mappings().all()
@@ -47,10 +287,64 @@ class DatabaseService:
                 conn.commit()
                 return {"message": "SQL executed successfully."}
 
+    async def aexecute(self, query: str):
+        """
+        execute() on the event loop. Scripts go through the sync engine:
+        asyncpg prepares every statement, which allows only one.
+        """
+        if not self.async_enabled or has_multiple_statements(query):
+            return await asyncio.to_thread(self.execute, query)
+
+        async with self.aconnection() as conn:
+            result = await conn.execute(text(query))
+
+            with use_session(self):
+                await self.schema_monitor.ahandle_schema_change(query, conn)
+
+            if result.returns_rows:
+                return [dict(row) for row in result.mappings().all()]
+            await conn.commit()
+            return {"message": "SQL executed successfully."}
+
+    def open_stream(self, query: str, batch_size: int = EXECUTE_STREAM_BATCH):
+        """
+        Run a query in a read-only transaction on a server-side cursor.
+        Returns (columns, batches): errors in the statement raise here, rows
+        are fetched `batch_size` at a time while `batches` is consumed, and
+        the connection goes back to the pool when it is exhausted or closed.
+        """
+        stack = ExitStack()
+        try:
+            conn = stack.enter_context(self.connection())
+            conn.execute(text("SET TRANSACTION READ ONLY"))
+            result = conn.execution_options(
+                stream_results=True, max_row_buffer=batch_size
+            ).execute(text(query))
+
+            if not result.returns_rows:
+                raise ValueError("Only statements that return rows can be streamed.")
+            columns = list(result.keys())
+        except BaseException:
+            stack.close()
+            raise
+
+        def batches():
+            try:
+                for partition in result.partitions(batch_size):
+                    yield partition
+            finally:
+                result.close()
+                stack.close()
+
+        return columns, batches()
+
     def disconnect(self) -> bool:
         if self.engine:
             self.engine.dispose()
+            self._dispose_async_engine()
             self.engine = None
+            self.async_db_url = None
+            self.connection_key = None
             return True
         return False
 
@@ -60,3 +354,23 @@ class DatabaseService:
 
 # GLOBAL SINGLETON
 db_session = DatabaseService()
+
+# Session selected for the current request; db_session when none was selected
+_current_session: ContextVar[Optional[DatabaseService]] = ContextVar(
+    "current_session", default=None
+)
+
+
+def current_session() -> DatabaseService:
+    return _current_session.get() or db_session
+
+
+@contextmanager
+def use_session(session: DatabaseService):
+    """Route SchemaService, tools and caches to `session` within the block."""
+    with session.lease():
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
@@ -0,0 +1,321 @@
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.utils.sql_lexer import SqlLexer, Token
+
+# Relation-like objects whose columns the metadata caches hold
+RELATION_KINDS = (
+    ("materialized", "view"),
+    ("foreign", "table"),
+    ("table",),
+    ("view",),
+)
+# Changing these can alter how existing columns are described
+GLOBAL_KINDS = {"type", "domain", "extension"}
+CREATE_MODIFIERS = {"or", "replace", "temp", "temporary", "unlogged", "global", "local", "recursive"}
+
+
+class DdlChange(NamedTuple):
+    schema: Optional[str]  # None: unqualified, resolved against search_path
+    table: Optional[str]  # None: the schema itself (created, dropped or renamed)
+    created: bool  # unqualified CREATE lands in the first search_path schema
+    search_path: Optional[Tuple[str, ...]]  # set earlier in the same script
+
+
+class DdlAnalysis:
+    def __init__(self):
+        self.changes: List[DdlChange] = []
+        # A statement whose effects cannot be bound to relations
+        self.everything = False
+
+    @property
+    def is_schema_change(self) -> bool:
+        return self.everything or bool(self.changes)
+
+    @property
+    def needs_search_path(self) -> bool:
+        return any(c.schema is None and c.search_path is None for c in self.changes)
+
+    def resolve(
+        self,
+        search_path: Sequence[str],
+        cached_schemas: Optional[Callable[[str], List[str]]] = None,
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Affected (schema, table) pairs; empty means everything. Unqualified
+        names go to the first search_path schema that holds the table in the
+        cache (the catalog may no longer have it), else to the first one.
+        """
+        if self.everything:
+            return []
+
+        affected: List[Tuple[Optional[str], Optional[str]]] = []
+        for change in self.changes:
+            schema = change.schema
+            if schema is None:
+                path = list(change.search_path or search_path)
+                schema = path[0] if path else None
+                if not change.created and cached_schemas is not None and path:
+                    known = set(cached_schemas(change.table))
+                    schema = next((s for s in path if s in known), schema)
+
+            if (schema, change.table) not in affected:
+                affected.append((schema, change.table))
+
+        return affected
+
+
+class DdlAnalyzer:
+    """
+    Finds the relations a SQL script creates, alters, renames, drops,
+    truncates or comments on. Works statement by statement on lexer tokens,
+    so quoted names, IF [NOT] EXISTS, ONLY, name lists and SET search_path
+    inside the script are handled. DDL on types, domains and extensions (or
+    DROP OWNED) marks everything; objects that never appear in table
+    metadata (indexes, sequences, functions, grants...) are ignored.
+    Dependents dropped by CASCADE are left to CatalogChangeDetector.
+    """
+
+    def __init__(self):
+        self.lexer = SqlLexer()
+
+    def analyze(self, sql: str) -> DdlAnalysis:
+        analysis = DdlAnalysis()
+        search_path: Optional[Tuple[str, ...]] = None
+
+        for tokens in self.lexer.split_statements(sql):
+            head = tokens[0]
+            if head.is_word("set"):
+                search_path = self._search_path(tokens, search_path)
+            elif head.is_word("create"):
+                self._create(tokens, analysis, search_path)
+            elif head.is_word("alter"):
+                self._alter(tokens, analysis, search_path)
+            elif head.is_word("drop"):
+                self._drop(tokens, analysis, search_path)
+            elif head.is_word("truncate"):
+                self._truncate(tokens, analysis, search_path)
+            elif head.is_word("comment"):
+                self._comment(tokens, analysis, search_path)
+
+        return analysis
+
+    # -- statement forms -------------------------------------------------
+
+    def _create(self, tokens, analysis, search_path) -> None:
+        i = 1
+        while i < len(tokens) and tokens[i].kind == "word" and tokens[i].value.lower() in CREATE_MODIFIERS:
+            i += 1
+
+        if self._word(tokens, i) == "schema":
+            i = self._skip_words(tokens, i + 1, "if", "not", "exists")
+            if self._word(tokens, i) != "authorization" and i < len(tokens):
+                analysis.changes.append(DdlChange(tokens[i].name, None, True, search_path))
+            elif i + 1 < len(tokens):
+                # CREATE SCHEMA AUTHORIZATION role names the schema after the role
+                analysis.changes.append(DdlChange(tokens[i + 1].name, None, True, search_path))
+            return
+
+        if self._word(tokens, i) in GLOBAL_KINDS - {"type", "domain"}:
+            analysis.everything = True
+            return
+
+        i = self._relation_kind(tokens, i)
+        if i is None:
+            return
+
+        i = self._skip_words(tokens, i, "if", "not", "exists")
+        name, i = self._qualified_name(tokens, i)
+        if name is None:
+            return
+        self._add(analysis, name, search_path, created=True)
+
+        # CREATE TABLE child PARTITION OF parent changes the parent's partitions
+        for j in range(i, len(tokens) - 1):
+            if tokens[j].is_word("partition") and tokens[j + 1].is_word("of"):
+                parent, _ = self._qualified_name(tokens, j + 2)
+                if parent is not None:
+                    self._add(analysis, parent, search_path)
+                break
+
+    def _alter(self, tokens, analysis, search_path) -> None:
+        kind = self._word(tokens, 1)
+
+        if kind in GLOBAL_KINDS:
+            analysis.everything = True
+            return
+
+        if kind == "schema":
+            name, i = self._qualified_name(tokens, 2)
+            if name is None:
+                return
+            if self._word(tokens, i) == "rename" and self._word(tokens, i + 1) == "to":
+                analysis.changes.append(DdlChange(name[-1], None, False, search_path))
+                if i + 2 < len(tokens):
+                    analysis.changes.append(DdlChange(tokens[i + 2].name, None, True, search_path))
+            return
+
+        i = self._relation_kind(tokens, 1)
+        if i is None:
+            return
+        # ALTER TABLE ALL IN TABLESPACE only moves storage
+        if self._word(tokens, i) == "all":
+            return
+
+        i = self._skip_words(tokens, i, "if", "exists", "only")
+        name, i = self._qualified_name(tokens, i)
+        if name is None:
+            return
+        self._add(analysis, name, search_path)
+
+        for j in range(i, len(tokens) - 1):
+            word, following = self._word(tokens, j), self._word(tokens, j + 1)
+            if word == "rename" and following == "to" and j + 2 < len(tokens):
+                # The new name lives in the same schema
+                self._add(analysis, name[:-1] + [tokens[j + 2].name], search_path, created=True)
+            elif word == "set" and following == "schema" and j + 2 < len(tokens):
+                analysis.changes.append(
+                    DdlChange(tokens[j + 2].name, name[-1], True, search_path)
+                )
+            elif word in ("attach", "detach") and following == "partition":
+                partition, _ = self._qualified_name(tokens, j + 2)
+                if partition is not None:
+                    self._add(analysis, partition, search_path)
+
+    def _drop(self, tokens, analysis, search_path) -> None:
+        kind = self._word(tokens, 1)
+
+        if kind == "owned" or kind == "extension":
+            analysis.everything = True
+            return
+
+        if kind in ("type", "domain"):
+            # Without CASCADE the drop fails while columns still use the type
+            if any(t.is_word("cascade") for t in tokens):
+                analysis.everything = True
+            return
+
+        if kind == "schema":
+            i = self._skip_words(tokens, 2, "if", "exists")
+            for name in self._name_list(tokens, i):
+                analysis.changes.append(DdlChange(name[-1], None, False, search_path))
+            return
+
+        i = self._relation_kind(tokens, 1)
+        if i is None:
+            return
+        i = self._skip_words(tokens, i, "if", "exists")
+        for name in self._name_list(tokens, i):
+            self._add(analysis, name, search_path)
+
+    def _truncate(self, tokens, analysis, search_path) -> None:
+        i = self._skip_words(tokens, 1, "table", "only")
+        for name in self._name_list(tokens, i, allow_only=True):
+            self._add(analysis, name, search_path)
+
+    def _comment(self, tokens, analysis, search_path) -> None:
+        if self._word(tokens, 1) != "on":
+            return
+
+        kind = self._word(tokens, 2)
+        if kind == "column":
+            name, _ = self._qualified_name(tokens, 3)
+            if name is not None and len(name) >= 2:
+                # [schema.]table.column
+                self._add(analysis, name[:-1], search_path)
+            return
+
+        if kind == "constraint":
+            for j in range(3, len(tokens)):
+                if tokens[j].is_word("on"):
+                    j = self._skip_words(tokens, j + 1, "domain")
+                    if tokens[j - 1].is_word("domain"):
+                        return
+                    name, _ = self._qualified_name(tokens, j)
+                    if name is not None:
+                        self._add(analysis, name, search_path)
+                    return
+            return
+
+        i = self._relation_kind(tokens, 2)
+        if i is None:
+            return
+        name, _ = self._qualified_name(tokens, i)
+        if name is not None:
+            self._add(analysis, name, search_path)
+
+    def _search_path(self, tokens, current):
+        i = self._skip_words(tokens, 1, "session", "local")
+        if self._word(tokens, i) != "search_path":
+            return current
+        i += 1
+        if i < len(tokens) and (tokens[i].is_word("to") or tokens[i].value == "="):
+            i += 1
+        if self._word(tokens, i) == "default":
+            return None
+
+        schemas = []
+        for token in tokens[i:]:
+            if token.kind in ("word", "ident"):
+                schemas.append(token.name)
+            elif token.kind == "string":
+                # '"$user", public' and 'a, b' forms
+                schemas.extend(
+                    part.strip().strip('"') for part in token.value.split(",") if part.strip()
+                )
+        return tuple(s for s in schemas if s != "$user") or None
+
+    # -- token helpers ---------------------------------------------------
+
+    def _word(self, tokens: List[Token], i: int) -> Optional[str]:
+        if i < len(tokens) and tokens[i].kind == "word":
+            return tokens[i].value.lower()
+        return None
+
+    def _skip_words(self, tokens: List[Token], i: int, *words: str) -> int:
+        while i < len(tokens) and tokens[i].is_word(*words):
+            i += 1
+        return i
+
+    def _relation_kind(self, tokens: List[Token], i: int) -> Optional[int]:
+        """Index after TABLE / VIEW / MATERIALIZED VIEW / FOREIGN TABLE, or None."""
+        for kind in RELATION_KINDS:
+            if all(self._word(tokens, i + k) == word for k, word in enumerate(kind)):
+                return i + len(kind)
+        return None
+
+    def _qualified_name(self, tokens: List[Token], i: int):
+        """[db.][schema.]name[.column] starting at i, as a list of parts, and the index after it."""
+        if i >= len(tokens) or tokens[i].kind not in ("word", "ident"):
+            return None, i
+
+        parts = [tokens[i].name]
+        i += 1
+        while (
+            i + 1 < len(tokens)
+            and tokens[i].value == "."
+            and tokens[i + 1].kind in ("word", "ident")
+        ):
+            parts.append(tokens[i + 1].name)
+            i += 2
+        return parts, i
+
+    def _name_list(self, tokens: List[Token], i: int, allow_only: bool = False) -> Iterable[list]:
+        """Comma separated names (DROP / TRUNCATE), ignoring `*` and ONLY."""
+        while i < len(tokens):
+            if allow_only:
+                i = self._skip_words(tokens, i, "only")
+            name, i = self._qualified_name(tokens, i)
+            if name is None:
+                return
+            yield name
+            if i < len(tokens) and tokens[i].value == "*":
+                i += 1
+            if i >= len(tokens) or tokens[i].value != ",":
+                return
+            i += 1
+
+    def _add(self, analysis: DdlAnalysis, name: list, search_path, created: bool = False) -> None:
+        # A database prefix can only name the current database
+        name = name[-2:]
+        schema = name[0] if len(name) == 2 else None
+        analysis.changes.append(DdlChange(schema, name[-1], created, search_path))
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import re
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.logger import create_logger
+from app.services.database_service import use_session
+from app.utils.sql_lexer import SqlLexer, has_multiple_statements
+
+EXECUTION_POLICY_ENABLED = os.getenv("EXECUTION_POLICY_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Lets a request opt out of the policy with "guarded": false
+EXECUTION_ALLOW_UNGUARDED = os.getenv("EXECUTION_ALLOW_UNGUARDED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+EXECUTION_STATEMENT_TIMEOUT_MS = int(os.getenv("EXECUTION_STATEMENT_TIMEOUT_MS", "15000"))
+EXECUTION_LOCK_TIMEOUT_MS = int(os.getenv("EXECUTION_LOCK_TIMEOUT_MS", "2000"))
+# Planner estimates above which a statement is rejected or limited
+EXECUTION_MAX_COST = float(os.getenv("EXECUTION_MAX_COST", "1000000"))
+EXECUTION_MAX_PLAN_ROWS = float(os.getenv("EXECUTION_MAX_PLAN_ROWS", "1000000"))
+# "reject" or "limit" (wrap row-returning queries in a LIMIT)
+EXECUTION_ON_EXCEED = os.getenv("EXECUTION_ON_EXCEED", "reject").lower()
+# Rows returned by a guarded call, and the LIMIT used when auto-limiting
+EXECUTION_ROW_LIMIT = int(os.getenv("EXECUTION_ROW_LIMIT", "1000"))
+
+_LEADING_NOISE_RE = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/|\()*", re.DOTALL)
+_FIRST_WORD_RE = re.compile(r"[A-Za-z]+")
+
+# Statements EXPLAIN accepts; DDL and utility commands skip the cost gate
+EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "MERGE", "VALUES", "TABLE"}
+ROW_QUERIES = {"SELECT", "WITH", "VALUES", "TABLE"}
+# Read through a server-side cursor; WITH only without data-modifying CTEs,
+# which cursors reject (see ExecutionPolicy._streamed)
+STREAMED_QUERIES = {"SELECT", "VALUES", "TABLE"}
+DATA_MODIFYING_WORDS = ("insert", "update", "delete", "merge")
+# Would change or end the transaction that holds the local timeouts, or leak
+# session settings into the pool
+CONTROL_STATEMENTS = {
+    "SET", "RESET", "BEGIN", "START", "COMMIT", "END", "ROLLBACK", "ABORT",
+    "SAVEPOINT", "RELEASE", "DISCARD", "PREPARE", "LISTEN",
+}
+
+
+def statement_kind(sql: str) -> str:
+    """First keyword of the statement, skipping comments and parentheses."""
+    rest = _LEADING_NOISE_RE.sub("", sql, count=1)
+    match = _FIRST_WORD_RE.match(rest)
+    return match.group(0).upper() if match else ""
+
+
+def plan_estimate(explain_json) -> Dict[str, Any]:
+    """Top node estimates of an EXPLAIN (FORMAT JSON) result."""
+    plan = explain_json[0]["Plan"]
+    return {
+        "node_type": plan.get("Node Type"),
+        "startup_cost": plan.get("Startup Cost"),
+        "total_cost": plan.get("Total Cost"),
+        "plan_rows": plan.get("Plan Rows"),
+        "plan_width": plan.get("Plan Width"),
+    }
+
+
+class ExecutionPolicyError(RuntimeError):
+    """Raised when a statement's estimated cost or rows exceed the policy."""
+
+    def __init__(self, message: str, plan: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.plan = plan
+
+
+class ExecutionPolicy:
+    """
+    Guarded execution of user/LLM SQL: per-transaction statement and lock
+    timeouts, an EXPLAIN (FORMAT JSON) cost and row gate before running the
+    statement, and a cap on the rows returned.
+    """
+
+    def __init__(
+        self,
+        statement_timeout_ms: int = EXECUTION_STATEMENT_TIMEOUT_MS,
+        lock_timeout_ms: int = EXECUTION_LOCK_TIMEOUT_MS,
+        max_cost: float = EXECUTION_MAX_COST,
+        max_plan_rows: float = EXECUTION_MAX_PLAN_ROWS,
+        on_exceed: str = EXECUTION_ON_EXCEED,
+        row_limit: int = EXECUTION_ROW_LIMIT,
+    ):
+        self.logger = create_logger()
+        self.statement_timeout_ms = statement_timeout_ms
+        self.lock_timeout_ms = lock_timeout_ms
+        self.max_cost = max_cost
+        self.max_plan_rows = max_plan_rows
+        self.on_exceed = on_exceed
+        self.row_limit = row_limit
+
+    def set_timeouts(self, conn, statement_timeout_ms: Optional[int] = None) -> None:
+        """SET LOCAL equivalents: they end with the current transaction."""
+        conn.execute(*self._timeouts_statement(statement_timeout_ms))
+
+    def _timeouts_statement(self, statement_timeout_ms: Optional[int]):
+        timeout = self.statement_timeout_ms
+        if statement_timeout_ms is not None:
+            timeout = min(statement_timeout_ms, timeout)
+
+        return (
+            text(
+                "SELECT set_config('statement_timeout', :statement_timeout, true), "
+                "set_config('lock_timeout', :lock_timeout, true)"
+            ),
+            {"statement_timeout": str(timeout), "lock_timeout": str(self.lock_timeout_ms)},
+        )
+
+    def explain(self, conn, sql: str) -> Dict[str, Any]:
+        """Plan estimate without executing the statement."""
+        explain_json = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return plan_estimate(explain_json)
+
+    def exceeds(self, plan: Dict[str, Any]) -> Optional[str]:
+        if (plan["total_cost"] or 0) > self.max_cost:
+            return f"estimated cost {plan['total_cost']} exceeds {self.max_cost}"
+        if (plan["plan_rows"] or 0) > self.max_plan_rows:
+            return f"estimated rows {plan['plan_rows']} exceed {self.max_plan_rows}"
+        return None
+
+    def execute(
+        self,
+        session,
+        sql: str,
+        on_exceed: Optional[str] = None,
+        statement_timeout_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        sql, kind = self._check_statement(sql)
+        on_exceed = on_exceed or self.on_exceed
+        plan = None
+        limited = False
+
+        with session.connection() as conn:
+            self.set_timeouts(conn, statement_timeout_ms)
+
+            if kind in EXPLAINABLE:
+                plan = self.explain(conn, sql)
+                reason = self.exceeds(plan)
+
+                if reason and on_exceed == "limit" and kind in ROW_QUERIES:
+                    sql = self._limited(sql)
+                    plan = self.explain(conn, sql)
+                    limited = True
+                    reason = self.exceeds(plan)
+
+                if reason:
+                    self.logger.warning("Execution rejected: %s", reason)
+                    raise ExecutionPolicyError(f"Query rejected: {reason}.", plan)
+
+            if self._streamed(sql, kind):
+                # Only row_limit + 1 rows ever reach the client
+                conn = conn.execution_options(
+                    stream_results=True, max_row_buffer=self.row_limit + 1
+                )
+            result = conn.execute(text(sql))
+
+            truncated = False
+            if result.returns_rows:
+                rows = [dict(row) for row in result.mappings().fetchmany(self.row_limit + 1)]
+                truncated = len(rows) > self.row_limit
+                payload: Any = rows[: self.row_limit]
+                result.close()
+            else:
+                payload = {"message": "SQL executed successfully."}
+
+            conn.commit()
+
+            # CHANGE: detect and process schema changes after SQL execution
+            with use_session(session):
+                session.schema_monitor.handle_schema_change(sql, conn)
+
+        return {
+            "result": payload,
+            "plan": plan,
+            "limited": limited,
+            "truncated": truncated,
+        }
+
+    async def aexecute(
+        self,
+        session,
+        sql: str,
+        on_exceed: Optional[str] = None,
+        statement_timeout_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """execute() on the session's async engine, or in a worker thread without one."""
+        if not session.async_enabled:
+            return await asyncio.to_thread(
+                self.execute, session, sql, on_exceed, statement_timeout_ms
+            )
+
+        sql, kind = self._check_statement(sql)
+        on_exceed = on_exceed or self.on_exceed
+        plan = None
+        limited = False
+
+        async with session.aconnection() as conn:
+            await conn.execute(*self._timeouts_statement(statement_timeout_ms))
+
+            if kind in EXPLAINABLE:
+                plan = await self.aexplain(conn, sql)
+                reason = self.exceeds(plan)
+
+                if reason and on_exceed == "limit" and kind in ROW_QUERIES:
+                    sql = self._limited(sql)
+                    plan = await self.aexplain(conn, sql)
+                    limited = True
+                    reason = self.exceeds(plan)
+
+                if reason:
+                    self.logger.warning("Execution rejected: %s", reason)
+                    raise ExecutionPolicyError(f"Query rejected: {reason}.", plan)
+
+            truncated = False
+            if self._streamed(sql, kind):
+                # Server-side cursor: only row_limit + 1 rows ever reach the client
+                result = await conn.stream(text(sql))
+                rows = [dict(row) for row in await result.mappings().fetchmany(self.row_limit + 1)]
+                await result.close()
+                truncated = len(rows) > self.row_limit
+                payload: Any = rows[: self.row_limit]
+            else:
+                result = await conn.execute(text(sql))
+                if result.returns_rows:
+                    rows = [dict(row) for row in result.mappings().fetchmany(self.row_limit + 1)]
+                    truncated = len(rows) > self.row_limit
+                    payload = rows[: self.row_limit]
+                else:
+                    payload = {"message": "SQL executed successfully."}
+
+            await conn.commit()
+
+            with use_session(session):
+                await session.schema_monitor.ahandle_schema_change(sql, conn)
+
+        return {
+            "result": payload,
+            "plan": plan,
+            "limited": limited,
+            "truncated": truncated,
+        }
+
+    async def aexplain(self, conn, sql: str) -> Dict[str, Any]:
+        result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+        return plan_estimate(result.scalar())
+
+    def _check_statement(self, sql: str):
+        sql = sql.strip().rstrip(";").strip()
+        kind = statement_kind(sql)
+
+        # EXPLAIN must never run a trailing statement, and timeouts must not be reset
+        if has_multiple_statements(sql):
+            raise ExecutionPolicyError("Guarded execution accepts a single statement.")
+        if kind in CONTROL_STATEMENTS:
+            raise ExecutionPolicyError(
+                f"Guarded execution does not run {kind} statements."
+            )
+        return sql, kind
+
+    def _streamed(self, sql: str, kind: str) -> bool:
+        if kind == "WITH":
+            # Also falls back to a plain read for SELECT ... FOR UPDATE inside a CTE
+            return not any(
+                token.is_word(*DATA_MODIFYING_WORDS) for token in SqlLexer().tokenize(sql)
+            )
+        return kind in STREAMED_QUERIES
+
+    def _limited(self, sql: str) -> str:
+        return f"SELECT * FROM ({sql}) AS _limited LIMIT {int(self.row_limit)}"
+
+    def get_settings(self) -> Dict[str, Any]:
+        return {
+            "statement_timeout_ms": self.statement_timeout_ms,
+            "lock_timeout_ms": self.lock_timeout_ms,
+            "max_cost": self.max_cost,
+            "max_plan_rows": self.max_plan_rows,
+            "on_exceed": self.on_exceed,
+            "row_limit": self.row_limit,
+        }
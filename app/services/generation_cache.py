@@ -0,0 +1,144 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.logger import create_logger
+from app.services.database_service import current_session
+
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "512"))
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", "3600"))
+
+_WS_RE = re.compile(r"\s+")
+_EDGE_PUNCT_RE = re.compile(r"^[\s¿¡?!.,;:]+|[\s?!.,;:]+$")
+
+
+def normalize_question(text: str) -> str:
+    """Case, whitespace and edge punctuation insensitive form of a question."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _WS_RE.sub(" ", text)
+    return _EDGE_PUNCT_RE.sub("", text)
+
+
+class GenerationCache:
+    """
+    LRU + TTL cache of final agent answers (sql/explanation), keyed by the
+    normalized question, the active model settings, the agent mode and the
+    schema version of the connection. Schema changes bump the version and
+    drop the entries of that connection.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = GENERATION_CACHE_SIZE,
+        ttl_seconds: Optional[int] = GENERATION_CACHE_TTL,
+    ):
+        self.logger = create_logger()
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._schema_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def schema_fingerprint(self, connection_key: Optional[str]) -> str:
+        with self._lock:
+            version = self._schema_versions.get(connection_key or "", 0)
+        return f"{connection_key}#{version}"
+
+    def make_key(
+        self, user_input: str, settings, mode: str, connection_key: Optional[str]
+    ) -> str:
+        raw = json.dumps(
+            [
+                normalize_question(user_input),
+                settings.model_name,
+                settings.temperature,
+                settings.top_p,
+                settings.seed,
+                settings.system_prompt,
+                settings.context,
+                mode,
+                self.schema_fingerprint(connection_key),
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if self.ttl is not None and time.time() - entry["stored_at"] > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["result"])
+
+    def store(self, key: str, result: Dict[str, Any], connection_key: Optional[str]) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "result": copy.deepcopy(result),
+                "stored_at": time.time(),
+                "connection_key": connection_key,
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_connection(self, connection_key: Optional[str]) -> None:
+        with self._lock:
+            conn = connection_key or ""
+            self._schema_versions[conn] = self._schema_versions.get(conn, 0) + 1
+            for key in [
+                k for k, e in self._entries.items() if (e["connection_key"] or "") == conn
+            ]:
+                del self._entries[key]
+
+        self.logger.info("Invalidated generation cache for connection %s", connection_key)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            # Bumping versions also keeps in-flight runs from storing stale answers
+            conns = set(self._schema_versions) | {
+                e["connection_key"] or "" for e in self._entries.values()
+            }
+            for conn in conns:
+                self._schema_versions[conn] = self._schema_versions.get(conn, 0) + 1
+            self._entries.clear()
+
+        self.logger.warning("Invalidated entire generation cache")
+
+    def on_schema_change(self, affected) -> None:
+        # Generated SQL may touch any table of the database, not only the ones named in the DDL
+        self.invalidate_connection(current_session().connection_key)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,412 @@
+import codecs
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+from app.core.logger import create_logger
+
+# Subprocess backend: keep `ollama run` output free of ANSI/spinner noise
+os.environ["OLLAMA_NO_ANSI"] = "1"
+os.environ["TERM"] = "dumb"
+os.environ["NO_COLOR"] = "1"
+os.environ["RICH_NO_COLOR"] = "1"
+os.environ["RICH_PROGRESS_BAR"] = "0"
+os.environ["PYTHONUNBUFFERED"] = "1"
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+
+# "http" (default) or "subprocess"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "http").lower()
+LLM_SUBPROCESS_FALLBACK = os.getenv("LLM_SUBPROCESS_FALLBACK", "1") == "1"
+# Stream completions and stop as soon as one TOOL_CALL/FINAL_SQL block is complete
+LLM_EARLY_STOP = os.getenv("LLM_EARLY_STOP", "1") == "1"
+
+
+class LLMBackendError(RuntimeError):
+    """Raised when a backend fails to produce a completion."""
+
+
+class LLMTimeoutError(LLMBackendError):
+    """Raised when the model does not answer within the configured timeout."""
+
+
+class LLMUnavailableError(LLMBackendError):
+    """Raised when the backend itself cannot be reached (server down, binary missing)."""
+
+
+class LLMResponse:
+    """Completion text plus the timing/token data reported by the backend."""
+
+    def __init__(
+        self,
+        text: str,
+        elapsed_ms: float,
+        backend: str,
+        context: list[int] | None = None,
+        prompt_eval_count: int | None = None,
+        eval_count: int | None = None,
+    ):
+        self.text = text
+        self.elapsed_ms = elapsed_ms
+        self.backend = backend
+        self.context = context
+        self.prompt_eval_count = prompt_eval_count
+        self.eval_count = eval_count
+
+
+class LLMBackend:
+    """Base class for the transports used by LocalLLMConnector."""
+
+    name = "base"
+    supports_chat = False
+
+    def generate(
+        self, model: str, prompt: str, options: dict, timeout: float
+    ) -> LLMResponse:
+        raise NotImplementedError
+
+    def chat(
+        self, model: str, messages: list[dict], options: dict, timeout: float
+    ) -> LLMResponse:
+        # Backends without a native chat endpoint get a flattened transcript
+        prompt = "\n\n".join(
+            f"{m['role'].upper()}:\n{m['content']}" for m in messages
+        )
+        return self.generate(model, prompt, options, timeout)
+
+    def stream_generate(
+        self, model: str, prompt: str, options: dict, timeout: float
+    ) -> Iterator[str]:
+        """
+        Yield completion text incrementally. Closing the generator must cancel
+        the generation; backends without streaming yield the full text once.
+        """
+        yield self.generate(model, prompt, options, timeout).text
+
+    def stream_chat(
+        self, model: str, messages: list[dict], options: dict, timeout: float
+    ) -> Iterator[str]:
+        yield self.chat(model, messages, options, timeout).text
+
+    def close(self) -> None:
+        pass
+
+
+class OllamaHTTPBackend(LLMBackend):
+    """
+    Talks to the Ollama REST API through a pooled keep-alive HTTP session,
+    so consecutive agent steps reuse the same TCP connection and loaded model.
+    """
+
+    name = "http"
+    supports_chat = True
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_HOST,
+        pool_size: int = OLLAMA_POOL_SIZE,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+    ):
+        if "://" not in base_url:
+            base_url = f"http://{base_url}"
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.logger = create_logger()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path: str, payload: dict, timeout: float) -> dict:
+        url = f"{self.base_url}{path}"
+        try:
+            response = self.session.post(url, json=payload, timeout=timeout)
+        except requests.Timeout as e:
+            raise LLMTimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            raise LLMUnavailableError(f"Ollama server unreachable at {url}: {e}") from e
+
+        if response.status_code != 200:
+            raise LLMBackendError(
+                f"Ollama returned HTTP {response.status_code}: {response.text[:500]}"
+            )
+
+        try:
+            return response.json()
+        except ValueError as e:
+            raise LLMBackendError(f"Invalid JSON from Ollama: {e}") from e
+
+    def generate(
+        self, model: str, prompt: str, options: dict, timeout: float
+    ) -> LLMResponse:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": options,
+            "keep_alive": self.keep_alive,
+        }
+
+        start = time.time()
+        data = self._post("/api/generate", payload, timeout)
+        elapsed = (time.time() - start) * 1000
+
+        return LLMResponse(
+            text=data.get("response", "").strip(),
+            elapsed_ms=elapsed,
+            backend=self.name,
+            context=data.get("context"),
+            prompt_eval_count=data.get("prompt_eval_count"),
+            eval_count=data.get("eval_count"),
+        )
+
+    def chat(
+        self, model: str, messages: list[dict], options: dict, timeout: float
+    ) -> LLMResponse:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "options": options,
+            "keep_alive": self.keep_alive,
+        }
+
+        start = time.time()
+        data = self._post("/api/chat", payload, timeout)
+        elapsed = (time.time() - start) * 1000
+
+        message = data.get("message") or {}
+        return LLMResponse(
+            text=(message.get("content") or "").strip(),
+            elapsed_ms=elapsed,
+            backend=self.name,
+            prompt_eval_count=data.get("prompt_eval_count"),
+            eval_count=data.get("eval_count"),
+        )
+
+    def _stream(self, path: str, payload: dict, timeout: float, extract) -> Iterator[str]:
+        url = f"{self.base_url}{path}"
+        try:
+            response = self.session.post(url, json=payload, timeout=timeout, stream=True)
+        except requests.Timeout as e:
+            raise LLMTimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            raise LLMUnavailableError(f"Ollama server unreachable at {url}: {e}") from e
+
+        # Closing the response drops the socket, which makes Ollama abort generation
+        try:
+            if response.status_code != 200:
+                raise LLMBackendError(
+                    f"Ollama returned HTTP {response.status_code}: {response.text[:500]}"
+                )
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    raise LLMBackendError(f"Invalid JSON line from Ollama: {line[:200]!r}") from e
+                if data.get("error"):
+                    raise LLMBackendError(f"Ollama error: {data['error']}")
+
+                piece = extract(data)
+                if piece:
+                    yield piece
+
+                if data.get("done"):
+                    break
+
+        except requests.Timeout as e:
+            raise LLMTimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            # requests reports a read timeout while iterating as a ConnectionError
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise LLMTimeoutError(str(e)) from e
+            raise LLMUnavailableError(f"Ollama stream from {url} interrupted: {e}") from e
+        except requests.exceptions.ChunkedEncodingError as e:
+            raise LLMUnavailableError(f"Ollama stream from {url} interrupted: {e}") from e
+
+        finally:
+            response.close()
+
+    def stream_generate(
+        self, model: str, prompt: str, options: dict, timeout: float
+    ) -> Iterator[str]:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "options": options,
+            "keep_alive": self.keep_alive,
+        }
+        yield from self._stream(
+            "/api/generate", payload, timeout, lambda data: data.get("response")
+        )
+
+    def stream_chat(
+        self, model: str, messages: list[dict], options: dict, timeout: float
+    ) -> Iterator[str]:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "options": options,
+            "keep_alive": self.keep_alive,
+        }
+        yield from self._stream(
+            "/api/chat",
+            payload,
+            timeout,
+            lambda data: (data.get("message") or {}).get("content"),
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class OllamaSubprocessBackend(LLMBackend):
+    """Legacy transport: one `ollama run` process per completion."""
+
+    name = "subprocess"
+
+    def _strip_noise(self, text: str) -> str:
+        remove_list = [
+            "\x1b",
+            "\u001b",
+            "[?25l",
+            "[?25h",
+            "[?2026h",
+            "[?2026l",
+            "[K",
+            "[1G",
+            "⠙",
+            "⠸",
+            "⠼",
+            "⠴",
+            "⠦",
+            "⠧",
+            "⠇",
+            "⠏",
+            "⠋",
+            "⠹",
+        ]
+
+        for p in remove_list:
+            text = text.replace(p, "")
+
+        return text
+
+    def clean_output(self, text: str) -> str:
+        return self._strip_noise(text).strip()
+
+    def _spawn(self, model: str, stderr=subprocess.PIPE) -> subprocess.Popen:
+        try:
+            return subprocess.Popen(
+                ["ollama", "run", model],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+            )
+        except FileNotFoundError as e:
+            raise LLMUnavailableError("ollama binary not found") from e
+
+    def generate(
+        self, model: str, prompt: str, options: dict, timeout: float
+    ) -> LLMResponse:
+        request_payload = {"prompt": prompt, "options": options}
+
+        start = time.time()
+        process = self._spawn(model)
+
+        try:
+            stdout, stderr = process.communicate(
+                json.dumps(request_payload).encode("utf-8"), timeout=timeout
+            )
+        except subprocess.TimeoutExpired as e:
+            process.kill()
+            process.communicate()
+            raise LLMTimeoutError("ollama run timed out") from e
+
+        elapsed = (time.time() - start) * 1000
+
+        clean_stdout = self.clean_output(stdout.decode("utf-8"))
+        clean_stderr = self.clean_output(stderr.decode("utf-8"))
+
+        return LLMResponse(
+            text=(clean_stdout + "\n" + clean_stderr).strip(),
+            elapsed_ms=elapsed,
+            backend=self.name,
+        )
+
+    def stream_generate(
+        self, model: str, prompt: str, options: dict, timeout: float
+    ) -> Iterator[str]:
+        request_payload = {"prompt": prompt, "options": options}
+        # stderr is never read while streaming: a full pipe would block the process
+        process = self._spawn(model, stderr=subprocess.DEVNULL)
+        # Multibyte characters may be split across two reads
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, on_timeout)
+        timer.start()
+
+        try:
+            process.stdin.write(json.dumps(request_payload).encode("utf-8"))
+            process.stdin.close()
+
+            fd = process.stdout.fileno()
+            while True:
+                data = os.read(fd, 4096)
+                piece = self._strip_noise(decoder.decode(data, final=not data))
+                if piece:
+                    yield piece
+                if not data:
+                    break
+
+            if timed_out.is_set():
+                raise LLMTimeoutError("ollama run timed out")
+
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+
+_BACKEND_CLASSES = {
+    OllamaHTTPBackend.name: OllamaHTTPBackend,
+    OllamaSubprocessBackend.name: OllamaSubprocessBackend,
+}
+
+_backends: dict[str, LLMBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    """Return the shared backend instance for `name` (pooled connections live here)."""
+    if name not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown LLM backend: {name}")
+
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend = _BACKEND_CLASSES[name]()
+            _backends[name] = backend
+        return backend
@@ -1,15 +1,21 @@
-import os
-import subprocess
-import json
+import asyncio
 import time
-from app.core.logger import create_logger
+from typing import Callable, Iterator
 
-os.environ["OLLAMA_NO_ANSI"] = "1"
-os.environ["TERM"] = "dumb"
-os.environ["NO_COLOR"] = "1"
-os.environ["RICH_NO_COLOR"] = "1"
-os.environ["RICH_PROGRESS_BAR"] = "0"
-os.environ["PYTHONUNBUFFERED"] = "1"
+from app.core.logger import create_logger
+from app.services.llm_backends import (
+    LLM_BACKEND,
+    LLM_EARLY_STOP,
+    LLM_SUBPROCESS_FALLBACK,
+    LLMBackend,
+    LLMBackendError,
+    LLMResponse,
+    LLMTimeoutError,
+    LLMUnavailableError,
+    OllamaSubprocessBackend,
+    get_backend,
+)
+from app.utils.json_stream_scanner import IncrementalJSONScanner
 
 
 class LocalLLMConnector:
@@ -24,6 +30,9 @@ class LocalLLMConnector:
         max_tokens: int = 2048,
         timeout: int = 60,
         use_gpu: bool = True,
+        backend: LLMBackend | None = None,
+        fallback_to_subprocess: bool = LLM_SUBPROCESS_FALLBACK,
+        early_stop: bool = LLM_EARLY_STOP,
     ):
         self.model_name = model_name
         self.temperature = temperature
@@ -31,35 +40,28 @@ class LocalLLMConnector:
         self.seed = seed
         self.max_tokens = max_tokens
         self.timeout = timeout
+        self.early_stop = early_stop
+
+        # CHANGE: transport is pluggable; HTTP backend is shared and pooled
+        self.backend = backend or get_backend(LLM_BACKEND)
+        self.fallback_backend = (
+            get_backend(OllamaSubprocessBackend.name)
+            if fallback_to_subprocess
+            and self.backend.name != OllamaSubprocessBackend.name
+            else None
+        )
+
+    def _options(self) -> dict:
+        options = {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "num_predict": self.max_tokens,
+        }
+        if self.seed is not None:
+            options["seed"] = self.seed
+        return options
 
-    def clean_output(self, text: str) -> str:
-        remove_list = [
-            "\x1b",
-            "\u001b",
-            "[?25l",
-            "[?25h",
-            "[?2026h",
-            "[?2026l",
-            "[K",
-            "[1G",
-            "⠙",
-            "⠸",
-            "⠼",
-            "⠴",
-            "⠦",
-            "⠧",
-            "⠇",
-            "⠏",
-            "⠋",
-            "⠹",
-        ]
-
-        for p in remove_list:
-            text = text.replace(p, "")
-
-        return text.strip()
-
-    def run_text(
+    def _build_prompt(
         self, user_prompt: str, system_prompt: str = "", context: str = ""
     ) -> str:
         final_prompt = ""
@@ -71,46 +73,174 @@ class LocalLLMConnector:
             final_prompt += context.strip() + "\n\n"
 
         final_prompt += user_prompt
+        return final_prompt
 
-        # CHANGE: Fixed Ollama call (now uses stdin JSON instead of unsupported flags)
-        cmd = ["ollama", "run", self.model_name]
+    def generate(
+        self, user_prompt: str, system_prompt: str = "", context: str = ""
+    ) -> LLMResponse:
+        """Run a completion and return the full backend response. Raises LLMBackendError."""
+        prompt = self._build_prompt(user_prompt, system_prompt, context)
+        options = self._options()
 
-        request_payload = {
-            "prompt": final_prompt,
-            "options": {
-                "temperature": self.temperature,
-                "top_p": self.top_p,
-                "num_predict": self.max_tokens,
-            },
-        }
+        try:
+            response = self.backend.generate(
+                self.model_name, prompt, options, self.timeout
+            )
+        except LLMUnavailableError as e:
+            if not self.fallback_backend:
+                raise
+            self.logger.warning(
+                "LLM backend '%s' unavailable (%s), falling back to '%s'",
+                self.backend.name,
+                e,
+                self.fallback_backend.name,
+            )
+            response = self.fallback_backend.generate(
+                self.model_name, prompt, options, self.timeout
+            )
 
-        if self.seed is not None:
-            request_payload["options"]["seed"] = self.seed
+        self.logger.info(
+            "LLM execution time: %.2f ms (backend=%s)",
+            response.elapsed_ms,
+            response.backend,
+        )
+        return response
 
-        try:
-            start = time.time()
+    def chat(self, messages: list[dict]) -> LLMResponse:
+        """Run a chat completion over role/content messages. Raises LLMBackendError."""
+        options = self._options()
 
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+        try:
+            response = self.backend.chat(
+                self.model_name, messages, options, self.timeout
             )
+        except LLMUnavailableError as e:
+            if not self.fallback_backend:
+                raise
+            self.logger.warning(
+                "LLM backend '%s' unavailable (%s), falling back to '%s'",
+                self.backend.name,
+                e,
+                self.fallback_backend.name,
+            )
+            response = self.fallback_backend.chat(
+                self.model_name, messages, options, self.timeout
+            )
+
+        self.logger.info(
+            "LLM chat execution time: %.2f ms (backend=%s)",
+            response.elapsed_ms,
+            response.backend,
+        )
+        return response
+
+    def _drain_until_block(
+        self, stream: Iterator[str], scanner: IncrementalJSONScanner, start: float
+    ) -> bool:
+        """Consume a token stream; return True if it was cut after a complete block."""
+        try:
+            for chunk in stream:
+                if scanner.feed(chunk):
+                    return True
+                if time.time() - start > self.timeout:
+                    raise LLMTimeoutError("LLM stream exceeded timeout")
+            return False
+        finally:
+            # Closing the generator cancels the generation on the backend side
+            stream.close()
+
+    def _stream_until_block(
+        self, open_stream: Callable[[LLMBackend], Iterator[str]]
+    ) -> LLMResponse:
+        start = time.time()
+        backend = self.backend
+        scanner = IncrementalJSONScanner()
 
-            stdout, stderr = process.communicate(
-                json.dumps(request_payload).encode("utf-8"), timeout=self.timeout
+        try:
+            stopped = self._drain_until_block(open_stream(backend), scanner, start)
+        except LLMUnavailableError as e:
+            if not self.fallback_backend:
+                raise
+            self.logger.warning(
+                "LLM backend '%s' unavailable (%s), falling back to '%s'",
+                self.backend.name,
+                e,
+                self.fallback_backend.name,
+            )
+            backend = self.fallback_backend
+            scanner = IncrementalJSONScanner()
+            stopped = self._drain_until_block(open_stream(backend), scanner, start)
+
+        elapsed = (time.time() - start) * 1000
+        self.logger.info(
+            "LLM execution time: %.2f ms (backend=%s, streamed, early_stop=%s, chars=%d)",
+            elapsed,
+            backend.name,
+            stopped,
+            len(scanner.buffer),
+        )
+        return LLMResponse(
+            text=scanner.buffer.strip(), elapsed_ms=elapsed, backend=backend.name
+        )
+
+    def generate_until_block(
+        self, user_prompt: str, system_prompt: str = "", context: str = ""
+    ) -> LLMResponse:
+        """
+        Stream a completion and cancel it as soon as one complete TOOL_CALL /
+        FINAL_SQL JSON block has been received. Raises LLMBackendError.
+        """
+        prompt = self._build_prompt(user_prompt, system_prompt, context)
+        options = self._options()
+        return self._stream_until_block(
+            lambda backend: backend.stream_generate(
+                self.model_name, prompt, options, self.timeout
             )
+        )
+
+    def chat_until_block(self, messages: list[dict]) -> LLMResponse:
+        """Chat variant of generate_until_block. Raises LLMBackendError."""
+        options = self._options()
+        return self._stream_until_block(
+            lambda backend: backend.stream_chat(
+                self.model_name, messages, options, self.timeout
+            )
+        )
 
-            elapsed = (time.time() - start) * 1000
-            self.logger.info("LLM execution time: %.2f ms", elapsed)
+    def run_text(
+        self, user_prompt: str, system_prompt: str = "", context: str = ""
+    ) -> str:
+        try:
+            if self.early_stop:
+                return self.generate_until_block(user_prompt, system_prompt, context).text
+            return self.generate(user_prompt, system_prompt, context).text
 
-            clean_stdout = self.clean_output(stdout.decode("utf-8"))
-            clean_stderr = self.clean_output(stderr.decode("utf-8"))
+        except LLMTimeoutError:
+            return "ERROR: TIMEOUT"
 
-            return (clean_stdout + "\n" + clean_stderr).strip()
+        except LLMBackendError as e:
+            return f"ERROR: {str(e)}"
 
-        except subprocess.TimeoutExpired:
+        except Exception as e:
+            return f"ERROR: {str(e)}"
+
+    def run_chat(self, messages: list[dict]) -> str:
+        try:
+            if self.early_stop:
+                return self.chat_until_block(messages).text
+            return self.chat(messages).text
+
+        except LLMTimeoutError:
             return "ERROR: TIMEOUT"
 
         except Exception as e:
             return f"ERROR: {str(e)}"
+
+    async def arun_chat(self, messages: list[dict]) -> str:
+        return await asyncio.to_thread(self.run_chat, messages)
+
+    async def arun_text(
+        self, user_prompt: str, system_prompt: str = "", context: str = ""
+    ) -> str:
+        """Async wrapper around run_text; the blocking HTTP call runs in a worker thread."""
+        return await asyncio.to_thread(self.run_text, user_prompt, system_prompt, context)
@@ -1,103 +1,367 @@
+import json
+import os
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from app.core.logger import create_logger
 
+# Caps on the number of cached tables and their estimated serialized size
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "20000"))
+METADATA_CACHE_MAX_BYTES = int(os.getenv("METADATA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def _estimate_size(metadata: Dict[str, Any]) -> int:
+    return len(json.dumps(metadata, separators=(",", ":"), default=str))
+
 
 class MetadataCache:
-    def __init__(self, ttl_seconds: Optional[int] = None):
-        self.cache: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    """
+    Thread-safe LRU cache of per-table metadata, bounded by entry count and
+    estimated size, with optional TTL. Keeps hit/miss/eviction counters and
+    the time spent loading metadata into it.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[int] = None,
+        max_entries: int = METADATA_CACHE_MAX_ENTRIES,
+        max_bytes: int = METADATA_CACHE_MAX_BYTES,
+    ):
         self.ttl = ttl_seconds
-        self.timestamps: Dict[str, float] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # (schema, table) -> {"metadata", "stored_at", "size"}, oldest use first
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        # schema -> {"tables": {table: entry}, "bytes"}, so status and schema
+        # operations do not scan every cached table
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        # True while the entries hold the whole catalog (set by a full load,
+        # cleared by anything that drops an entry), see snapshot()
+        self.complete = False
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.load_time_ms = 0.0
+
         # CHANGE: logger for cache events
         self.logger = create_logger()
 
-    def _make_key(self, schema: str, table: str) -> str:
-        return f"{schema}.{table}"
+    def _make_key(self, schema: str, table: str) -> Tuple[str, str]:
+        return (schema, table)
 
-    def _is_expired(self, key: str) -> bool:
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
         if self.ttl is None:
             return False
-        ts = self.timestamps.get(key)
-        if ts is None:
-            return False
-        expired = (time.time() - ts) > self.ttl
-        if expired:
-            self.logger.info("Cache expired for key=%s", key)
-        return expired
+        return (time.time() - entry["stored_at"]) > self.ttl
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+            schema = self._schemas[key[0]]
+            del schema["tables"][key[1]]
+            schema["bytes"] -= entry["size"]
+            if not schema["tables"]:
+                del self._schemas[key[0]]
+
+    def _put(self, key: Tuple[str, str], metadata: Dict[str, Any], now: float) -> None:
+        self._remove(key)
+        size = _estimate_size(metadata)
+        entry = {"metadata": metadata, "stored_at": now, "size": size}
+        self._entries[key] = entry
+        self._bytes += size
+        schema = self._schemas.setdefault(key[0], {"tables": {}, "bytes": 0})
+        schema["tables"][key[1]] = entry
+        schema["bytes"] += size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key, _ = next(iter(self._entries.items()))
+            self._remove(key)
+            self.complete = False
+            self.evictions += 1
+            self.logger.debug("Evicted least recently used metadata for %s.%s", *key)
+
+    def _record_load(self, load_ms: Optional[float]) -> None:
+        if load_ms is not None:
+            self.loads += 1
+            self.load_time_ms += load_ms
 
     def get_table(self, schema: str, table: str) -> Optional[Dict[str, Any]]:
         key = self._make_key(schema, table)
 
-        if self._is_expired(key):
-            self.logger.info("Evicting expired cache entry for %s.%s", schema, table)
-            self.invalidate_table(schema, table)
-            return None
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self._is_expired(entry):
+                self._remove(key)
+                self.complete = False
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                self.logger.debug("Cache miss for %s.%s", schema, table)
+                return None
 
-        entry = self.cache.get(schema, {}).get(table)
+            self._entries.move_to_end(key)
+            self.hits += 1
 
-        if entry:
-            self.logger.info("Cache hit for %s.%s", schema, table)
-        else:
-            self.logger.info("Cache miss for %s.%s", schema, table)
+        self.logger.debug("Cache hit for %s.%s", schema, table)
+        return entry["metadata"]
 
-        return entry
+    def store_table(
+        self,
+        schema: str,
+        table: str,
+        metadata: Dict[str, Any],
+        load_ms: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            self._put(self._make_key(schema, table), metadata, time.time())
+            self._record_load(load_ms)
+            self._evict()
 
-    def store_table(self, schema: str, table: str, metadata: Dict[str, Any]) -> None:
-        if schema not in self.cache:
-            self.cache[schema] = {}
+        self.logger.debug("Stored metadata in cache for %s.%s", schema, table)
 
-        self.cache[schema][table] = metadata
-        self.timestamps[self._make_key(schema, table)] = time.time()
+    def store_many(
+        self,
+        entries: Dict[tuple, Dict[str, Any]],
+        load_ms: Optional[float] = None,
+        complete: bool = False,
+    ) -> None:
+        """
+        Bulk store of {(schema, table): metadata}, logged once. `complete`
+        marks the entries as the whole catalog (after invalidate_all).
+        """
+        now = time.time()
+        with self._lock:
+            for (schema, table), metadata in entries.items():
+                self._put(self._make_key(schema, table), metadata, now)
+            self._record_load(load_ms)
+            if complete:
+                self.complete = True
+            self._evict()
 
-        # CHANGE: log storing event
-        self.logger.info("Stored metadata in cache for %s.%s", schema, table)
+        self.logger.info("Stored metadata in cache for %d tables", len(entries))
+
+    def snapshot(self) -> Optional[Dict[Tuple[str, str], Dict[str, Any]]]:
+        """Every cached table while the cache holds the whole, unexpired catalog, else None."""
+        with self._lock:
+            if not self.complete or any(self._is_expired(e) for e in self._entries.values()):
+                return None
+            return {key: entry["metadata"] for key, entry in self._entries.items()}
+
+    def due_for_refresh(self, ahead_seconds: float) -> List[Tuple[str, str]]:
+        """(schema, table) entries that expire within `ahead_seconds`."""
+        if self.ttl is None:
+            return []
+
+        deadline = time.time() + ahead_seconds - self.ttl
+        with self._lock:
+            return [key for key, entry in self._entries.items() if entry["stored_at"] <= deadline]
+
+    def schemas_with_table(self, table: str) -> List[str]:
+        with self._lock:
+            return [schema for schema, info in self._schemas.items() if table in info["tables"]]
 
     def invalidate_table(self, schema: str, table: str) -> None:
-        if schema in self.cache and table in self.cache[schema]:
-            del self.cache[schema][table]
-        self.timestamps.pop(self._make_key(schema, table), None)
+        with self._lock:
+            self._remove(self._make_key(schema, table))
+            self.complete = False
 
         self.logger.warning("Invalidated cache entry for %s.%s", schema, table)
 
     def invalidate_schema(self, schema: str) -> None:
-        if schema in self.cache:
-            for table in list(self.cache[schema].keys()):
-                self.timestamps.pop(self._make_key(schema, table), None)
-            del self.cache[schema]
+        with self._lock:
+            for table in list(self._schemas.get(schema, {}).get("tables", ())):
+                self._remove((schema, table))
+            self.complete = False
 
         self.logger.warning("Invalidated entire schema from cache: %s", schema)
 
     def invalidate_all(self) -> None:
-        self.cache.clear()
-        self.timestamps.clear()
+        with self._lock:
+            self._entries.clear()
+            self._schemas.clear()
+            self._bytes = 0
+            self.complete = False
 
         self.logger.warning("Invalidated entire metadata cache")
 
-    def get_status(self) -> Dict[str, Any]:
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "loads": self.loads,
+                "load_time_ms": round(self.load_time_ms, 2),
+                "avg_load_ms": round(self.load_time_ms / self.loads, 2) if self.loads else None,
+            }
+
+    def get_status(
+        self, schema: Optional[str] = None, page: int = 1, limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Table count and size per schema plus cache statistics; with `schema`,
+        one page of that schema's tables (no metadata dump) instead.
+        """
+        now = time.time()
         status = {
             "ttl_seconds": self.ttl,
-            "schemas": {},
             "total_entries": 0,
+            "stats": self.get_stats(),
         }
 
-        for schema, tables in self.cache.items():
-            status["schemas"][schema] = {}
+        with self._lock:
+            status["total_entries"] = len(self._entries)
 
-            for table, metadata in tables.items():
-                key = self._make_key(schema, table)
-                ts = self.timestamps.get(key, 0)
+            if schema is None:
+                status["schemas"] = {
+                    name: {"tables": len(info["tables"]), "size_bytes": info["bytes"]}
+                    for name, info in self._schemas.items()
+                }
+                return status
 
+            tables = self._schemas.get(schema, {}).get("tables", {})
+            offset = (page - 1) * limit
+            status.update(schema=schema, page=page, limit=limit, total_tables=len(tables))
+            status["tables"] = {}
+
+            for table in sorted(tables)[offset : offset + limit]:
+                entry = tables[table]
                 remaining = None
                 if self.ttl is not None:
-                    remaining = max(self.ttl - (time.time() - ts), 0)
+                    remaining = max(self.ttl - (now - entry["stored_at"]), 0)
 
-                status["schemas"][schema][table] = {
-                    "cached_at": ts,
+                status["tables"][table] = {
+                    "cached_at": entry["stored_at"],
                     "expires_in": remaining,
-                    "metadata": metadata, 
+                    "columns": len(entry["metadata"].get("columns", [])),
+                    "size_bytes": entry["size"],
                 }
 
-                status["total_entries"] += 1
-
         return status
 
+
+METADATA_CACHE_MAX_CONNECTIONS = int(os.getenv("METADATA_CACHE_MAX_CONNECTIONS", "8"))
+
+
+class NamespacedMetadataCache:
+    """
+    One MetadataCache per connection identity, each with its own TTL and
+    budget, so switching databases neither serves another database's
+    metadata nor throws away warm caches. Calls without an explicit
+    namespace go to the active connection returned by `current_key`.
+    """
+
+    def __init__(
+        self,
+        current_key: Callable[[], Optional[str]],
+        ttl_seconds: Optional[int] = None,
+        max_entries: int = METADATA_CACHE_MAX_ENTRIES,
+        max_bytes: int = METADATA_CACHE_MAX_BYTES,
+        max_connections: int = METADATA_CACHE_MAX_CONNECTIONS,
+    ):
+        self.current_key = current_key
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_connections = max_connections
+
+        self._namespaces: "OrderedDict[str, MetadataCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = create_logger()
+
+    def namespace(self, connection_key: Optional[str] = None) -> MetadataCache:
+        key = connection_key if connection_key is not None else self.current_key()
+        key = key or ""
+
+        with self._lock:
+            cache = self._namespaces.get(key)
+            if cache is None:
+                cache = MetadataCache(self.ttl, self.max_entries, self.max_bytes)
+                self._namespaces[key] = cache
+
+                while len(self._namespaces) > self.max_connections:
+                    dropped, _ = self._namespaces.popitem(last=False)
+                    self.logger.info("Dropped metadata cache of connection %s", dropped)
+
+            self._namespaces.move_to_end(key)
+            return cache
+
+    def get_table(self, schema: str, table: str) -> Optional[Dict[str, Any]]:
+        return self.namespace().get_table(schema, table)
+
+    def store_table(
+        self,
+        schema: str,
+        table: str,
+        metadata: Dict[str, Any],
+        load_ms: Optional[float] = None,
+    ) -> None:
+        self.namespace().store_table(schema, table, metadata, load_ms)
+
+    def store_many(
+        self,
+        entries: Dict[tuple, Dict[str, Any]],
+        load_ms: Optional[float] = None,
+        complete: bool = False,
+    ) -> None:
+        self.namespace().store_many(entries, load_ms, complete)
+
+    def snapshot(self) -> Optional[Dict[Tuple[str, str], Dict[str, Any]]]:
+        return self.namespace().snapshot()
+
+    def due_for_refresh(self, ahead_seconds: float) -> List[Tuple[str, str]]:
+        return self.namespace().due_for_refresh(ahead_seconds)
+
+    def schemas_with_table(self, table: str) -> List[str]:
+        return self.namespace().schemas_with_table(table)
+
+    def invalidate_table(self, schema: str, table: str) -> None:
+        self.namespace().invalidate_table(schema, table)
+
+    def invalidate_schema(self, schema: str) -> None:
+        self.namespace().invalidate_schema(schema)
+
+    def invalidate_all(self) -> None:
+        """Clears the active connection only; see invalidate_everything."""
+        self.namespace().invalidate_all()
+
+    def invalidate_everything(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+
+        self.logger.warning("Invalidated metadata cache of every connection")
+
+    def get_status(
+        self, schema: Optional[str] = None, page: int = 1, limit: int = 100
+    ) -> Dict[str, Any]:
+        """Status of the active connection plus stats of every namespace."""
+        current = self.current_key() or ""
+        status = self.namespace(current).get_status(schema, page, limit)
+
+        with self._lock:
+            namespaces = list(self._namespaces.items())
+
+        status["connection_key"] = current
+        status["connections"] = {key: cache.get_stats() for key, cache in namespaces}
+        return status
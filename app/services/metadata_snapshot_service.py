@@ -0,0 +1,117 @@
+import json
+import os
+import zlib
+from typing import Dict, Optional, Tuple
+
+from app.core.logger import create_logger
+from app.models.schemas.metadata_snapshot_schema import MetadataSnapshot
+from app.repository.metadata_snapshot_repository import MetadataSnapshotRepository
+from app.services.catalog_change_detector import catalog_fingerprint
+
+METADATA_SNAPSHOT_ENABLED = os.getenv("METADATA_SNAPSHOT_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Bump when the stored metadata shape changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+
+class MetadataSnapshotService:
+    """
+    Persists the bulk-loaded catalog metadata of each connection in the
+    internal SQLite database, so a restarted process restores it instead of
+    re-introspecting the catalog. Every table is stored with its catalog
+    signature and only restored while that signature still matches.
+    """
+
+    def __init__(self):
+        self.logger = create_logger()
+        self.repo = MetadataSnapshotRepository()
+
+    def save(
+        self,
+        connection_key: str,
+        tables: Dict[Tuple[str, str], dict],
+        signatures: Dict[Tuple[str, str], str],
+    ) -> MetadataSnapshot:
+        """Store tables with the signatures read *before* they were loaded."""
+        rows = [
+            [schema, table, signatures[(schema, table)], metadata]
+            for (schema, table), metadata in tables.items()
+            if (schema, table) in signatures
+        ]
+        raw = json.dumps(
+            {"version": SNAPSHOT_VERSION, "tables": rows},
+            separators=(",", ":"),
+            default=str,
+        ).encode("utf-8")
+        payload = zlib.compress(raw)
+
+        snapshot = self.repo.upsert(
+            connection_key,
+            catalog_fingerprint=catalog_fingerprint(signatures),
+            table_count=len(rows),
+            size_bytes=len(payload),
+            payload=payload,
+        )
+
+        self.logger.info(
+            "Saved metadata snapshot for %s: %d tables, %d bytes",
+            connection_key,
+            len(rows),
+            len(payload),
+        )
+        return snapshot
+
+    def restore(
+        self, connection_key: str, signatures: Dict[Tuple[str, str], str]
+    ) -> Tuple[Dict[Tuple[str, str], dict], bool]:
+        """
+        Tables of the stored snapshot whose signature matches the live catalog,
+        and whether the snapshot covers the whole catalog unchanged.
+        """
+        snapshot = self.repo.get_by_connection_key(connection_key)
+        if snapshot is None:
+            return {}, False
+
+        try:
+            data = json.loads(zlib.decompress(snapshot.payload))
+        except (zlib.error, ValueError) as e:
+            self.logger.warning("Unreadable metadata snapshot for %s: %s", connection_key, e)
+            return {}, False
+
+        if data.get("version") != SNAPSHOT_VERSION:
+            return {}, False
+
+        tables = {
+            (schema, table): metadata
+            for schema, table, signature, metadata in data["tables"]
+            if signatures.get((schema, table)) == signature
+        }
+        complete = snapshot.catalog_fingerprint == catalog_fingerprint(signatures)
+
+        self.logger.info(
+            "Metadata snapshot for %s: %d/%d tables still valid%s",
+            connection_key,
+            len(tables),
+            snapshot.table_count,
+            "" if complete else " (catalog changed)",
+        )
+        return tables, complete
+
+    def get_info(self, connection_key: str) -> Optional[dict]:
+        snapshot = self.repo.get_by_connection_key(connection_key)
+        if snapshot is None:
+            return None
+        return {
+            "connection_key": snapshot.connection_key,
+            "catalog_fingerprint": snapshot.catalog_fingerprint,
+            "table_count": snapshot.table_count,
+            "size_bytes": snapshot.size_bytes,
+            "created_at": snapshot.created_at.isoformat(),
+        }
+
+    def delete(self, connection_key: str) -> bool:
+        return self.repo.delete_by_connection_key(connection_key)
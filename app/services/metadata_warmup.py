@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.logger import create_logger
+from app.services.database_service import DatabaseService, current_session, use_session
+from app.services.metadata_cache import NamespacedMetadataCache
+from app.services.metadata_snapshot_service import MetadataSnapshotService
+from app.services.schema_service import SchemaService
+
+METADATA_WARMUP_ON_CONNECT = os.getenv("METADATA_WARMUP_ON_CONNECT", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# How often the refresher wakes up, and how long before expiry it reloads entries
+METADATA_REFRESH_INTERVAL = int(os.getenv("METADATA_REFRESH_INTERVAL", "30"))
+METADATA_REFRESH_AHEAD = int(os.getenv("METADATA_REFRESH_AHEAD", "90"))
+
+
+def _table_metadata(desc: dict) -> dict:
+    # Same shape ToolExecutor stores for describe_table
+    return {
+        "columns": desc["columns"],
+        "primary_keys": desc["primary_keys"],
+        "foreign_keys": desc["foreign_keys"],
+    }
+
+
+class MetadataWarmupService:
+    """
+    Bulk-loads the whole catalog into the connection's MetadataCache
+    namespace in a background thread after every connect, restoring the
+    on-disk snapshot first when it still matches the catalog. A refresher
+    thread then reloads entries shortly before their TTL runs out, so agent
+    requests read from the cache instead of waiting on catalog queries.
+    Runs for every connected session, db_session and the registry's alike.
+    """
+
+    def __init__(
+        self,
+        cache: NamespacedMetadataCache,
+        snapshots: Optional[MetadataSnapshotService] = None,
+        enabled: bool = METADATA_WARMUP_ON_CONNECT,
+        refresh_interval: int = METADATA_REFRESH_INTERVAL,
+        refresh_ahead: int = METADATA_REFRESH_AHEAD,
+    ):
+        self.logger = create_logger()
+        self.cache = cache
+        self.snapshots = snapshots
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.refresh_ahead = refresh_ahead
+
+        self._lock = threading.Lock()
+        # Per connection_key: the session to load from, a generation bumped on
+        # every warm-up so a load for a previous connection is discarded, and status
+        self._sessions: Dict[str, DatabaseService] = {}
+        self._generations: Dict[str, int] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _new_status(self, connection_key: Optional[str]) -> Dict[str, Any]:
+        return {
+            "state": "idle",
+            "source": None,
+            "connection_key": connection_key,
+            "tables": 0,
+            "duration_ms": None,
+            "error": None,
+            "last_refresh_at": None,
+            "refreshed_tables": 0,
+        }
+
+    def on_connect(self, session: DatabaseService) -> None:
+        if not self.enabled:
+            return
+        self.start_warmup(session)
+        self.start_refresher()
+
+    def start_warmup(self, session: DatabaseService) -> None:
+        connection_key = session.connection_key
+        with self._lock:
+            generation = self._generations.get(connection_key, 0) + 1
+            self._generations[connection_key] = generation
+            self._sessions[connection_key] = session
+            status = self._status.setdefault(connection_key, self._new_status(connection_key))
+            status.update(state="running", source=None, tables=0, error=None)
+
+        threading.Thread(
+            target=self._warmup,
+            args=(generation, session, connection_key),
+            name="metadata-warmup",
+            daemon=True,
+        ).start()
+
+    def _is_current(self, generation: int, session: DatabaseService, connection_key: str) -> bool:
+        return (
+            generation == self._generations.get(connection_key)
+            and session.connection_key == connection_key
+        )
+
+    def _warmup(self, generation: int, session: DatabaseService, connection_key: str) -> None:
+        started = time.time()
+        schema_service = SchemaService()
+        try:
+            with use_session(session):
+                signatures = None
+                if self.snapshots is not None:
+                    # Read before loading: a concurrent DDL then only makes the snapshot stale
+                    signatures = schema_service.get_catalog_signatures()
+                    if self._restore_snapshot(
+                        generation, session, connection_key, signatures, started
+                    ):
+                        return
+
+                tables = schema_service.describe_all()
+        except Exception as e:
+            self.logger.error("Metadata warm-up failed for %s: %s", connection_key, e)
+            with self._lock:
+                if generation == self._generations.get(connection_key):
+                    self._status[connection_key].update(state="failed", error=str(e))
+            return
+
+        metadata = {key: _table_metadata(desc) for key, desc in tables.items()}
+
+        with self._lock:
+            if not self._is_current(generation, session, connection_key):
+                self.logger.info("Discarding metadata warm-up for %s", connection_key)
+                return
+
+            duration_ms = round((time.time() - started) * 1000, 2)
+            namespace = self.cache.namespace(connection_key)
+            # Replace, not merge: drops tables removed while disconnected
+            namespace.invalidate_all()
+            namespace.store_many(metadata, load_ms=duration_ms, complete=True)
+            self._status[connection_key].update(
+                state="done",
+                source="catalog",
+                tables=len(tables),
+                duration_ms=duration_ms,
+            )
+
+        self.logger.info(
+            "Metadata warm-up for %s: %d tables in %.2f ms",
+            connection_key,
+            len(tables),
+            duration_ms,
+        )
+
+        if self.snapshots is not None:
+            try:
+                self.snapshots.save(connection_key, metadata, signatures)
+            except Exception as e:
+                self.logger.warning("Could not save metadata snapshot: %s", e)
+
+    def _restore_snapshot(
+        self,
+        generation: int,
+        session: DatabaseService,
+        connection_key: str,
+        signatures: dict,
+        started: float,
+    ) -> bool:
+        """Load still-valid snapshot tables; True when no catalog load is needed."""
+        tables, complete = self.snapshots.restore(connection_key, signatures)
+        if not tables:
+            return False
+
+        with self._lock:
+            if not self._is_current(generation, session, connection_key):
+                return True
+
+            duration_ms = round((time.time() - started) * 1000, 2)
+            namespace = self.cache.namespace(connection_key)
+            namespace.invalidate_all()
+            namespace.store_many(tables, load_ms=duration_ms, complete=complete)
+
+            if complete:
+                self._status[connection_key].update(
+                    state="done",
+                    source="snapshot",
+                    tables=len(tables),
+                    duration_ms=duration_ms,
+                )
+
+        return complete
+
+    def start_refresher(self) -> None:
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            if self.cache.ttl is None:
+                return
+
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="metadata-refresher", daemon=True
+            )
+            self._refresher.start()
+
+    def stop_refresher(self) -> None:
+        self._stop.set()
+
+    def _live_sessions(self) -> List[DatabaseService]:
+        """Warmed sessions still connected to their database; forgets the others."""
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if not session.is_connected() or session.connection_key != key:
+                    del self._sessions[key]
+            return list(self._sessions.values())
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            for session in self._live_sessions():
+                try:
+                    self.refresh_due(session)
+                except Exception as e:
+                    self.logger.warning(
+                        "Metadata refresh failed for %s: %s", session.connection_key, e
+                    )
+
+    def refresh_due(self, session: Optional[DatabaseService] = None) -> int:
+        """Reload every schema holding entries that expire within refresh_ahead."""
+        session = session or current_session()
+        if not session.is_connected():
+            return 0
+
+        connection_key = session.connection_key
+        namespace = self.cache.namespace(connection_key)
+
+        due = namespace.due_for_refresh(self.refresh_ahead)
+        if not due:
+            return 0
+
+        refreshed = 0
+
+        # One catalog query per schema; dropped tables are left to expire
+        for schema in sorted({schema for schema, _ in due}):
+            started = time.time()
+            with use_session(session):
+                tables = SchemaService().describe_all(schema)
+
+            with self._lock:
+                if session.connection_key != connection_key:
+                    return refreshed
+                namespace.store_many(
+                    {key: _table_metadata(desc) for key, desc in tables.items()},
+                    load_ms=(time.time() - started) * 1000,
+                )
+
+            refreshed += len(tables)
+
+        with self._lock:
+            status = self._status.setdefault(connection_key, self._new_status(connection_key))
+            status.update(last_refresh_at=time.time(), refreshed_tables=refreshed)
+
+        self.logger.info(
+            "Refreshed metadata of %s ahead of expiry: %d tables", connection_key, refreshed
+        )
+        return refreshed
+
+    def get_status(self, connection_key: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            status = self._status.get(connection_key) or self._new_status(connection_key)
+            return {
+                **status,
+                "enabled": self.enabled,
+                "refresher_running": self._refresher is not None
+                and self._refresher.is_alive(),
+                "refresh_interval": self.refresh_interval,
+                "refresh_ahead": self.refresh_ahead,
+            }
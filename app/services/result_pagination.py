@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.utils.sql_lexer import has_multiple_statements
+
+EXECUTE_PAGE_SIZE = int(os.getenv("EXECUTE_PAGE_SIZE", "500"))
+EXECUTE_PAGE_MAX_SIZE = int(os.getenv("EXECUTE_PAGE_MAX_SIZE", "5000"))
+EXECUTE_PAGE_MAX_BYTES = int(os.getenv("EXECUTE_PAGE_MAX_BYTES", str(8 * 1024 * 1024)))
+# statement_timeout of the transaction that reads a page
+EXECUTE_PAGE_TIMEOUT_MS = int(os.getenv("EXECUTE_PAGE_TIMEOUT_MS", "15000"))
+
+
+def _query_fingerprint(sql: str, order_by: Optional[List[str]]) -> str:
+    raw = json.dumps([sql, order_by or []])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def fetch_page(
+    session,
+    sql: str,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: Optional[List[str]] = None,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    One page of a read-only query. With `order_by` (columns of the result
+    that identify a row, ascending) pages are read by keyset, so each page
+    costs the same however deep it is; without it the cursor holds an offset.
+    A page ends early when its rows exceed `max_bytes` as JSON.
+    """
+    sql = sql.strip().rstrip(";").strip()
+    if not session.is_connected():
+        raise ValueError("No active database connection. Call /connect_db first.")
+    # The query is wrapped in a subquery, where a second statement would escape it
+    if has_multiple_statements(sql):
+        raise ValueError("Pagination accepts a single statement.")
+
+    page_size = min(page_size or EXECUTE_PAGE_SIZE, EXECUTE_PAGE_MAX_SIZE)
+    max_bytes = min(max_bytes or EXECUTE_PAGE_MAX_BYTES, EXECUTE_PAGE_MAX_BYTES)
+    fingerprint = _query_fingerprint(sql, order_by)
+
+    state = decode_cursor(cursor) if cursor else {}
+    if state and state.get("q") != fingerprint:
+        raise ValueError("Cursor does not belong to this query.")
+
+    quote = session.engine.dialect.identifier_preparer.quote
+    params: Dict[str, Any] = {"_page_limit": page_size + 1}
+
+    if order_by:
+        keys = ", ".join(quote(column) for column in order_by)
+        where = ""
+        if state:
+            values = state.get("k") or []
+            if len(values) != len(order_by):
+                raise ValueError("Invalid cursor.")
+            params.update({f"_page_k{i}": value for i, value in enumerate(values)})
+            placeholders = ", ".join(f":_page_k{i}" for i in range(len(values)))
+            where = f"WHERE ({keys}) > ({placeholders}) "
+        query = (
+            f"SELECT * FROM ({sql}) AS _page {where}"
+            f"ORDER BY {keys} LIMIT :_page_limit"
+        )
+    else:
+        params["_page_offset"] = int(state.get("o", 0))
+        query = f"SELECT * FROM ({sql}) AS _page LIMIT :_page_limit OFFSET :_page_offset"
+
+    with session.connection() as conn:
+        conn.execute(text("SET TRANSACTION READ ONLY"))
+        conn.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": str(EXECUTE_PAGE_TIMEOUT_MS)},
+        )
+        if order_by:
+            # Checked before the keyset query, where an unknown column is a SQL error
+            probe = conn.execute(text(f"SELECT * FROM ({sql}) AS _page LIMIT 0"))
+            missing = [column for column in order_by if column not in probe.keys()]
+            if missing:
+                conn.rollback()
+                raise ValueError(
+                    f"order_by columns not in the result: {', '.join(missing)}"
+                )
+        result = conn.execute(text(query), params)
+        columns = list(result.keys())
+        fetched = [dict(row) for row in result.mappings().all()]
+        conn.rollback()
+
+    rows = []
+    size = 0
+    truncated = None
+    for row in fetched[:page_size]:
+        size += len(json.dumps(row, default=str))
+        # Always return at least one row so the cursor moves forward
+        if rows and size > max_bytes:
+            truncated = "max_bytes"
+            break
+        rows.append(row)
+
+    has_more = len(fetched) > len(rows)
+    next_cursor = None
+    if has_more:
+        if order_by:
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                {"q": fingerprint, "k": [last[column] for column in order_by]}
+            )
+        else:
+            next_cursor = encode_cursor(
+                {"q": fingerprint, "o": params["_page_offset"] + len(rows)}
+            )
+
+    return {
+        "columns": columns,
+        "rows": rows,
+        "row_count": len(rows),
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "truncated": truncated,
+    }
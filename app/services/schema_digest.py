@@ -0,0 +1,140 @@
+import os
+import threading
+from collections import defaultdict
+
+from app.core.logger import create_logger
+from app.services.database_service import current_session
+
+SCHEMA_DIGEST_MAX_CHARS = int(os.getenv("SCHEMA_DIGEST_MAX_CHARS", "6000"))
+
+# Columns kept per table (besides keys) when the full digest is over budget
+COMPACT_EXTRA_COLUMNS = 3
+
+_TYPE_ALIASES = {
+    "character varying": "varchar",
+    "character": "char",
+    "integer": "int",
+    "boolean": "bool",
+    "double precision": "float8",
+    "real": "float4",
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+    "time without time zone": "time",
+    "time with time zone": "timetz",
+}
+
+
+class SchemaDigestService:
+    """
+    Builds a compact, size-budgeted text summary of the connected database
+    (schemas, tables, columns, PKs, FKs) so the agent can skip the
+    list_schemas/list_tables discovery round-trips. Digests are cached per
+    connection and dropped on schema changes.
+    """
+
+    def __init__(self, max_chars: int = SCHEMA_DIGEST_MAX_CHARS):
+        self.logger = create_logger()
+        self.max_chars = max_chars
+        self._digests: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get_digest(self, schema_service, connection_key: str) -> str:
+        with self._lock:
+            cached = self._digests.get(connection_key)
+        if cached is not None:
+            return cached
+
+        grouped = schema_service.get_catalog_grouped()
+        digest = self.render(grouped, self.max_chars)
+
+        with self._lock:
+            self._digests[connection_key] = digest
+
+        self.logger.info(
+            "Built schema digest for %s: %d tables, %d chars",
+            connection_key,
+            len(grouped),
+            len(digest),
+        )
+        return digest
+
+    def invalidate(self, connection_key: str | None = None) -> None:
+        with self._lock:
+            if connection_key is None:
+                self._digests.clear()
+            else:
+                self._digests.pop(connection_key, None)
+
+    def on_schema_change(self, affected) -> None:
+        # Digest is per database; any DDL makes that database's digest stale
+        self.invalidate(current_session().connection_key)
+
+    def render(self, grouped: dict, max_chars: int) -> str:
+        """Render get_catalog_grouped() output, degrading detail until it fits."""
+        tables = sorted(grouped.items())
+        schemas = sorted({key.split(".", 1)[0] for key, _ in tables})
+        header = f"SCHEMAS: {', '.join(schemas)}\n"
+
+        full = header + "\n".join(self._table_line(k, v) for k, v in tables)
+        if len(full) <= max_chars:
+            return full
+
+        compact = header + "\n".join(
+            self._table_line(k, v, COMPACT_EXTRA_COLUMNS) for k, v in tables
+        )
+        if len(compact) <= max_chars:
+            return compact
+
+        return self._names_only(header, [k for k, _ in tables], max_chars)
+
+    def _table_line(self, key: str, meta: dict, extra_columns: int | None = None) -> str:
+        pks = set(meta.get("primary_keys", []))
+        fks = {fk["column"]: fk for fk in meta.get("foreign_keys", [])}
+
+        parts = []
+        skipped = 0
+        extras = 0
+        for col in meta.get("columns", []):
+            name = col["name"]
+            is_key = name in pks or name in fks
+
+            if not is_key and extra_columns is not None:
+                if extras >= extra_columns:
+                    skipped += 1
+                    continue
+                extras += 1
+
+            part = f"{name}{'*' if name in pks else ''} {self._short_type(col['type'])}"
+            if name in fks:
+                fk = fks[name]
+                part += f"->{fk['ref_table']}.{fk['ref_column']}"
+            parts.append(part)
+
+        if skipped:
+            parts.append(f"+{skipped} cols")
+
+        return f"{key}({', '.join(parts)})"
+
+    def _names_only(self, header: str, keys: list[str], max_chars: int) -> str:
+        by_schema = defaultdict(list)
+        for key in keys:
+            schema, table = key.split(".", 1)
+            by_schema[schema].append(table)
+
+        out = header
+        for schema, names in by_schema.items():
+            line = f"{schema}: "
+            for i, name in enumerate(names):
+                candidate = name if i == 0 else f", {name}"
+                if len(out) + len(line) + len(candidate) + 20 > max_chars:
+                    line += f" ... (+{len(names) - i} tables)"
+                    break
+                line += candidate
+            out += line + "\n"
+            if len(out) >= max_chars:
+                break
+
+        return out.rstrip()
+
+    def _short_type(self, data_type: str) -> str:
+        return _TYPE_ALIASES.get(data_type, data_type)
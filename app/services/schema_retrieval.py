@@ -0,0 +1,178 @@
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+from app.core.logger import create_logger
+from app.services.database_service import current_session
+
+SCHEMA_RETRIEVAL_TOP_K = int(os.getenv("SCHEMA_RETRIEVAL_TOP_K", "8"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Table-name terms weigh more than column terms
+TABLE_NAME_WEIGHT = 3
+# Score share given to FK neighbours of a matching table
+NEIGHBOUR_DECAY = 0.5
+
+_SPLIT_RE = re.compile(r"[^0-9a-zA-ZÀ-ſ]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def tokenize(text: str) -> list[str]:
+    """Words (snake/camel case split, naive singular) plus character trigrams."""
+    words = []
+    for chunk in _SPLIT_RE.split(text or ""):
+        for word in _CAMEL_RE.split(chunk):
+            word = word.lower()
+            if len(word) < 2:
+                continue
+            words.append(_singular(word))
+
+    terms = list(words)
+    for word in words:
+        padded = f"#{word}#"
+        terms.extend(f"~{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return terms
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+class SchemaRelevanceIndex:
+    """
+    In-memory BM25 index over table names, column names and FK neighbourhoods.
+    Built from get_catalog_grouped() output; no network or model involved.
+    """
+
+    def __init__(self, grouped: dict):
+        self.grouped = grouped
+        self.neighbours: dict[str, set[str]] = defaultdict(set)
+        self.doc_terms: dict[str, Counter] = {}
+
+        tables_by_name = defaultdict(list)
+        for key in grouped:
+            tables_by_name[key.split(".", 1)[1]].append(key)
+
+        for key, meta in grouped.items():
+            schema = key.split(".", 1)[0]
+            for fk in meta.get("foreign_keys", []):
+                ref = f"{schema}.{fk['ref_table']}"
+                targets = [ref] if ref in grouped else tables_by_name.get(fk["ref_table"], [])
+                for target in targets:
+                    self.neighbours[key].add(target)
+                    self.neighbours[target].add(key)
+
+        for key, meta in grouped.items():
+            terms = Counter()
+            table_name = key.split(".", 1)[1]
+            for term in tokenize(table_name):
+                terms[term] += TABLE_NAME_WEIGHT
+            for col in meta.get("columns", []):
+                terms.update(tokenize(col["name"]))
+            for fk in meta.get("foreign_keys", []):
+                terms.update(tokenize(fk["ref_table"]))
+            self.doc_terms[key] = terms
+
+        self.doc_len = {key: sum(t.values()) for key, t in self.doc_terms.items()}
+        self.avg_len = (
+            sum(self.doc_len.values()) / len(self.doc_len) if self.doc_len else 0.0
+        )
+
+        df = Counter()
+        for terms in self.doc_terms.values():
+            df.update(terms.keys())
+        n = len(self.doc_terms)
+        self.idf = {
+            term: math.log(1 + (n - freq + 0.5) / (freq + 0.5))
+            for term, freq in df.items()
+        }
+
+    def _bm25(self, key: str, query_terms: Counter) -> float:
+        terms = self.doc_terms[key]
+        norm = K1 * (1 - B + B * self.doc_len[key] / (self.avg_len or 1))
+        score = 0.0
+        for term, qtf in query_terms.items():
+            tf = terms.get(term)
+            if not tf:
+                continue
+            score += qtf * self.idf[term] * tf * (K1 + 1) / (tf + norm)
+        return score
+
+    def search(self, query: str, k: int = SCHEMA_RETRIEVAL_TOP_K) -> list[tuple[str, float]]:
+        """Top-k tables for the question, FK neighbours of hits included."""
+        query_terms = Counter(tokenize(query))
+        if not query_terms:
+            return []
+
+        scores = {key: self._bm25(key, query_terms) for key in self.doc_terms}
+        direct = sorted(
+            ((key, s) for key, s in scores.items() if s > 0),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+        combined = dict(direct)
+        for key, score in direct[:k]:
+            for neighbour in self.neighbours.get(key, ()):
+                boosted = score * NEIGHBOUR_DECAY
+                if combined.get(neighbour, 0.0) < boosted:
+                    combined[neighbour] = boosted
+
+        ranked = sorted(combined.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:k]
+
+
+class SchemaRetrievalService:
+    """Keeps one relevance index per connection and serves pruned schema subsets."""
+
+    def __init__(self, top_k: int = SCHEMA_RETRIEVAL_TOP_K):
+        self.logger = create_logger()
+        self.top_k = top_k
+        self._indexes: dict[str, SchemaRelevanceIndex] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, schema_service, connection_key: str) -> SchemaRelevanceIndex:
+        with self._lock:
+            index = self._indexes.get(connection_key)
+        if index is not None:
+            return index
+
+        index = SchemaRelevanceIndex(schema_service.get_catalog_grouped())
+        with self._lock:
+            self._indexes[connection_key] = index
+
+        self.logger.info(
+            "Built schema relevance index for %s: %d tables",
+            connection_key,
+            len(index.grouped),
+        )
+        return index
+
+    def relevant_schema(
+        self, schema_service, connection_key: str, user_input: str
+    ) -> dict:
+        """Subset of get_catalog_grouped() limited to the top-k relevant tables."""
+        index = self.get_index(schema_service, connection_key)
+        ranked = index.search(user_input, self.top_k)
+        self.logger.debug("Relevant tables for %r: %s", user_input, ranked)
+        return {key: index.grouped[key] for key, _ in ranked}
+
+    def invalidate(self, connection_key: str | None = None) -> None:
+        with self._lock:
+            if connection_key is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(connection_key, None)
+
+    def on_schema_change(self, affected) -> None:
+        # Only the index of the database the DDL ran on is stale
+        self.invalidate(current_session().connection_key)
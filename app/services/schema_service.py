@@ -1,8 +1,30 @@
-from sqlalchemy import text
+import os
+from sqlalchemy import String, bindparam, text
 from pathlib import Path
 from collections import defaultdict
 from app.core.logger import create_logger
-from app.services.database_service import db_session
+from app.core.metadata_cache_provider import metadata_cache
+from app.services.database_service import current_session
+
+# Bounds for get_table_sample: rows returned and server-side time budget
+TABLE_SAMPLE_MAX_ROWS = int(os.getenv("TABLE_SAMPLE_MAX_ROWS", "20"))
+TABLE_SAMPLE_TIMEOUT_MS = int(os.getenv("TABLE_SAMPLE_TIMEOUT_MS", "2000"))
+
+SCHEMAS_QUERY = """
+            SELECT schema_name
+            FROM information_schema.schemata
+            WHERE schema_name NOT LIKE 'pg_%'
+            AND schema_name NOT IN ('information_schema')
+            ORDER BY schema_name;
+            """
+
+TABLE_NAMES_QUERY = """
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = :schema_name
+            AND table_type = 'BASE TABLE'
+            ORDER BY table_name;
+            """
 
 
 class SchemaService:
@@ -17,9 +39,10 @@ class SchemaService:
 
     # CHANGE: validate connection only when needed
     def _ensure_connected(self):
-        if not db_session.is_connected():
+        session = current_session()
+        if not session.is_connected():
             raise ConnectionError("No active database connection.")
-        self.engine = db_session.engine
+        self.engine = session.engine
 
     def load_sql(self, filename: str) -> str:
         path = self.base_path / filename
@@ -31,7 +54,7 @@ class SchemaService:
     def fetch_columns(self, schema_name: str | None = None):
         self._ensure_connected()
         query = text(self.load_sql("columns.sql"))
-        with self.engine.connect() as conn:
+        with current_session().connection() as conn:
             result = conn.execute(query, {"schema_name": schema_name})
             rows = [dict(row._mapping) for row in result]
         self.logger.debug("fetch_columns result for schema=%s: %s", schema_name, rows)
@@ -40,7 +63,7 @@ class SchemaService:
     def fetch_primary_keys(self, schema_name: str | None = None):
         self._ensure_connected()
         query = text(self.load_sql("primary_keys.sql"))
-        with self.engine.connect() as conn:
+        with current_session().connection() as conn:
             result = conn.execute(query, {"schema_name": schema_name})
             rows = [dict(row._mapping) for row in result]
         self.logger.debug(
@@ -51,7 +74,7 @@ class SchemaService:
     def fetch_foreign_keys(self, schema_name: str | None = None):
         self._ensure_connected()
         query = text(self.load_sql("foreign_keys.sql"))
-        with self.engine.connect() as conn:
+        with current_session().connection() as conn:
             result = conn.execute(query, {"schema_name": schema_name})
             rows = [dict(row._mapping) for row in result]
         self.logger.debug(
@@ -61,16 +84,8 @@ class SchemaService:
 
     def get_schemas(self):
         self._ensure_connected()
-        query = text(
-            """
-            SELECT schema_name
-            FROM information_schema.schemata
-            WHERE schema_name NOT LIKE 'pg_%'
-            AND schema_name NOT IN ('information_schema')
-            ORDER BY schema_name;
-            """
-        )
-        with self.engine.connect() as conn:
+        query = text(SCHEMAS_QUERY)
+        with current_session().connection() as conn:
             result = conn.execute(query)
             schemas = [row[0] for row in result.fetchall()]
         self.logger.debug("get_schemas result: %s", schemas)
@@ -78,16 +93,8 @@ class SchemaService:
 
     def get_table_names(self, schema_name: str = "public") -> list[str]:
         self._ensure_connected()
-        query = text(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = :schema_name
-            AND table_type = 'BASE TABLE'
-            ORDER BY table_name;
-            """
-        )
-        with self.engine.connect() as conn:
+        query = text(TABLE_NAMES_QUERY)
+        with current_session().connection() as conn:
             result = conn.execute(query, {"schema_name": schema_name})
             tables = [row[0] for row in result.fetchall()]
         self.logger.debug(
@@ -95,24 +102,40 @@ class SchemaService:
         )
         return tables
 
+    # CHANGE: table-scoped pg_catalog queries instead of filtering whole-schema lists
+    def _fetch_table(self, filename: str, schema_name: str, table_name: str) -> list[dict]:
+        self._ensure_connected()
+        query = text(self.load_sql(filename))
+        with current_session().connection() as conn:
+            result = conn.execute(
+                query, {"schema_name": schema_name, "table_name": table_name}
+            )
+            return [dict(row._mapping) for row in result]
+
     def get_primary_keys(self, schema_name: str, table_name: str) -> list[str]:
-        pks = self.fetch_primary_keys(schema_name)
-        result = [pk["column_name"] for pk in pks if pk["table_name"] == table_name]
+        pks = self._fetch_table("table_primary_keys.sql", schema_name, table_name)
+        return self._primary_key_names(schema_name, table_name, pks)
+
+    def _primary_key_names(self, schema_name: str, table_name: str, pks: list[dict]) -> list[str]:
+        result = [pk["column_name"] for pk in pks]
         self.logger.debug(
             "get_primary_keys result for %s.%s: %s", schema_name, table_name, result
         )
         return result
 
     def get_foreign_keys(self, schema_name: str, table_name: str) -> list[dict]:
-        fks = self.fetch_foreign_keys(schema_name)
+        fks = self._fetch_table("table_foreign_keys.sql", schema_name, table_name)
+        return self._foreign_key_refs(schema_name, table_name, fks)
+
+    def _foreign_key_refs(self, schema_name: str, table_name: str, fks: list[dict]) -> list[dict]:
         result = [
             {
                 "column": fk["column_name"],
+                "ref_schema": fk["foreign_table_schema"],
                 "ref_table": fk["foreign_table_name"],
                 "ref_column": fk["foreign_column_name"],
             }
             for fk in fks
-            if fk["table_name"] == table_name
         ]
         self.logger.debug(
             "get_foreign_keys result for %s.%s: %s", schema_name, table_name, result
@@ -120,32 +143,252 @@ class SchemaService:
         return result
 
     def get_table_columns(self, table_name: str, schema_name: str = "public"):
-        self._ensure_connected()
-        query = text(self.load_sql("table_columns.sql"))
-        with self.engine.connect() as conn:
-            raw = conn.execute(
-                query, {"schema_name": schema_name, "table_name": table_name}
-            )
-            columns = [dict(row._mapping) for row in raw]
+        columns = self._fetch_table("table_columns.sql", schema_name, table_name)
         self.logger.debug(
             "get_table_columns result for %s.%s: %s", schema_name, table_name, columns
         )
         return columns
 
-    def describe_table(self, schema_name: str, table_name: str) -> dict:
-        self._ensure_connected()
+    def _describe_from_columns(
+        self, schema_name: str, table_name: str, columns: list[dict]
+    ) -> dict:
+        """Build a describe_table dict from table_columns.sql rows (PK/FK flags per column)."""
         desc = {
             "schema": schema_name,
             "table": table_name,
-            "columns": self.get_table_columns(table_name, schema_name),
-            "primary_keys": self.get_primary_keys(schema_name, table_name),
-            "foreign_keys": self.get_foreign_keys(schema_name, table_name),
+            "columns": columns,
+            "primary_keys": [],
+            "foreign_keys": [],
         }
+
+        for col in columns:
+            if col["is_primary_key"]:
+                desc["primary_keys"].append(col["column_name"])
+
+            # One entry per foreign key the column belongs to
+            for ref_schema, ref_table, ref_column in col["foreign_references"] or []:
+                desc["foreign_keys"].append(
+                    {
+                        "column": col["column_name"],
+                        "ref_schema": ref_schema,
+                        "ref_table": ref_table,
+                        "ref_column": ref_column,
+                    }
+                )
+
+        return desc
+
+    def describe_table(self, schema_name: str, table_name: str) -> dict:
+        # Single round-trip: columns, PKs and FKs come from the same query
+        columns = self.get_table_columns(table_name, schema_name)
+        return self._describe_table(schema_name, table_name, columns)
+
+    def _describe_table(self, schema_name: str, table_name: str, columns: list[dict]) -> dict:
+        desc = self._describe_from_columns(schema_name, table_name, columns)
         self.logger.debug(
             "describe_table result for %s.%s: %s", schema_name, table_name, desc
         )
         return desc
 
+    def describe_all(self, schema_name: str | None = None) -> dict:
+        """
+        describe_table for every table of one schema (or all user schemas),
+        keyed by (schema, table), from a single catalog query: PKs and FKs come
+        from the per-column flags of schema_table_columns.sql.
+        """
+        self._ensure_connected()
+        query = text(self.load_sql("schema_table_columns.sql"))
+        with current_session().connection() as conn:
+            rows = [
+                dict(row._mapping)
+                for row in conn.execute(query, {"schema_name": schema_name})
+            ]
+        return self._describe_rows(schema_name, rows)
+
+    def _describe_rows(self, schema_name: str | None, rows: list[dict]) -> dict:
+        """describe_all result from schema_table_columns.sql rows."""
+        columns_by_table = defaultdict(list)
+        for row in rows:
+            columns_by_table[(row.pop("table_schema"), row.pop("table_name"))].append(row)
+
+        tables = {
+            (schema, table): self._describe_from_columns(schema, table, columns)
+            for (schema, table), columns in columns_by_table.items()
+        }
+
+        self.logger.debug(
+            "describe_all result for schema=%s: %d tables", schema_name, len(tables)
+        )
+        return tables
+
+    def get_catalog_signatures(self) -> dict:
+        """
+        {(schema, table): signature} where the signature changes whenever the
+        relation's pg_class, pg_attribute, pg_attrdef or pg_constraint rows
+        are rewritten by DDL (their xmin changes).
+        """
+        self._ensure_connected()
+        query = text(self.load_sql("catalog_signatures.sql"))
+        with current_session().connection() as conn:
+            result = conn.execute(query)
+            signatures = {
+                (row.table_schema, row.table_name): row.signature for row in result
+            }
+        self.logger.debug("get_catalog_signatures: %d relations", len(signatures))
+        return signatures
+
+    def describe_schema(self, schema_name: str) -> dict:
+        """describe_table for every table of a schema, keyed by table name."""
+        return {
+            table: desc for (_, table), desc in self.describe_all(schema_name).items()
+        }
+
+    def get_table_sample(
+        self, schema_name: str, table_name: str, limit: int = 5
+    ) -> list[dict]:
+        """
+        First rows of a table, capped at TABLE_SAMPLE_MAX_ROWS, run in a
+        read-only transaction with a local statement_timeout.
+        """
+        query, limit = self._sample_query(schema_name, table_name, limit)
+
+        with current_session().connection() as conn:
+            with conn.begin():
+                conn.execute(text("SET TRANSACTION READ ONLY"))
+                conn.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": str(TABLE_SAMPLE_TIMEOUT_MS)},
+                )
+                result = conn.execute(query, {"limit": limit})
+                rows = [dict(row._mapping) for row in result]
+
+        self.logger.debug(
+            "get_table_sample result for %s.%s: %d rows", schema_name, table_name, len(rows)
+        )
+        return rows
+
+    def _sample_query(self, schema_name: str, table_name: str, limit: int):
+        self._ensure_connected()
+        limit = max(1, min(int(limit or 5), TABLE_SAMPLE_MAX_ROWS))
+        quote = self.engine.dialect.identifier_preparer.quote
+        query = text(
+            f"SELECT * FROM {quote(schema_name)}.{quote(table_name)} LIMIT :limit"
+        )
+        return query, limit
+
+    # CHANGE: async variants on the asyncpg engine, so lookups share the event loop
+    async def _afetch(self, query, params: dict | None = None) -> list[dict]:
+        self._ensure_connected()
+        params = params or {}
+        # asyncpg cannot infer the type of `:schema_name IS NULL`; name them as text
+        query = query.bindparams(*(bindparam(name, type_=String) for name in params))
+        async with current_session().aconnection() as conn:
+            result = await conn.execute(query, params)
+            return [dict(row._mapping) for row in result]
+
+    async def aget_schemas(self) -> list[str]:
+        rows = await self._afetch(text(SCHEMAS_QUERY))
+        schemas = [row["schema_name"] for row in rows]
+        self.logger.debug("get_schemas result: %s", schemas)
+        return schemas
+
+    async def aget_table_names(self, schema_name: str = "public") -> list[str]:
+        rows = await self._afetch(text(TABLE_NAMES_QUERY), {"schema_name": schema_name})
+        tables = [row["table_name"] for row in rows]
+        self.logger.debug(
+            "get_table_names result for schema=%s: %s", schema_name, tables
+        )
+        return tables
+
+    async def _afetch_table(
+        self, filename: str, schema_name: str, table_name: str
+    ) -> list[dict]:
+        return await self._afetch(
+            text(self.load_sql(filename)),
+            {"schema_name": schema_name, "table_name": table_name},
+        )
+
+    async def aget_table_columns(self, table_name: str, schema_name: str = "public"):
+        columns = await self._afetch_table("table_columns.sql", schema_name, table_name)
+        self.logger.debug(
+            "get_table_columns result for %s.%s: %s", schema_name, table_name, columns
+        )
+        return columns
+
+    async def aget_primary_keys(self, schema_name: str, table_name: str) -> list[str]:
+        pks = await self._afetch_table("table_primary_keys.sql", schema_name, table_name)
+        return self._primary_key_names(schema_name, table_name, pks)
+
+    async def aget_foreign_keys(self, schema_name: str, table_name: str) -> list[dict]:
+        fks = await self._afetch_table("table_foreign_keys.sql", schema_name, table_name)
+        return self._foreign_key_refs(schema_name, table_name, fks)
+
+    async def adescribe_table(self, schema_name: str, table_name: str) -> dict:
+        columns = await self.aget_table_columns(table_name, schema_name)
+        return self._describe_table(schema_name, table_name, columns)
+
+    async def adescribe_schema(self, schema_name: str) -> dict:
+        rows = await self._afetch(
+            text(self.load_sql("schema_table_columns.sql")), {"schema_name": schema_name}
+        )
+        return {
+            table: desc for (_, table), desc in self._describe_rows(schema_name, rows).items()
+        }
+
+    async def aget_table_sample(
+        self, schema_name: str, table_name: str, limit: int = 5
+    ) -> list[dict]:
+        query, limit = self._sample_query(schema_name, table_name, limit)
+
+        async with current_session().aconnection() as conn:
+            async with conn.begin():
+                await conn.execute(text("SET TRANSACTION READ ONLY"))
+                await conn.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": str(TABLE_SAMPLE_TIMEOUT_MS)},
+                )
+                result = await conn.execute(query, {"limit": limit})
+                rows = [dict(row._mapping) for row in result]
+
+        self.logger.debug(
+            "get_table_sample result for %s.%s: %d rows", schema_name, table_name, len(rows)
+        )
+        return rows
+
+    def get_catalog_grouped(self) -> dict:
+        """
+        get_schema_grouped() shape for every user schema, from the metadata
+        cache when the warm-up left the whole catalog in it, else from a
+        single describe_all() query.
+        """
+        tables = metadata_cache.snapshot()
+        if tables is None:
+            tables = self.describe_all()
+
+        return {
+            f"{schema}.{table}": {
+                "columns": [
+                    {
+                        "name": col["column_name"],
+                        "type": col["data_type"],
+                        "nullable": col["is_nullable"],
+                        "default": col["column_default"],
+                    }
+                    for col in meta["columns"]
+                ],
+                "primary_keys": list(meta["primary_keys"]),
+                "foreign_keys": [
+                    {
+                        "column": fk["column"],
+                        "ref_table": fk["ref_table"],
+                        "ref_column": fk["ref_column"],
+                    }
+                    for fk in meta["foreign_keys"]
+                ],
+            }
+            for (schema, table), meta in sorted(tables.items())
+        }
+
     def get_schema_grouped(self, schema_name: str | None = None) -> dict:
         self._ensure_connected()
         columns = self.fetch_columns(schema_name)
@@ -1,178 +1,666 @@
+import asyncio
 import json
+import os
+import threading
+import time
+import weakref
 from pathlib import Path
+from typing import Any, Callable
 from app.core.logger import create_logger
 from app.repository.assistant_message_repository import AssistantMessageRepository
 from app.repository.user_message_repository import UserMessageRepository
 from app.services.llm_service import LocalLLMConnector
 from app.services.model_service import ModelService
+from app.services.schema_service import SchemaService
+from app.services.sql_validator import SQL_VALIDATE_MAX_REPAIRS, SqlValidator
+from app.core.generation_cache_provider import generation_cache
+from app.core.schema_digest_provider import schema_digest
+from app.core.schema_retrieval_provider import schema_retrieval
+from app.services.database_service import current_session
 from app.utils.prompt_builder import PromptBuilder
 from app.utils.json_parser import JSONParser
+from app.utils.agent_transcript import AgentTranscript
 from app.utils.tool_executor import ToolExecutor
 
+# Max simultaneous inferences sent to the model backend, and how many
+# requests may wait for a slot before new ones are rejected.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+
+MAX_STEPS = 10
+MAX_REPEATED_CALLS = 3
+# Tool calls accepted from a single TOOL_CALL array; they run concurrently
+MAX_TOOL_CALLS_PER_STEP = int(os.getenv("AGENT_MAX_TOOL_CALLS", "8"))
+
+TOOLS_REQUIRING_SCHEMA = {
+    "list_tables",
+    "get_columns",
+    "get_primary_keys",
+    "get_foreign_keys",
+    "describe_table",
+    "describe_schema",
+    "get_table_sample",
+}
+
+
+class AgentBusyError(RuntimeError):
+    """Raised when the model backend queue is full."""
+
+
+class AgentRunState:
+    """State of a single agent run. Created per request, never shared."""
+
+    def __init__(
+        self,
+        user_input: str,
+        settings,
+        llm: LocalLLMConnector,
+        on_event: Callable[[str, dict], Any] | None,
+        mode: str = "tools",
+        transcript: bool = False,
+        use_cache: bool = True,
+        validate_sql: bool = False,
+    ):
+        self.user_input = user_input
+        self.mode = mode
+        self.use_cache = use_cache
+        self.validate_sql = validate_sql
+        self.repairs = 0
+        self.cache_key = None
+        self.cached_result = None
+        self.transcript = AgentTranscript() if transcript else None
+        self.model_name = settings.model_name
+        self.system_prompt = settings.system_prompt
+        self.context = settings.context
+        self.llm = llm
+        self.on_event = on_event
+        self.tool_executor = ToolExecutor()
+        self.schema_digest = None
+        self.schema_digest_partial = False
+
+        self.user_message = None
+        self.selected_schema = None
+        self.last_tool_result = None
+        self.last_tool_name = None
+        # (name, arguments) of every call of the previous tool step
+        self.last_calls: list[tuple[str, dict]] = []
+        self.repeated_same_tool = 0
+
 
 class SQLAssistantService:
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_queue: int = LLM_MAX_QUEUE,
+    ):
         self.logger = create_logger()
         self.model_service = ModelService()
 
-        self.llm = None
-        self.current_model_name = None
-
         self.user_repo = UserMessageRepository()
         self.assistant_repo = AssistantMessageRepository()
 
         tools = self._load_tools()
         self.prompt_builder = PromptBuilder(tools)
-        self.tool_executor = ToolExecutor()
         self.json_parser = JSONParser()
+        self.sql_validator = SqlValidator()
+
+        # Connectors are immutable once built, so they are shared per settings
+        self._llms: dict[tuple, LocalLLMConnector] = {}
+        self._llms_lock = threading.Lock()
+
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        # asyncio primitives belong to one event loop, so each loop gets its
+        # own semaphore; synchronous callers share a thread semaphore
+        self._llm_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._thread_llm_slots = threading.BoundedSemaphore(max_concurrency)
+        self._llm_lock = threading.Lock()
+        self._llm_waiting = 0
+        self._llm_active = 0
+
+        self.logger.info(
+            "SQLAssistantService initialized (max_concurrency=%d, max_queue=%d)",
+            max_concurrency,
+            max_queue,
+        )
 
-        self.logger.info("SQLAssistantService initialized")
-
-    def load_model_from_active_model(self):
+    def _get_llm(self, model) -> LocalLLMConnector:
+        key = (model.model_name, model.temperature, model.top_p, model.seed)
+
+        with self._llms_lock:
+            llm = self._llms.get(key)
+            if llm is None:
+                # CHANGE: LLM initialized from active model settings
+                llm = LocalLLMConnector(
+                    model_name=model.model_name,
+                    use_gpu=True,
+                    temperature=model.temperature,
+                    top_p=model.top_p,
+                    seed=model.seed,
+                )
+                self._llms[key] = llm
+                self.logger.info("Model loaded: %s", model.model_name)
+            return llm
+
+    def _start_run(
+        self,
+        user_input: str,
+        on_event: Callable[[str, dict], Any] | None,
+        mode: str = "tools",
+        transcript: bool = False,
+        use_cache: bool = True,
+        validate_sql: bool = False,
+    ) -> AgentRunState:
+        # CHANGE: load model on each request based on active model
         model = self.model_service.get_active_model()
         self.logger.info("Active model: %s", model)
 
         if not model:
             raise RuntimeError("No active model selected.")
 
-        if self.current_model_name == model.model_name:
-            return
+        state = AgentRunState(
+            user_input,
+            model,
+            self._get_llm(model),
+            on_event,
+            mode,
+            transcript,
+            use_cache,
+            validate_sql,
+        )
 
-        # CHANGE: LLM initialized from active model settings
-        self.llm = LocalLLMConnector(
-            model_name=model.model_name,
-            use_gpu=True,
-            temperature=model.temperature,
-            top_p=model.top_p,
-            seed=model.seed,
+        # Key is computed before the run so DDL during the run makes it stale;
+        # validated answers are kept apart from unvalidated ones
+        state.cache_key = generation_cache.make_key(
+            user_input,
+            model,
+            f"{mode}+validate" if validate_sql else mode,
+            current_session().connection_key,
         )
+        if use_cache:
+            state.cached_result = generation_cache.get(state.cache_key)
 
-        self.current_model_name = model.model_name
-        self.logger.info("Model loaded: %s", model.model_name)
+        if state.cached_result is not None:
+            self.logger.info("Generation cache hit for: %s", user_input)
+            state.user_message = self._save_user_message(user_input, state.model_name)
+            return state
 
-    def run(self, user_input: str):
-        # CHANGE: load model on each request based on active model
-        self.load_model_from_active_model()
-
-        settings = self.model_service.get_active_model()
-        system_prompt = settings.system_prompt
-        context = settings.context
+        if mode == "schema_ranked":
+            relevant = schema_retrieval.relevant_schema(
+                SchemaService(), current_session().connection_key, user_input
+            )
+            if relevant:
+                state.schema_digest = schema_digest.render(
+                    relevant, schema_digest.max_chars
+                )
+                state.schema_digest_partial = True
+            else:
+                self.logger.info("No relevant tables matched, using full digest")
+                mode = "schema_primed"
+
+        if mode == "schema_primed":
+            state.schema_digest = schema_digest.get_digest(
+                SchemaService(), current_session().connection_key
+            )
 
         self.logger.info("Agent started for: %s", user_input)
+        state.user_message = self._save_user_message(user_input, state.model_name)
+        return state
 
-        user_message = self._save_user_message(user_input)
-
-        selected_schema = None
-        last_tool_result = None
-        last_tool_name = None
+    def _emit(self, on_event: Callable[[str, dict], Any] | None, event: str, data: dict):
+        """Report agent progress to an optional listener (e.g. the SSE endpoint)."""
+        if on_event is None:
+            return
+        try:
+            on_event(event, data)
+        except Exception as e:
+            self.logger.warning("Progress listener failed for event %s: %s", event, e)
+
+    def _build_step_prompt(self, state: AgentRunState, step: int) -> str | list[dict]:
+        """
+        Chat-capable backends get [system=cached prefix, user=step delta] so the
+        prefix KV cache is reused; others get the same text as one prompt.
+        Transcript runs always use chat form (flattened by non-chat backends).
+        """
+        if state.transcript is not None:
+            return self.prompt_builder.build_transcript_messages(
+                system_prompt=state.system_prompt,
+                context=state.context,
+                user_input=state.user_input,
+                transcript=state.transcript,
+                schema_digest=state.schema_digest,
+                schema_digest_partial=state.schema_digest_partial,
+                model_name=state.model_name,
+            )
 
-        max_steps = 10
-        repeated_same_tool = 0
-        max_repeated_calls = 3
+        kwargs = dict(
+            system_prompt=state.system_prompt,
+            context=state.context,
+            user_input=state.user_input,
+            last_tool_result=state.last_tool_result,
+            step=step,
+            last_tool_name=state.last_tool_name,
+            schema_digest=state.schema_digest,
+            schema_digest_partial=state.schema_digest_partial,
+            model_name=state.model_name,
+        )
+        if state.llm.backend.supports_chat:
+            return self.prompt_builder.build_messages(**kwargs)
+        return self.prompt_builder.build(**kwargs)
+
+    def _call_llm(self, llm: LocalLLMConnector, prompt: str | list[dict]) -> str:
+        if isinstance(prompt, list):
+            return llm.run_chat(prompt)
+        return llm.run_text(prompt)
+
+    async def _acall_llm(self, llm: LocalLLMConnector, prompt: str | list[dict]) -> str:
+        if isinstance(prompt, list):
+            return await llm.arun_chat(prompt)
+        return await llm.arun_text(prompt)
+
+    def _interpret_output(
+        self, state: AgentRunState, step: int, raw: str, latency_ms: float
+    ) -> tuple[str, Any]:
+        """
+        Decide what to do with one model output. Returns ("tool", [(name, args), ...]),
+        ("final", sql_dict), ("stop", None) or ("continue", None).
+        """
+        cleaned = self.json_parser.clean_output(raw)
+        self._emit(
+            state.on_event,
+            "model",
+            {
+                "step": step,
+                "latency_ms": round(latency_ms, 2),
+                "output_chars": len(raw),
+            },
+        )
 
-        tools_requiring_schema = {
-            "list_tables",
-            "get_columns",
-            "get_primary_keys",
-            "get_foreign_keys",
-            "describe_table",
-            "describe_schema",
-            "get_table_sample",
+        # CHANGE: unified parsing for TOOL_CALL (explicit or implicit, one call or an array)
+        parsed_tool_calls = self._extract_tool_calls(cleaned)
+
+        if parsed_tool_calls:
+            if len(parsed_tool_calls) > MAX_TOOL_CALLS_PER_STEP:
+                self.logger.warning(
+                    "Model requested %d tool calls, running the first %d",
+                    len(parsed_tool_calls),
+                    MAX_TOOL_CALLS_PER_STEP,
+                )
+
+            calls: list[tuple[str, dict]] = []
+            for parsed in parsed_tool_calls[:MAX_TOOL_CALLS_PER_STEP]:
+                name = parsed.get("name")
+                args = parsed.get("arguments", {}) or {}
+
+                if name in TOOLS_REQUIRING_SCHEMA and not args.get("schema"):
+                    if state.selected_schema:
+                        args["schema"] = state.selected_schema
+
+                if (name, args) not in calls:
+                    calls.append((name, args))
+
+            names = ", ".join(name for name, _ in calls)
+
+            # Detect tool-call loop with same arguments
+            if calls == state.last_calls:
+                state.repeated_same_tool += 1
+                self.logger.warning(
+                    "Model repeated tool %s with same arguments (%d/%d)",
+                    names,
+                    state.repeated_same_tool,
+                    MAX_REPEATED_CALLS,
+                )
+            else:
+                state.repeated_same_tool = 0
+
+            if state.repeated_same_tool >= MAX_REPEATED_CALLS:
+                self.logger.error("Model stuck repeating tool %s", names)
+                self._emit(
+                    state.on_event, "error", {"step": step, "detail": "repeated_tool"}
+                )
+                return "stop", None
+
+            for name, args in calls:
+                self._emit(
+                    state.on_event,
+                    "tool_call",
+                    {"step": step, "name": name, "arguments": args},
+                )
+            return "tool", calls
+
+        # FINAL_SQL branch
+        final_sql = self._extract_final_sql(cleaned)
+        if final_sql:
+            return "final", final_sql
+
+        # CHANGE: direct SQL dict fallback if model skips FINAL_SQL wrapper
+        implicit = self.json_parser.safe_parse(cleaned)
+        if implicit and isinstance(implicit, dict) and "sql" in implicit:
+            return "final", implicit
+
+        return "continue", None
+
+    def _record_tool_result(
+        self,
+        state: AgentRunState,
+        step: int,
+        name: str,
+        args: dict,
+        result: Any,
+        latency_ms: float,
+    ) -> None:
+        self._note_tool_result(state, step, name, args, result, latency_ms)
+
+        if state.transcript is not None:
+            state.transcript.add(name, args, result)
+
+        state.last_tool_name = name
+        state.last_tool_result = {
+            "tool": name,
+            "arguments": args,
+            "result": result,
         }
+        state.last_calls = [(name, args)]
+
+    def _record_tool_results(
+        self,
+        state: AgentRunState,
+        step: int,
+        calls: list[tuple[str, dict]],
+        results: list,
+        latency_ms: float,
+    ) -> None:
+        """Results of one tool step; several calls become one combined result."""
+        if len(calls) == 1:
+            name, args = calls[0]
+            self._record_tool_result(state, step, name, args, results[0], latency_ms)
+            return
 
-        for step in range(max_steps):
-            prompt = self.prompt_builder.build(
-                system_prompt=system_prompt,
-                context=context,
-                user_input=user_input,
-                last_tool_result=last_tool_result,
-                step=step,
-                last_tool_name=last_tool_name,
-            )
-
-            raw = self.llm.run_text(prompt)
-            cleaned = self.json_parser.clean_output(raw)
+        for (name, args), result in zip(calls, results):
+            self._note_tool_result(state, step, name, args, result, latency_ms)
 
-            # CHANGE: unified parsing for TOOL_CALL (explicit or implicit)
-            parsed_tool_call = self._extract_tool_call(cleaned)
+        if state.transcript is not None:
+            state.transcript.add_many(calls, results)
 
-            if parsed_tool_call:
-                name = parsed_tool_call.get("name")
-                args = parsed_tool_call.get("arguments", {}) or {}
+        state.last_tool_name = ", ".join(name for name, _ in calls)
+        state.last_tool_result = {
+            "tool_calls": [
+                {"tool": name, "arguments": args, "result": result}
+                for (name, args), result in zip(calls, results)
+            ]
+        }
+        state.last_calls = list(calls)
+
+    def _note_tool_result(
+        self,
+        state: AgentRunState,
+        step: int,
+        name: str,
+        args: dict,
+        result: Any,
+        latency_ms: float,
+    ) -> None:
+        self.logger.debug("Tool executed: %s args=%s", name, args)
+
+        self._emit(
+            state.on_event,
+            "tool_result",
+            {
+                "step": step,
+                "name": name,
+                "size": len(json.dumps(result, default=str)),
+                "latency_ms": round(latency_ms, 2),
+            },
+        )
 
-                # Detect tool-call loop with same arguments
-                if (
-                    last_tool_name == name
-                    and last_tool_result is not None
-                    and last_tool_result.get("arguments") == args
-                ):
-                    repeated_same_tool += 1
-                    self.logger.warning(
-                        "Model repeated tool %s with same arguments (%d/%d)",
-                        name,
-                        repeated_same_tool,
-                        max_repeated_calls,
-                    )
-                else:
-                    repeated_same_tool = 0
+        if name == "list_schemas" and isinstance(result, list) and len(result) == 1:
+            state.selected_schema = result[0]
+            self.logger.debug("Auto-selected schema: %s", state.selected_schema)
+
+    def _validate_final(self, state: AgentRunState, step: int, final_sql: dict) -> bool:
+        """
+        EXPLAIN the generated SQL. Returns True when it can be returned; on
+        error the Postgres message and the cached metadata of the referenced
+        tables become the next step's LAST_TOOL_RESULT, up to
+        SQL_VALIDATE_MAX_REPAIRS times.
+        """
+        sql = final_sql.get("sql") or ""
+        check = self.sql_validator.validate(sql)
+
+        final_sql["validation"] = {
+            "valid": check["valid"],
+            "error": check["error"],
+            "plan": check["plan"],
+            "skipped": check["skipped"],
+            "repairs": state.repairs,
+        }
+        self._emit(
+            state.on_event,
+            "validation",
+            {
+                "step": step,
+                "valid": check["valid"],
+                "error": check["error"],
+                "repairs": state.repairs,
+                "latency_ms": check["latency_ms"],
+            },
+        )
 
-                if repeated_same_tool >= max_repeated_calls:
-                    self.logger.error("Model stuck repeating tool %s", name)
-                    break
+        if check["valid"]:
+            return True
 
-                if name in tools_requiring_schema and not args.get("schema"):
-                    if selected_schema:
-                        args["schema"] = selected_schema
+        if state.repairs >= SQL_VALIDATE_MAX_REPAIRS:
+            # Returned so the caller can see it, but never as a normal success
+            final_sql["error"] = (
+                f"SQL failed validation after {state.repairs} repairs: {check['error']}"
+            )
+            return True
+
+        state.repairs += 1
+        self._record_tool_result(
+            state,
+            step,
+            "validate_sql",
+            {"sql": sql},
+            self.sql_validator.repair_feedback(sql, check["error"]),
+            check["latency_ms"],
+        )
+        return False
 
-                result = self.tool_executor.execute(name, args)
-                self.logger.debug("Tool executed: %s args=%s", name, args)
+    def _cacheable(self, final_sql: dict) -> bool:
+        """Only SQL that passed validation (or was not asked to) is reused."""
+        validation = final_sql.get("validation")
+        if validation is None:
+            return True
+        return validation["valid"] and not validation["skipped"]
 
-                if (
-                    name == "list_schemas"
-                    and isinstance(result, list)
-                    and len(result) == 1
-                ):
-                    selected_schema = result[0]
-                    self.logger.debug("Auto-selected schema: %s", selected_schema)
+    def _finish(self, state: AgentRunState, step: int, final_sql: dict) -> dict:
+        if state.cached_result is None and final_sql.get("sql") and self._cacheable(final_sql):
+            generation_cache.store(state.cache_key, final_sql, current_session().connection_key)
 
-                last_tool_name = name
-                last_tool_result = {
-                    "tool": name,
-                    "arguments": args,
-                    "result": result,
-                }
+        self._save_assistant_message(
+            json.dumps(final_sql), state.user_message.id, state.model_name
+        )
+        self._emit(state.on_event, "final_sql", {"step": step, **final_sql})
+        return final_sql
+
+    def _finish_cached(self, state: AgentRunState) -> dict:
+        self._emit(state.on_event, "cache_hit", {"key": state.cache_key})
+        return {**self._finish(state, 0, state.cached_result), "cached": True}
+
+    def _agent_loop(self, state: AgentRunState):
+        """
+        The agent loop shared by run and arun. Yields the work each step needs,
+        ("llm", prompt), ("tools", calls) or ("call", (function, *args)) for
+        other blocking work, receives its result and returns the response.
+        """
+        for step in range(MAX_STEPS):
+            prompt = self._build_step_prompt(state, step)
+
+            started = time.time()
+            raw = yield "llm", prompt
+            action, payload = self._interpret_output(
+                state, step, raw, (time.time() - started) * 1000
+            )
 
+            if action == "tool":
+                started = time.time()
+                results = yield "tools", payload
+                self._record_tool_results(
+                    state, step, payload, results, (time.time() - started) * 1000
+                )
                 continue
 
-            # FINAL_SQL branch
-            final_sql = self._extract_final_sql(cleaned)
-            if final_sql:
-                self._save_assistant_message(json.dumps(final_sql), user_message.id)
-                return final_sql
+            if action == "final":
+                if state.validate_sql and not (
+                    yield "call", (self._validate_final, state, step, payload)
+                ):
+                    continue
+                return (yield "call", (self._finish, state, step, payload))
 
-            # CHANGE: direct SQL dict fallback if model skips FINAL_SQL wrapper
-            implicit = self.json_parser.safe_parse(cleaned)
-            if implicit and isinstance(implicit, dict) and "sql" in implicit:
-                self._save_assistant_message(json.dumps(implicit), user_message.id)
-                return implicit
+            if action == "stop":
+                break
 
         return {"error": "max_steps_reached"}
 
-    def _extract_tool_call(self, cleaned: str) -> dict | None:
-        """CHANGE: centralized logic to obtain a tool call from model output."""
+    def run(
+        self,
+        user_input: str,
+        on_event: Callable[[str, dict], Any] | None = None,
+        mode: str = "tools",
+        transcript: bool = False,
+        use_cache: bool = True,
+        validate_sql: bool = False,
+    ):
+        """Synchronous agent run on the sync engine and backend calls."""
+        state = self._start_run(
+            user_input, on_event, mode, transcript, use_cache, validate_sql
+        )
+
+        if state.cached_result is not None:
+            return self._finish_cached(state)
+
+        loop = self._agent_loop(state)
+        result = None
+        try:
+            while True:
+                kind, work = loop.send(result)
+                if kind == "llm":
+                    result = self._run_llm_blocking(state.llm, work)
+                elif kind == "tools":
+                    result = state.tool_executor.execute_many(work)
+                else:
+                    function, *args = work
+                    result = function(*args)
+        except StopIteration as done:
+            return done.value
+
+    def _enter_llm_queue(self) -> None:
+        with self._llm_lock:
+            if self._llm_waiting >= self.max_queue:
+                raise AgentBusyError("Model backend queue is full, try again later.")
+            self._llm_waiting += 1
+
+    def _count_llm(self, waiting: int = 0, active: int = 0) -> None:
+        with self._llm_lock:
+            self._llm_waiting += waiting
+            self._llm_active += active
+
+    def _loop_llm_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._llm_lock:
+            slots = self._llm_slots.get(loop)
+            if slots is None:
+                slots = self._llm_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+            return slots
+
+    def _run_llm_blocking(self, llm: LocalLLMConnector, prompt: str | list[dict]) -> str:
+        """Synchronous _run_llm, queueing on the thread semaphore."""
+        self._enter_llm_queue()
+        waiting = True
+        try:
+            with self._thread_llm_slots:
+                self._count_llm(waiting=-1, active=1)
+                waiting = False
+                try:
+                    return self._call_llm(llm, prompt)
+                finally:
+                    self._count_llm(active=-1)
+        finally:
+            if waiting:
+                self._count_llm(waiting=-1)
+
+    async def _run_llm(self, llm: LocalLLMConnector, prompt: str | list[dict]) -> str:
+        """Run one inference, queueing behind the backend concurrency limit."""
+        self._enter_llm_queue()
+        waiting = True
+        try:
+            async with self._loop_llm_slots():
+                self._count_llm(waiting=-1, active=1)
+                waiting = False
+                try:
+                    return await self._acall_llm(llm, prompt)
+                finally:
+                    self._count_llm(active=-1)
+        finally:
+            if waiting:
+                self._count_llm(waiting=-1)
+
+    async def arun(
+        self,
+        user_input: str,
+        on_event: Callable[[str, dict], Any] | None = None,
+        mode: str = "tools",
+        transcript: bool = False,
+        use_cache: bool = True,
+        validate_sql: bool = False,
+    ):
+        """
+        Async agent loop with request-scoped state. Inferences are limited to
+        `max_concurrency` at a time; blocking work runs in worker threads.
+        """
+        state = await asyncio.to_thread(
+            self._start_run, user_input, on_event, mode, transcript, use_cache, validate_sql
+        )
+
+        if state.cached_result is not None:
+            return await asyncio.to_thread(self._finish_cached, state)
+
+        loop = self._agent_loop(state)
+        result = None
+        try:
+            while True:
+                kind, work = loop.send(result)
+                if kind == "llm":
+                    result = await self._run_llm(state.llm, work)
+                elif kind == "tools":
+                    result = await state.tool_executor.aexecute_many(work)
+                else:
+                    result = await asyncio.to_thread(*work)
+        except StopIteration as done:
+            return done.value
+
+    def get_queue_status(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._llm_active,
+            "waiting": self._llm_waiting,
+            "max_queue": self.max_queue,
+        }
+
+    def _extract_tool_calls(self, cleaned: str) -> list[dict] | None:
+        """CHANGE: centralized logic to obtain the tool calls of a model output."""
         tool_block = self.json_parser.extract_block(cleaned, "TOOL_CALL")
         if tool_block:
-            parsed = self.json_parser.safe_parse(tool_block)
-            if parsed and isinstance(parsed, dict) and "name" in parsed:
-                return parsed
+            calls = self.json_parser.parse_tool_calls(tool_block)
+            if calls:
+                return calls
 
-        implicit = self.json_parser.safe_parse(cleaned)
-        if (
-            implicit
-            and isinstance(implicit, dict)
-            and "name" in implicit
-            and "arguments" in implicit
-            and "sql" not in implicit
+        implicit = self.json_parser.parse_tool_calls(cleaned)
+        if implicit and all(
+            "arguments" in call and "sql" not in call for call in implicit
         ):
             return implicit
 
@@ -185,13 +673,13 @@ class SQLAssistantService:
             return None
         return self.json_parser.parse_final_sql(final_block)
 
-    def _save_user_message(self, text: str):
-        return self.user_repo.save(content=text, model_name=self.current_model_name)
+    def _save_user_message(self, text: str, model_name: str):
+        return self.user_repo.save(content=text, model_name=model_name)
 
-    def _save_assistant_message(self, text: str, parent_id: int):
+    def _save_assistant_message(self, text: str, parent_id: int, model_name: str):
         return self.assistant_repo.save(
             content=text,
-            model_name=self.current_model_name,
+            model_name=model_name,
             user_message_id=parent_id,
         )
 
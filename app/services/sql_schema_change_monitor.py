@@ -1,40 +1,90 @@
-import re
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import text
 
 from app.core.logger import create_logger
-from app.services.metadata_cache import MetadataCache
+from app.services.ddl_analyzer import DdlAnalyzer
+from app.services.metadata_cache import NamespacedMetadataCache
+
+DEFAULT_SEARCH_PATH = ["public"]
 
 
 class SqlSchemaChangeMonitor:
-    def __init__(self, cache: MetadataCache):
+    def __init__(self, cache: NamespacedMetadataCache):
         self.cache = cache
         self.logger = create_logger()
+        self.analyzer = DdlAnalyzer()
+        # Called with the affected (schema, table) list; empty means "everything"
+        # and a None table means the whole schema
+        self.listeners: List[Callable[[List[Tuple[Optional[str], Optional[str]]]], None]] = []
+
+    def add_listener(
+        self, listener: Callable[[List[Tuple[Optional[str], Optional[str]]]], None]
+    ) -> None:
+        self.listeners.append(listener)
+
+    def _notify(self, affected: List[Tuple[Optional[str], Optional[str]]]) -> None:
+        for listener in self.listeners:
+            try:
+                listener(affected)
+            except Exception as e:
+                self.logger.warning("Schema change listener failed: %s", e)
 
     def is_schema_change(self, sql: str) -> bool:
-        pattern = r"\b(ALTER|CREATE|DROP)\b\s+\b(TABLE|VIEW|INDEX|SCHEMA)\b"
-        return re.search(pattern, sql, re.IGNORECASE) is not None
+        return self.analyzer.analyze(sql).is_schema_change
 
-    def extract_affected_objects(self, sql: str) -> List[Tuple[Optional[str], str]]:
-        pattern = r"\b(?:ALTER|CREATE|DROP)\b\s+\b(?:TABLE|VIEW)\b\s+((?:\w+\.)?\w+)"
-        matches = re.findall(pattern, sql, re.IGNORECASE)
+    def extract_affected_objects(
+        self, sql: str, search_path: Optional[List[str]] = None
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        return self.analyzer.analyze(sql).resolve(
+            search_path or DEFAULT_SEARCH_PATH, self.cache.schemas_with_table
+        )
 
-        results: List[Tuple[Optional[str], str]] = []
+    def handle_schema_change(self, sql: str, conn=None) -> None:
+        """
+        Invalidate what `sql` changed. Pass the connection that ran it so
+        unqualified names resolve against that session's search_path.
+        """
+        analysis = self.analyzer.analyze(sql)
+        if not analysis.is_schema_change:
+            return
 
-        for name in matches:
-            parts = name.split(".")
-            if len(parts) == 2:
-                schema, table = parts[0].lower(), parts[1].lower()
-            else:
-                schema, table = None, parts[0].lower()
-            results.append((schema, table))
+        search_path = DEFAULT_SEARCH_PATH
+        if conn is not None and analysis.needs_search_path:
+            search_path = self._search_path(conn) or DEFAULT_SEARCH_PATH
 
-        return results
+        self.apply_changes(analysis.resolve(search_path, self.cache.schemas_with_table))
 
-    def handle_schema_change(self, sql: str) -> None:
-        if not self.is_schema_change(sql):
+    async def ahandle_schema_change(self, sql: str, conn) -> None:
+        """handle_schema_change() for an AsyncConnection."""
+        analysis = self.analyzer.analyze(sql)
+        if not analysis.is_schema_change:
             return
 
-        affected = self.extract_affected_objects(sql)
+        search_path = DEFAULT_SEARCH_PATH
+        if analysis.needs_search_path:
+            try:
+                result = await conn.execute(text("SELECT current_schemas(false)"))
+                search_path = list(result.scalar() or []) or DEFAULT_SEARCH_PATH
+            except Exception as e:
+                self.logger.warning("Could not read search_path: %s", e)
+
+        self.apply_changes(analysis.resolve(search_path, self.cache.schemas_with_table))
+
+    def _search_path(self, conn) -> List[str]:
+        try:
+            return list(conn.execute(text("SELECT current_schemas(false)")).scalar() or [])
+        except Exception as e:
+            # An aborted transaction cannot answer; fall back to the default
+            self.logger.warning("Could not read search_path: %s", e)
+            return []
+
+    def apply_changes(self, affected: List[Tuple[Optional[str], Optional[str]]]) -> None:
+        """
+        Invalidate caches for the affected relations; empty means everything,
+        a None table the whole schema.
+        """
+        self._notify(affected)
 
         if not affected:
             self.cache.invalidate_all()
@@ -42,11 +92,13 @@ class SqlSchemaChangeMonitor:
             return
 
         for schema, table in affected:
-            if schema and table:
+            if schema and table is None:
+                self.cache.invalidate_schema(schema)
+                self.logger.info("Invalidated cache for schema %s", schema)
+            elif schema and table:
                 self.cache.invalidate_table(schema, table)
                 self.logger.info("Invalidated cache for %s.%s", schema, table)
             elif table:
-                for sch in list(self.cache.cache.keys()):
-                    if table in self.cache.cache.get(sch, {}):
-                        self.cache.invalidate_table(sch, table)
-                        self.logger.info("Invalidated cache for %s.%s", sch, table)
+                for sch in self.cache.schemas_with_table(table):
+                    self.cache.invalidate_table(sch, table)
+                    self.logger.info("Invalidated cache for %s.%s", sch, table)
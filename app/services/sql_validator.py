@@ -0,0 +1,138 @@
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, DBAPIError, ProgrammingError, SQLAlchemyError
+
+from app.core.logger import create_logger
+from app.core.metadata_cache_provider import metadata_cache
+from app.services.database_service import current_session
+from app.services.execution_policy import EXPLAINABLE, plan_estimate, statement_kind
+from app.utils.sql_lexer import has_multiple_statements
+
+SQL_VALIDATE_TIMEOUT_MS = int(os.getenv("SQL_VALIDATE_TIMEOUT_MS", "2000"))
+# Extra model steps allowed to fix SQL that fails validation
+SQL_VALIDATE_MAX_REPAIRS = int(os.getenv("SQL_VALIDATE_MAX_REPAIRS", "2"))
+# SQLSTATE classes that mean the statement itself is wrong: syntax error or
+# access rule violation (42), data exception (22)
+INVALID_SQL_STATE_CLASSES = ("42", "22")
+
+_TABLE_REF_RE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+((?:\"?\w+\"?\.)?\"?\w+\"?)", re.IGNORECASE
+)
+
+REPAIR_INSTRUCTION = (
+    "FINAL_SQL failed validation against the database. Fix it using the error "
+    "and the table metadata, then return FINAL_SQL again."
+)
+
+
+class SqlValidator:
+    """
+    Checks generated SQL with a plain EXPLAIN (never executed) in a read-only
+    transaction of the current session, and gathers the cached metadata of
+    the tables it references so the model can repair it without new tool
+    calls.
+    """
+
+    def __init__(self, timeout_ms: int = SQL_VALIDATE_TIMEOUT_MS):
+        self.logger = create_logger()
+        self.timeout_ms = timeout_ms
+
+    def validate(self, sql: str) -> Dict[str, Any]:
+        sql = (sql or "").strip().rstrip(";").strip()
+        started = time.time()
+
+        def outcome(valid: bool, error: Optional[str] = None, plan=None, skipped=False):
+            return {
+                "valid": valid,
+                "error": error,
+                "plan": plan,
+                "skipped": skipped,
+                "latency_ms": round((time.time() - started) * 1000, 2),
+            }
+
+        if not sql:
+            return outcome(False, "SQL is empty.")
+        # EXPLAIN would run anything after the first statement
+        if has_multiple_statements(sql):
+            return outcome(False, "Return a single SQL statement.")
+        if statement_kind(sql) not in EXPLAINABLE:
+            # DDL and utility statements cannot be explained
+            return outcome(True, skipped=True)
+
+        try:
+            with current_session().connection() as conn:
+                conn.execute(text("SET TRANSACTION READ ONLY"))
+                conn.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": str(self.timeout_ms)},
+                )
+                explain_json = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                conn.rollback()
+        except ValueError as e:
+            # No active connection: nothing to validate against
+            return outcome(True, str(e), skipped=True)
+        except DBAPIError as e:
+            error = str(e.orig).strip() if e.orig is not None else str(e)
+            if not self._is_invalid_sql(e):
+                # Connection loss, timeouts...: not something the model can repair
+                self.logger.warning("SQL validation skipped: %s", error)
+                return outcome(True, error, skipped=True)
+            self.logger.info("Generated SQL failed validation: %s", error)
+            return outcome(False, error)
+        except SQLAlchemyError as e:
+            # e.g. pool checkout timeout
+            self.logger.warning("SQL validation skipped: %s", e)
+            return outcome(True, str(e), skipped=True)
+
+        return outcome(True, plan=plan_estimate(explain_json))
+
+    def _is_invalid_sql(self, error: DBAPIError) -> bool:
+        if not isinstance(error, (ProgrammingError, DataError)):
+            return False
+        code = getattr(error.orig, "pgcode", None)
+        return code is None or code[:2] in INVALID_SQL_STATE_CLASSES
+
+    def related_metadata(self, sql: str) -> List[Dict[str, Any]]:
+        """Cached metadata of the tables named in `sql`; no database round-trip."""
+        tables = []
+        seen = set()
+
+        for ref in _TABLE_REF_RE.findall(sql or ""):
+            parts = [part.strip('"') for part in ref.split(".")]
+            table = parts[-1]
+            if len(parts) == 2:
+                schemas = [parts[0]]
+            else:
+                schemas = metadata_cache.schemas_with_table(table)
+
+            for schema in schemas:
+                if (schema, table) in seen:
+                    continue
+                seen.add((schema, table))
+
+                metadata = metadata_cache.get_table(schema, table)
+                if metadata is None:
+                    continue
+                tables.append(
+                    {
+                        "schema": schema,
+                        "table": table,
+                        "columns": [
+                            {"name": c.get("column_name"), "type": c.get("data_type")}
+                            for c in metadata.get("columns", [])
+                        ],
+                    }
+                )
+
+        return tables
+
+    def repair_feedback(self, sql: str, error: str) -> Dict[str, Any]:
+        return {
+            "error": error,
+            "tables": self.related_metadata(sql),
+            "instruction": REPAIR_INSTRUCTION,
+        }
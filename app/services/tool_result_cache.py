@@ -0,0 +1,182 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logger import create_logger
+
+TOOL_CACHE_TTL = int(os.getenv("TOOL_CACHE_TTL", "300"))
+# Per connection
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "2048"))
+
+# Default TTL per tool in seconds; 0 disables memoization for that tool.
+# Any of them can be overridden with TOOL_CACHE_TTL_<TOOL_NAME>.
+DEFAULT_TOOL_TTLS = {
+    "list_schemas": TOOL_CACHE_TTL * 2,
+    "list_tables": TOOL_CACHE_TTL,
+    "get_columns": TOOL_CACHE_TTL,
+    "get_primary_keys": TOOL_CACHE_TTL,
+    "get_foreign_keys": TOOL_CACHE_TTL,
+    "describe_schema": TOOL_CACHE_TTL,
+    # Row samples reflect data, not catalog state
+    "get_table_sample": 30,
+}
+
+
+class ToolResultCache:
+    """
+    Memoizes agent tool results per (connection, tool, arguments) with a TTL
+    per tool and an LRU budget per connection. Entries remember the
+    schema/table they were computed for, so a DDL statement only drops the
+    results it can have changed.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, int]] = None,
+        max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+    ):
+        self.logger = create_logger()
+        self.max_entries = max_entries
+
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        for tool in self.ttls:
+            override = os.getenv(f"TOOL_CACHE_TTL_{tool.upper()}")
+            if override is not None:
+                self.ttls[tool] = int(override)
+
+        # connection_key -> (tool, args) -> entry; each connection has its own LRU budget
+        self._namespaces: Dict[str, "OrderedDict[Tuple[str, str], Dict[str, Any]]"] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _make_key(self, tool: str, args: dict) -> Tuple[str, str]:
+        return (tool, json.dumps(args or {}, sort_keys=True, default=str))
+
+    def ttl_for(self, tool: str) -> int:
+        return self.ttls.get(tool, TOOL_CACHE_TTL)
+
+    def get(self, connection_key: Optional[str], tool: str, args: dict) -> Optional[Any]:
+        if self.ttl_for(tool) <= 0:
+            return None
+
+        key = self._make_key(tool, args)
+
+        with self._lock:
+            entries = self._namespaces.get(connection_key or "", {})
+            entry = entries.get(key)
+
+            if entry is None or time.time() > entry["expires_at"]:
+                if entry is not None:
+                    del entries[key]
+                self.misses += 1
+                return None
+
+            entries.move_to_end(key)
+            self.hits += 1
+            result = entry["result"]
+
+        self.logger.debug("Tool cache hit for %s %s", tool, args)
+        return copy.deepcopy(result)
+
+    def store(self, connection_key: Optional[str], tool: str, args: dict, result: Any) -> None:
+        ttl = self.ttl_for(tool)
+        if ttl <= 0:
+            return
+
+        args = args or {}
+        key = self._make_key(tool, args)
+
+        with self._lock:
+            entries = self._namespaces.setdefault(connection_key or "", OrderedDict())
+            entries[key] = {
+                "result": copy.deepcopy(result),
+                "expires_at": time.time() + ttl,
+                "schema": args.get("schema"),
+                "table": args.get("table"),
+            }
+            entries.move_to_end(key)
+
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def _drop(self, connection_key: Optional[str], predicate) -> int:
+        """Drop matching entries of one connection, or of all when connection_key is None."""
+        dropped = 0
+        with self._lock:
+            for conn, entries in self._namespaces.items():
+                if connection_key is not None and conn != connection_key:
+                    continue
+                keys = [k for k, e in entries.items() if predicate(e)]
+                for key in keys:
+                    del entries[key]
+                dropped += len(keys)
+        return dropped
+
+    def invalidate_table(
+        self, schema: Optional[str], table: str, connection_key: Optional[str] = None
+    ) -> None:
+        """Drop results about the table plus the schema-wide listings that include it."""
+
+        def affected(entry):
+            if schema is not None and entry["schema"] not in (None, schema):
+                return False
+            if entry["table"] is None:
+                # list_tables / describe_schema, never list_schemas
+                return entry["schema"] is not None
+            return entry["table"] == table
+
+        dropped = self._drop(connection_key, affected)
+        self.logger.info("Invalidated %d tool results for %s.%s", dropped, schema, table)
+
+    def invalidate_schema(self, schema: str, connection_key: Optional[str] = None) -> None:
+        dropped = self._drop(connection_key, lambda entry: entry["schema"] in (None, schema))
+        self.logger.info("Invalidated %d tool results for schema %s", dropped, schema)
+
+    def invalidate_all(self, connection_key: Optional[str] = None) -> None:
+        with self._lock:
+            if connection_key is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(connection_key, None)
+
+        self.logger.warning("Invalidated tool result cache (connection=%s)", connection_key)
+
+    def on_schema_change(
+        self, affected: List[Tuple[Optional[str], Optional[str]]], connection_key: Optional[str] = None
+    ) -> None:
+        if not affected:
+            self.invalidate_all(connection_key)
+            return
+
+        for schema, table in affected:
+            if table is None:
+                self.invalidate_schema(schema, connection_key)
+            else:
+                self.invalidate_table(schema, table, connection_key)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            connections = {}
+            for conn, entries in self._namespaces.items():
+                per_tool: Dict[str, int] = {}
+                for (tool, _) in entries:
+                    per_tool[tool] = per_tool.get(tool, 0) + 1
+                connections[conn] = {"entries": len(entries), "entries_per_tool": per_tool}
+
+            return {
+                "ttls": self.ttls,
+                "max_entries_per_connection": self.max_entries,
+                "entries": sum(c["entries"] for c in connections.values()),
+                "connections": connections,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
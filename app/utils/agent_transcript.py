@@ -0,0 +1,94 @@
+import json
+import os
+
+# Per-result and whole-transcript limits (tokens estimated as chars / 4)
+TRANSCRIPT_MAX_RESULT_CHARS = int(os.getenv("TRANSCRIPT_MAX_RESULT_CHARS", "4000"))
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "6000"))
+
+CHARS_PER_TOKEN = 4
+
+NEXT_STEP_HINT = "Reply with the next TOOL_CALL or FINAL_SQL as a single JSON block."
+
+
+def _compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class AgentTranscript:
+    """
+    Compacted history of every tool call and result of one agent run, replayed
+    to the model as chat turns. Large results are truncated, and once the
+    token budget is exceeded the oldest results are replaced by a short stub.
+    Turns are only ever appended or stubbed, so the chat prefix stays stable
+    for the backend's KV cache until the budget forces compaction.
+    """
+
+    def __init__(
+        self,
+        max_result_chars: int = TRANSCRIPT_MAX_RESULT_CHARS,
+        token_budget: int = TRANSCRIPT_TOKEN_BUDGET,
+    ):
+        self.max_result_chars = max_result_chars
+        self.token_budget = token_budget
+        self.turns: list[dict] = []
+
+    def _result_json(self, result) -> str:
+        result_json = _compact(result)
+        if len(result_json) > self.max_result_chars:
+            result_json = (
+                result_json[: self.max_result_chars]
+                + f"...[truncated {len(result_json) - self.max_result_chars} chars]"
+            )
+        return result_json
+
+    def add(self, name: str, args: dict, result) -> None:
+        self.turns.append(
+            {
+                "call": f"TOOL_CALL {_compact({'name': name, 'arguments': args})}",
+                "result": f"TOOL_RESULT {name}:\n{self._result_json(result)}",
+                "name": name,
+                "compacted": False,
+            }
+        )
+        self._enforce_budget()
+
+    def add_many(self, calls: list[tuple[str, dict]], results: list) -> None:
+        """One turn for a TOOL_CALL array, with a TOOL_RESULT per call."""
+        self.turns.append(
+            {
+                "call": "TOOL_CALL "
+                + _compact([{"name": name, "arguments": args} for name, args in calls]),
+                "result": "\n\n".join(
+                    f"TOOL_RESULT {name}:\n{self._result_json(result)}"
+                    for (name, _), result in zip(calls, results)
+                ),
+                "name": ", ".join(name for name, _ in calls),
+                "compacted": False,
+            }
+        )
+        self._enforce_budget()
+
+    def estimated_tokens(self) -> int:
+        chars = sum(len(t["call"]) + len(t["result"]) for t in self.turns)
+        return chars // CHARS_PER_TOKEN
+
+    def _enforce_budget(self) -> None:
+        # Never stub the newest result: the model needs it for the next step
+        for turn in self.turns[:-1]:
+            if self.estimated_tokens() <= self.token_budget:
+                return
+            if not turn["compacted"]:
+                turn["result"] = (
+                    f"TOOL_RESULT {turn['name']}: [omitted to save context, "
+                    f"already seen earlier]"
+                )
+                turn["compacted"] = True
+
+    def to_messages(self) -> list[dict]:
+        messages = []
+        for turn in self.turns:
+            messages.append({"role": "assistant", "content": turn["call"]})
+            messages.append(
+                {"role": "user", "content": f"{turn['result']}\n\n{NEXT_STEP_HINT}"}
+            )
+        return messages
@@ -13,8 +13,8 @@ class JSONParser:
         return text.strip()
 
     def extract_block(self, text: str, marker: str):
-        # FIX: allow TOOL_CALL     {
-        pattern = rf"{marker}\s*{{"
+        # FIX: allow TOOL_CALL     {  (or [ for several tool calls)
+        pattern = rf"{marker}\s*[{{\[]"
         match = re.search(pattern, text)
         if not match:
             return None
@@ -49,6 +49,45 @@ class JSONParser:
         except:
             return None
 
+    def parse_tool_calls(self, text: str):
+        """
+        Tool calls in a TOOL_CALL payload: one {"name": ..., "arguments": ...}
+        object or an array of them. Returns a list, or None if none is usable.
+        """
+        text = text.replace("```json", "").replace("```", "").strip()
+
+        if text.startswith("["):
+            parsed = self._parse_array(text)
+        else:
+            parsed = self.safe_parse(text)
+
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        if not isinstance(parsed, list):
+            return None
+
+        calls = [call for call in parsed if isinstance(call, dict) and "name" in call]
+        return calls or None
+
+    def _parse_array(self, text: str):
+        """JSON array at the start of text; anything after its closing `]` is ignored."""
+        text = text.replace('\\"', '"')
+        text = re.sub(r"//.*", "", text)
+        decoder = json.JSONDecoder()
+
+        try:
+            return decoder.raw_decode(text)[0]
+        except ValueError:
+            pass
+
+        repaired = re.sub(r",\s*}", "}", text)
+        repaired = re.sub(r",\s*]", "]", repaired)
+
+        try:
+            return decoder.raw_decode(repaired)[0]
+        except ValueError:
+            return None
+
     def parse_final_sql(self, text: str):
 
         parsed = self.safe_parse(text)
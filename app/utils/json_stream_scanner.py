@@ -0,0 +1,79 @@
+import json
+
+
+class IncrementalJSONScanner:
+    """
+    Consumes streamed model output chunk by chunk and reports as soon as a
+    complete, parseable JSON block (TOOL_CALL / FINAL_SQL payload) has arrived.
+
+    Brackets are balanced incrementally and string literals are tracked, so
+    braces inside SQL strings or explanations do not confuse the depth count.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.block: str | None = None
+
+        self._pos = 0
+        self._depth = 0
+        self._start: int | None = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> bool:
+        """Append a chunk; return True once a complete block has been seen."""
+        if self.block is not None:
+            return True
+
+        self.buffer += chunk
+        text = self.buffer
+
+        while self._pos < len(text):
+            ch = text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+
+            elif self._start is None:
+                if ch in "{[":
+                    self._start = self._pos
+                    self._depth = 1
+
+            elif ch == '"':
+                self._in_string = True
+
+            elif ch in "{[":
+                self._depth += 1
+
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = text[self._start : self._pos + 1]
+                    self._start = None
+                    if self._is_agent_block(candidate):
+                        self.block = candidate
+                        self._pos += 1
+                        return True
+
+            self._pos += 1
+
+        return False
+
+    def _is_agent_block(self, candidate: str) -> bool:
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            return False
+
+        if isinstance(parsed, list):
+            # Several tool calls in one TOOL_CALL block
+            return bool(parsed) and all(
+                isinstance(call, dict) and "name" in call for call in parsed
+            )
+
+        return isinstance(parsed, dict) and ("name" in parsed or "sql" in parsed)
@@ -1,23 +1,87 @@
 import json
+import threading
+from collections import OrderedDict
+from app.common.system_prompt import SCHEMA_PRIMED_RULES, SCHEMA_RANKED_RULES
 from app.core.logger import create_logger
 
+# Static prefixes kept in memory (one per model/system prompt/context/digest)
+PREFIX_CACHE_SIZE = 64
+
+OUTPUT_RULES = """Follow strictly the TOOL_CALL and FINAL_SQL JSON formats defined in the system prompt.
+TOOL_CALL may hold an array of independent tool calls; they run in parallel.
+Do not output markdown or any text outside a single JSON block."""
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
 
 class PromptBuilder:
+    """
+    Builds agent prompts as a static prefix (system prompt, context, schema
+    digest, tool catalogue) followed by the per-step delta (state and last
+    tool result). The prefix is byte-identical across steps, so the model
+    backend can reuse its KV cache for it and only evaluate the delta.
+    """
+
     def __init__(self, tools):
         self.logger = create_logger()
         self.tools = tools
 
-    def build(
+        # CHANGE: tool catalogue serialized once, minified
+        self.tools_json = compact_json({"tools": self.tools})
+
+        self._prefixes: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build_prefix(
         self,
+        model_name: str,
         system_prompt: str,
         context: str,
+        schema_digest: str | None = None,
+        schema_digest_partial: bool = False,
+    ) -> str:
+        key = (model_name, system_prompt, context, schema_digest, schema_digest_partial)
+
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix is not None:
+                self._prefixes.move_to_end(key)
+                return prefix
+
+        digest_section = ""
+        if schema_digest:
+            rules = SCHEMA_RANKED_RULES if schema_digest_partial else SCHEMA_PRIMED_RULES
+            digest_section = f"""{rules}
+SCHEMA_DIGEST:
+{schema_digest}
+"""
+
+        prefix = f"""{system_prompt}
+
+CONTEXT:
+{context}
+{digest_section}
+TOOLS:
+{self.tools_json}
+"""
+
+        with self._lock:
+            self._prefixes[key] = prefix
+            if len(self._prefixes) > PREFIX_CACHE_SIZE:
+                self._prefixes.popitem(last=False)
+
+        return prefix
+
+    def build_delta(
+        self,
         user_input: str,
         last_tool_result: dict | None,
         step: int,
         last_tool_name: str | None,
     ) -> str:
-        """CHANGE: prompt now encodes state and last tool result in JSON-friendly form."""
-
+        """Per-step part of the prompt: question, compact state, last tool result."""
         state = {
             "step": step,
             "last_tool_name": last_tool_name,
@@ -25,27 +89,79 @@ class PromptBuilder:
         }
 
         if last_tool_result is not None:
-            last_result_json = json.dumps(last_tool_result)
+            last_result_json = compact_json(last_tool_result)
         else:
             last_result_json = "null"
 
-        return f"""{system_prompt}
-
-CONTEXT:
-{context}
-
-TOOLS:
-{json.dumps({"tools": self.tools}, indent=2)}
+        return f"""USER_INPUT:
+{user_input}
 
 STATE:
-{json.dumps(state, indent=2)}
+{compact_json(state)}
 
 LAST_TOOL_RESULT_JSON:
 {last_result_json}
 
-USER_INPUT:
-{user_input}
-
-Follow strictly the TOOL_CALL and FINAL_SQL JSON formats defined in the system prompt.
-Do not output markdown or any text outside a single JSON object.
+{OUTPUT_RULES}
 """
+
+    def build(
+        self,
+        system_prompt: str,
+        context: str,
+        user_input: str,
+        last_tool_result: dict | None,
+        step: int,
+        last_tool_name: str | None,
+        schema_digest: str | None = None,
+        schema_digest_partial: bool = False,
+        model_name: str = "",
+    ) -> str:
+        """CHANGE: prompt now encodes state and last tool result in JSON-friendly form."""
+        prefix = self.build_prefix(
+            model_name, system_prompt, context, schema_digest, schema_digest_partial
+        )
+        delta = self.build_delta(user_input, last_tool_result, step, last_tool_name)
+        return f"{prefix}\n{delta}"
+
+    def build_messages(
+        self,
+        system_prompt: str,
+        context: str,
+        user_input: str,
+        last_tool_result: dict | None,
+        step: int,
+        last_tool_name: str | None,
+        schema_digest: str | None = None,
+        schema_digest_partial: bool = False,
+        model_name: str = "",
+    ) -> list[dict]:
+        """Chat form: the cached prefix as system message, the delta as user message."""
+        prefix = self.build_prefix(
+            model_name, system_prompt, context, schema_digest, schema_digest_partial
+        )
+        delta = self.build_delta(user_input, last_tool_result, step, last_tool_name)
+        return [
+            {"role": "system", "content": prefix},
+            {"role": "user", "content": delta},
+        ]
+
+    def build_transcript_messages(
+        self,
+        system_prompt: str,
+        context: str,
+        user_input: str,
+        transcript,
+        schema_digest: str | None = None,
+        schema_digest_partial: bool = False,
+        model_name: str = "",
+    ) -> list[dict]:
+        """Chat form replaying every tool call/result of the run (see AgentTranscript)."""
+        prefix = self.build_prefix(
+            model_name, system_prompt, context, schema_digest, schema_digest_partial
+        )
+        return [
+            {"role": "system", "content": prefix},
+            {"role": "user", "content": f"USER_INPUT:\n{user_input}\n\n{OUTPUT_RULES}\n"},
+            *transcript.to_messages(),
+        ]
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import os
+from typing import Iterable, Iterator, Optional, Sequence
+
+# Upper bounds of a streamed result; requests may only lower them
+EXECUTE_STREAM_MAX_ROWS = int(os.getenv("EXECUTE_STREAM_MAX_ROWS", "1000000"))
+EXECUTE_STREAM_MAX_BYTES = int(os.getenv("EXECUTE_STREAM_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def clamp_limit(requested: Optional[int], ceiling: int) -> int:
+    return ceiling if requested is None else min(requested, ceiling)
+
+
+class StreamLimits:
+    """Counts rows and bytes of a stream and tells when a cap is reached."""
+
+    def __init__(self, max_rows: int, max_bytes: int):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+        self.truncated: Optional[str] = None
+
+    def admit(self, chunk: bytes) -> bool:
+        if self.rows >= self.max_rows:
+            self.truncated = "max_rows"
+            return False
+        if self.bytes + len(chunk) > self.max_bytes:
+            self.truncated = "max_bytes"
+            return False
+        self.rows += 1
+        self.bytes += len(chunk)
+        return True
+
+    def summary(self) -> dict:
+        return {"rows": self.rows, "bytes": self.bytes, "truncated": self.truncated}
+
+
+def _rows(batches: Iterable[Sequence], limits: StreamLimits, encode) -> Iterator[bytes]:
+    """
+    Encoded rows, one chunk per batch (each chunk is a thread hop in the
+    response), until the batches end or a limit is hit; closes `batches`.
+    """
+    try:
+        for batch in batches:
+            chunks = []
+            for row in batch:
+                chunk = encode(row)
+                if not limits.admit(chunk):
+                    yield b"".join(chunks)
+                    return
+                chunks.append(chunk)
+            yield b"".join(chunks)
+    finally:
+        close = getattr(batches, "close", None)
+        if close is not None:
+            close()
+
+
+def stream_ndjson(
+    columns: list, batches: Iterable[Sequence], limits: StreamLimits
+) -> Iterator[bytes]:
+    """
+    One JSON object per line: {"columns": [...]}, then one object per row,
+    then {"summary": {"rows", "bytes", "truncated"}}.
+    """
+    yield (json.dumps({"columns": columns}) + "\n").encode("utf-8")
+
+    def encode(row) -> bytes:
+        line = json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str)
+        return (line + "\n").encode("utf-8")
+
+    yield from _rows(batches, limits, encode)
+    yield (json.dumps({"summary": limits.summary()}) + "\n").encode("utf-8")
+
+
+def stream_csv(
+    columns: list, batches: Iterable[Sequence], limits: StreamLimits
+) -> Iterator[bytes]:
+    """Header line plus one CSV line per row; stops silently at a limit."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values) -> bytes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    yield line(columns)
+    yield from _rows(batches, limits, line)
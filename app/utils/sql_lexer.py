@@ -0,0 +1,183 @@
+import re
+from typing import List, NamedTuple
+
+
+class Token(NamedTuple):
+    # "word" (keyword or unquoted identifier), "ident" (quoted identifier),
+    # "string", "number", "param" or "punct"
+    kind: str
+    value: str
+
+    def is_word(self, *words: str) -> bool:
+        return self.kind == "word" and self.value.lower() in words
+
+    @property
+    def name(self) -> str:
+        """Identifier as Postgres folds it: unquoted lowercased, quoted verbatim."""
+        return self.value.lower() if self.kind == "word" else self.value
+
+
+_WORD_RE = re.compile(r"[A-Za-z_\u0080-\uffff][A-Za-z0-9_$\u0080-\uffff]*")
+_NUMBER_RE = re.compile(r"(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_DOLLAR_TAG_RE = re.compile(r"\$(?:[A-Za-z_\u0080-\uffff][A-Za-z0-9_\u0080-\uffff]*)?\$")
+_PARAM_RE = re.compile(r"\$\d+")
+
+
+class SqlLexer:
+    """
+    Tokenizer for PostgreSQL scripts. Understands line and (nested) block
+    comments, standard and E'' strings, quoted and U&"" identifiers and
+    dollar quoting, so keywords and semicolons inside them are never seen as
+    SQL. Unterminated literals run to the end of the input.
+    """
+
+    def tokenize(self, sql: str) -> List[Token]:
+        tokens: List[Token] = []
+        i, n = 0, len(sql)
+
+        while i < n:
+            ch = sql[i]
+
+            if ch.isspace():
+                i += 1
+                continue
+
+            if sql.startswith("--", i):
+                end = sql.find("\n", i)
+                i = n if end == -1 else end + 1
+                continue
+
+            if sql.startswith("/*", i):
+                i = self._skip_block_comment(sql, i)
+                continue
+
+            if ch == "'":
+                end = self._quoted_end(sql, i, "'")
+                tokens.append(Token("string", sql[i + 1 : end - 1].replace("''", "'")))
+                i = end
+                continue
+
+            if ch in "eE" and sql.startswith("'", i + 1):
+                end = self._escape_string_end(sql, i + 1)
+                tokens.append(Token("string", sql[i + 2 : end - 1]))
+                i = end
+                continue
+
+            if ch == '"' or (ch in "uU" and sql.startswith('&"', i + 1)):
+                start = i if ch == '"' else i + 2
+                end = self._quoted_end(sql, start, '"')
+                tokens.append(Token("ident", sql[start + 1 : end - 1].replace('""', '"')))
+                i = end
+                continue
+
+            if ch == "$":
+                tag = _DOLLAR_TAG_RE.match(sql, i)
+                if tag:
+                    close = sql.find(tag.group(0), tag.end())
+                    end = n if close == -1 else close + len(tag.group(0))
+                    tokens.append(Token("string", sql[tag.end() : close if close != -1 else n]))
+                    i = end
+                    continue
+                param = _PARAM_RE.match(sql, i)
+                if param:
+                    tokens.append(Token("param", param.group(0)))
+                    i = param.end()
+                    continue
+
+            word = _WORD_RE.match(sql, i)
+            if word:
+                tokens.append(Token("word", word.group(0)))
+                i = word.end()
+                continue
+
+            number = _NUMBER_RE.match(sql, i)
+            if number:
+                tokens.append(Token("number", number.group(0)))
+                i = number.end()
+                continue
+
+            if sql.startswith("::", i):
+                tokens.append(Token("punct", "::"))
+                i += 2
+                continue
+
+            tokens.append(Token("punct", ch))
+            i += 1
+
+        return tokens
+
+    def split_statements(self, sql: str) -> List[List[Token]]:
+        """Tokens of each non-empty statement of a `;`-separated script."""
+        statements: List[List[Token]] = []
+        current: List[Token] = []
+        # BEGIN ATOMIC ... END bodies of SQL functions contain semicolons
+        atomic_depth = 0
+
+        for token in self.tokenize(sql):
+            if token.kind == "punct" and token.value == ";" and atomic_depth == 0:
+                if current:
+                    statements.append(current)
+                current = []
+                continue
+
+            if token.is_word("atomic") and current and current[-1].is_word("begin"):
+                atomic_depth += 1
+            elif atomic_depth and token.is_word("case"):
+                atomic_depth += 1
+            elif atomic_depth and token.is_word("end"):
+                atomic_depth -= 1
+
+            current.append(token)
+
+        if current:
+            statements.append(current)
+        return statements
+
+    def _skip_block_comment(self, sql: str, i: int) -> int:
+        depth = 0
+        n = len(sql)
+        while i < n:
+            if sql.startswith("/*", i):
+                depth += 1
+                i += 2
+            elif sql.startswith("*/", i):
+                depth -= 1
+                i += 2
+                if depth == 0:
+                    return i
+            else:
+                i += 1
+        return n
+
+    def _quoted_end(self, sql: str, i: int, quote: str) -> int:
+        """Index after the closing quote; a doubled quote is an escaped one."""
+        n = len(sql)
+        j = i + 1
+        while j < n:
+            if sql[j] == quote:
+                if j + 1 < n and sql[j + 1] == quote:
+                    j += 2
+                    continue
+                return j + 1
+            j += 1
+        return n
+
+    def _escape_string_end(self, sql: str, i: int) -> int:
+        n = len(sql)
+        j = i + 1
+        while j < n:
+            if sql[j] == "\\":
+                j += 2
+                continue
+            if sql[j] == "'":
+                if j + 1 < n and sql[j + 1] == "'":
+                    j += 2
+                    continue
+                return j + 1
+            j += 1
+        return n
+
+
+def has_multiple_statements(sql: str) -> bool:
+    """True when a `;` outside quotes, dollar quotes and comments separates statements."""
+    return len(SqlLexer().split_statements(sql)) > 1
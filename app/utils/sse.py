@@ -0,0 +1,7 @@
+import json
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Serialize one Server-Sent Events frame."""
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
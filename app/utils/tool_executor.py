@@ -1,26 +1,43 @@
+import asyncio
+import time
 from app.services.schema_service import SchemaService
-from app.services.database_service import db_session
+from app.services.database_service import current_session
 from app.core.logger import create_logger
 from app.core.metadata_cache_provider import metadata_cache
+from app.core.tool_result_cache_provider import tool_result_cache
+
+# Tool name -> (SchemaService method, its async variant, tool arguments it takes)
+CATALOG_TOOLS = {
+    "list_schemas": ("get_schemas", "aget_schemas", ()),
+    "list_tables": ("get_table_names", "aget_table_names", ("schema",)),
+    "get_columns": ("get_table_columns", "aget_table_columns", ("schema", "table")),
+    "get_primary_keys": ("get_primary_keys", "aget_primary_keys", ("schema", "table")),
+    "get_foreign_keys": ("get_foreign_keys", "aget_foreign_keys", ("schema", "table")),
+    "describe_table": ("describe_table", "adescribe_table", ("schema", "table")),
+    "describe_schema": ("describe_schema", "adescribe_schema", ("schema",)),
+    "get_table_sample": ("get_table_sample", "aget_table_sample", ("schema", "table", "limit")),
+}
+PARAMETER_NAMES = {"schema": "schema_name", "table": "table_name", "limit": "limit"}
 
 
 class ToolExecutor:
     def __init__(self):
         self.logger = create_logger()
         self.schema = SchemaService()
-        self.db = db_session
+
+    @property
+    def db(self):
+        # Session of the current request, see use_session
+        return current_session()
 
     def ensure_services(self):
         if self.schema is None:
             self.schema = SchemaService()
 
-        if self.db is None:
-            self.db = db_session
-
         if not self.db.is_connected():
             raise ValueError("No active database connection")
 
-    def execute(self, name: str, args: dict):
+    def _normalize_args(self, args: dict) -> dict:
         args = args or {}
 
         if "schema" in args and isinstance(args["schema"], str):
@@ -29,26 +46,188 @@ class ToolExecutor:
         if "table" in args and isinstance(args["table"], str):
             args["table"] = args["table"].strip().lower()
 
-        # Cache-aware describe_table
+        if "tables" in args and isinstance(args["tables"], list):
+            args["tables"] = [
+                t.strip().lower() for t in args["tables"] if isinstance(t, str) and t.strip()
+            ]
+
+        return args
+
+    def execute(self, name: str, args: dict):
+        """Synchronous counterpart of aexecute, on the sync engine; same caches."""
+        args = self._normalize_args(args)
+
+        if name not in CATALOG_TOOLS:
+            raise ValueError(f"Unknown tool: {name}")
+        loader = self._loader(name)
+
         if name == "describe_table":
-            return self._cached_describe_table(args)
-
-        dispatch = {
-            "list_schemas": lambda: self.schema.get_schemas(),
-            "list_tables": lambda: self.schema.get_table_names(args.get("schema")),
-            "get_columns": lambda: self.schema.get_table_columns(
-                table_name=args.get("table"),
-                schema_name=args.get("schema"),
-            ),
-        }
+            if isinstance(args.get("tables"), list):
+                return {
+                    table: self._cached_describe_table({**args, "table": table}, loader)
+                    for table in args["tables"]
+                }
+            return self._cached_describe_table(args, loader)
+
+        if name == "describe_schema":
+            return self._memoized(name, args, lambda args: self._describe_schema(args, loader))
+
+        return self._memoized(name, args, loader)
+
+    async def aexecute(self, name: str, args: dict):
+        """
+        Run a tool without blocking the event loop: natively on the async
+        engine when available, else in a worker thread. The tables of a
+        multi-table describe_table are looked up concurrently.
+        """
+        args = self._normalize_args(args)
 
-        if name not in dispatch:
+        if name not in CATALOG_TOOLS:
             raise ValueError(f"Unknown tool: {name}")
+        loader = self._aloader(name)
+
+        # Cache-aware describe_table; "tables" describes several at once
+        if name == "describe_table":
+            if isinstance(args.get("tables"), list):
+                tables = args["tables"]
+                results = await asyncio.gather(
+                    *(
+                        self._acached_describe_table({**args, "table": table}, loader)
+                        for table in tables
+                    )
+                )
+                return dict(zip(tables, results))
+            return await self._acached_describe_table(args, loader)
+
+        if name == "describe_schema":
+            return await self._amemoized(
+                name, args, lambda args: self._adescribe_schema(args, loader)
+            )
+
+        return await self._amemoized(name, args, loader)
+
+    def _loader(self, name: str):
+        """SchemaService call of a tool, taking the normalized tool args."""
+        method_name, _, params = CATALOG_TOOLS[name]
+        return self._bind(method_name, params)
+
+    def _aloader(self, name: str):
+        """Awaitable variant of _loader: the async method, else the sync one in a thread."""
+        if not self.db.async_enabled:
+            load = self._loader(name)
+            return lambda args: asyncio.to_thread(load, args)
+
+        _, method_name, params = CATALOG_TOOLS[name]
+        return self._bind(method_name, params)
+
+    def _bind(self, method_name: str, params: tuple):
+        method = getattr(self.schema, method_name)
+        return lambda args: method(**{PARAMETER_NAMES[p]: args.get(p) for p in params})
+
+    def execute_many(self, calls: list[tuple[str, dict]]) -> list:
+        """Synchronous counterpart of aexecute_many; the calls run one after another."""
+        outcomes = []
+        for name, args in calls:
+            try:
+                outcomes.append(self.execute(name, args))
+            except Exception as e:
+                outcomes.append(e)
+        return self._collect_results(calls, outcomes)
+
+    async def aexecute_many(self, calls: list[tuple[str, dict]]) -> list:
+        """
+        Run several tools concurrently; results come back in call order. A
+        failed call yields {"error": ...} in its place so the model can retry
+        just that one; when every call fails the first error is raised.
+        """
+        outcomes = await asyncio.gather(
+            *(self.aexecute(name, args) for name, args in calls), return_exceptions=True
+        )
+
+        # Cancellation is never turned into a result
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+                raise outcome
+        return self._collect_results(calls, outcomes)
+
+    def _collect_results(self, calls: list[tuple[str, dict]], outcomes: list) -> list:
+        failures = [o for o in outcomes if isinstance(o, Exception)]
+        if failures and len(failures) == len(outcomes):
+            raise failures[0]
+
+        results = []
+        for (name, _), outcome in zip(calls, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.warning("Tool %s failed: %s", name, outcome)
+                outcome = {"error": str(outcome)}
+            results.append(outcome)
+        return results
 
-        return dispatch[name]()
+    # Catalog tools are memoized per connection; describe_table keeps its own metadata_cache
+    def _memoized(self, name: str, args: dict, loader):
+        connection_key = self.db.connection_key
+
+        cached = tool_result_cache.get(connection_key, name, args)
+        if cached is not None:
+            return cached
+
+        result = loader(args)
+        tool_result_cache.store(connection_key, name, args, result)
+        return result
+
+    async def _amemoized(self, name: str, args: dict, loader):
+        connection_key = self.db.connection_key
+
+        cached = tool_result_cache.get(connection_key, name, args)
+        if cached is not None:
+            return cached
+
+        result = await loader(args)
+        tool_result_cache.store(connection_key, name, args, result)
+        return result
+
+    def _describe_schema(self, args: dict, loader):
+        started = time.time()
+        return self._store_schema(args.get("schema"), loader(args), started)
+
+    async def _adescribe_schema(self, args: dict, loader):
+        started = time.time()
+        return self._store_schema(args.get("schema"), await loader(args), started)
+
+    def _store_schema(self, schema: str, tables: dict, started: float) -> dict:
+        # Same shape as describe_table, so later describe_table calls hit the cache
+        metadata_cache.store_many(
+            {
+                (schema, table): {
+                    "columns": desc["columns"],
+                    "primary_keys": desc["primary_keys"],
+                    "foreign_keys": desc["foreign_keys"],
+                }
+                for table, desc in tables.items()
+            },
+            load_ms=(time.time() - started) * 1000,
+        )
+        return tables
 
     # Uses cache to avoid schema queries
-    def _cached_describe_table(self, args: dict):
+    def _cached_describe_table(self, args: dict, loader):
+        cached = self._cached_table(args)
+        if cached:
+            return cached
+
+        # CHANGE: one catalog round-trip instead of columns + PKs + FKs
+        started = time.time()
+        return self._store_table(args, loader(args), started)
+
+    async def _acached_describe_table(self, args: dict, loader):
+        cached = self._cached_table(args)
+        if cached:
+            return cached
+
+        started = time.time()
+        return self._store_table(args, await loader(args), started)
+
+    def _cached_table(self, args: dict):
         schema = args.get("schema")
         table = args.get("table")
 
@@ -60,32 +239,22 @@ class ToolExecutor:
             return cached
 
         self.logger.info("Fetching fresh metadata for %s.%s", schema, table)
+        return None
 
-        # FIX: correct argument order
-        columns = self.schema.get_table_columns(
-            table_name=table,
-            schema_name=schema
-        )
-
-        pks = self.schema.get_primary_keys(
-            schema_name=schema,
-            table_name=table
-        )
-
-        fks = self.schema.get_foreign_keys(
-            schema_name=schema,
-            table_name=table
-        )
+    def _store_table(self, args: dict, desc: dict, started: float) -> dict:
+        schema = args.get("schema")
+        table = args.get("table")
 
         metadata = {
-            "columns": columns,
-            "primary_keys": pks,
-            "foreign_keys": fks,
+            "columns": desc["columns"],
+            "primary_keys": desc["primary_keys"],
+            "foreign_keys": desc["foreign_keys"],
         }
 
-        metadata_cache.store_table(schema, table, metadata)
+        metadata_cache.store_table(
+            schema, table, metadata, load_ms=(time.time() - started) * 1000
+        )
 
         self.logger.info("Stored fresh metadata for %s.%s", schema, table)
 
         return metadata
-
@@ -6,17 +6,23 @@ import type { NormalizedTable } from "../../types/cache.types";
 export interface CacheSchemaBlockProps {
     schema: string;
     tables: NormalizedTable[];
+    totalTables: number;
+    size: string;
     onClearSchema: (schema: string) => void;
     onClearTable: (schema: string, table: string) => void;
     onRefreshTable: (schema: string, table: string) => void;
+    onLoadMore: (schema: string) => void;
 }
 
 export default function CacheSchemaBlock({
     schema,
     tables,
+    totalTables,
+    size,
     onClearSchema,
     onClearTable,
-    onRefreshTable
+    onRefreshTable,
+    onLoadMore
 }: CacheSchemaBlockProps) {
     return (
         <div className="bg-white rounded-lg border border-gray-200 overflow-hidden">
@@ -26,7 +32,7 @@ export default function CacheSchemaBlock({
                     <Database />
                     <div>
                         <h3 className="text-lg font-semibold text-gray-900">{schema}</h3>
-                        <p className="text-sm text-gray-600">{tables.length} tables</p>
+                        <p className="text-sm text-gray-600">{totalTables} tables, {size}</p>
                     </div>
                 </div>
 
@@ -50,6 +56,17 @@ export default function CacheSchemaBlock({
                 ))}
             </div>
 
+            {tables.length < totalTables && (
+                <div className="border-t border-gray-200 px-6 py-3">
+                    <button
+                        onClick={() => onLoadMore(schema)}
+                        className="text-sm font-medium text-blue-600 hover:text-blue-700"
+                    >
+                        Show more ({totalTables - tables.length} remaining)
+                    </button>
+                </div>
+            )}
+
         </div>
     );
 }
@@ -1,17 +1,30 @@
 import { useEffect, useState } from "react";
 import {
     fetchCache,
+    fetchSchemaTables,
     invalidateAllCache,
     invalidateSchema,
     invalidateTable
 } from "../lib/api/cache";
 
 import CacheSchemaBlock from "../components/cache/CacheSchemaBlock";
-import type { NormalizedTable, RawCacheResponse } from "../types/cache.types";
+import type {
+    NormalizedSchema,
+    NormalizedTable,
+    RawCacheResponse,
+    RawSchemaTablesResponse
+} from "../types/cache.types";
 import "../styles/global.css"
 
+// Tables requested per schema page
+const PAGE_SIZE = 50;
+
+function formatSize(bytes: number): string {
+    return `${(bytes / 1024).toFixed(1)} KB`;
+}
+
 export default function CacheManager() {
-    const [cache, setCache] = useState<Record<string, NormalizedTable[]>>({});
+    const [cache, setCache] = useState<Record<string, NormalizedSchema>>({});
     const [loading, setLoading] = useState(true);
 
     const [stats, setStats] = useState({
@@ -20,47 +33,72 @@ export default function CacheManager() {
         schemasCount: 0
     });
 
-    function normalize(raw: RawCacheResponse): Record<string, NormalizedTable[]> {
-        const result: Record<string, NormalizedTable[]> = {};
-
-        for (const schemaName in raw.schemas) {
-            const tablesObj = raw.schemas[schemaName];
-            result[schemaName] = [];
-
-            for (const tableName in tablesObj) {
-                const table = tablesObj[tableName];
-
-                result[schemaName].push({
-                    schema: schemaName,
-                    table: tableName,
-                    cachedAt: new Date(table.cached_at * 1000).toLocaleString(),
-                    expiresIn: table.expires_in,
-                    columns: table.metadata.columns.length,
-                    rows: 0,
-                    size: "--"
-                });
-            }
+    function normalizeTables(raw: RawSchemaTablesResponse): NormalizedTable[] {
+        const result: NormalizedTable[] = [];
+
+        for (const tableName in raw.tables) {
+            const table = raw.tables[tableName];
+
+            result.push({
+                schema: raw.schema,
+                table: tableName,
+                cachedAt: new Date(table.cached_at * 1000).toLocaleString(),
+                expiresIn: table.expires_in,
+                columns: table.columns,
+                rows: 0,
+                size: formatSize(table.size_bytes)
+            });
         }
 
         return result;
     }
 
+    async function loadSchemaPage(schema: string, page: number): Promise<NormalizedTable[]> {
+        const raw: RawSchemaTablesResponse = await fetchSchemaTables(schema, page, PAGE_SIZE);
+        return normalizeTables(raw);
+    }
+
     async function load() {
         setLoading(true);
 
         const raw: RawCacheResponse = await fetchCache();
 
-        setCache(normalize(raw));
+        // The summary only has counts; the first page of each schema is loaded apart
+        const schemas = Object.entries(raw.schemas);
+        const pages = await Promise.all(schemas.map(([schema]) => loadSchemaPage(schema, 1)));
+
+        const result: Record<string, NormalizedSchema> = {};
+        schemas.forEach(([schema, summary], i) => {
+            result[schema] = {
+                totalTables: summary.tables,
+                size: formatSize(summary.size_bytes),
+                tables: pages[i],
+                page: 1
+            };
+        });
+
+        setCache(result);
 
         setStats({
             ttl: raw.ttl_seconds,
             totalEntries: raw.total_entries,
-            schemasCount: Object.keys(raw.schemas).length
+            schemasCount: schemas.length
         });
 
         setLoading(false);
     }
 
+    async function handleLoadMore(schema: string) {
+        const current = cache[schema];
+        const page = current.page + 1;
+        const tables = await loadSchemaPage(schema, page);
+
+        setCache((prev) => ({
+            ...prev,
+            [schema]: { ...prev[schema], tables: [...prev[schema].tables, ...tables], page }
+        }));
+    }
+
     async function handleClearAll() {
         await invalidateAllCache();
         load();
@@ -84,14 +122,17 @@ export default function CacheManager() {
 
     return (
         <div className="space-y-6">
-            {Object.entries(cache).map(([schema, tables]) => (
+            {Object.entries(cache).map(([schema, info]) => (
                 <CacheSchemaBlock
                     key={schema}
                     schema={schema}
-                    tables={tables}
+                    tables={info.tables}
+                    totalTables={info.totalTables}
+                    size={info.size}
                     onClearSchema={handleClearSchema}
                     onClearTable={handleClearTable}
                     onRefreshTable={load}
+                    onLoadMore={handleLoadMore}
                 />
             ))}
 
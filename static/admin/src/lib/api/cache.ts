@@ -5,6 +5,16 @@ export async function fetchCache() {
     return res.json();
 }
 
+export async function fetchSchemaTables(schema: string, page: number, limit: number) {
+    const params = new URLSearchParams({
+        schema,
+        page: String(page),
+        limit: String(limit)
+    });
+    const res = await fetch(`${import.meta.env.PUBLIC_API_URL}/metadata/status?${params}`);
+    return res.json();
+}
+
 export async function invalidateAllCache() {
     const res = await fetch(`${import.meta.env.PUBLIC_API_URL}/metadata/invalidate`, {
         method: "POST",
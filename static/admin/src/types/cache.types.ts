@@ -19,19 +19,52 @@ export interface TableMetadata {
 export interface RawTableCacheEntry {
     cached_at: number;
     expires_in: number;
-    metadata: TableMetadata;
+    columns: number;
+    size_bytes: number;
 }
 
-export interface RawSchemaCache {
-    [tableName: string]: RawTableCacheEntry;
+// GET /metadata/status: one summary per schema
+export interface RawSchemaSummary {
+    tables: number;
+    size_bytes: number;
 }
 
 export interface RawCacheResponse {
     ttl_seconds: number;
     schemas: {
-        [schemaName: string]: RawSchemaCache;
+        [schemaName: string]: RawSchemaSummary;
+    };
+    total_entries: number;
+    stats: CacheStats;
+}
+
+// GET /metadata/status?schema=&page=&limit=: one page of a schema's tables
+export interface RawSchemaTablesResponse {
+    ttl_seconds: number;
+    schema: string;
+    page: number;
+    limit: number;
+    total_tables: number;
+    tables: {
+        [tableName: string]: RawTableCacheEntry;
     };
     total_entries: number;
+    stats: CacheStats;
+}
+
+export interface CacheStats {
+    entries: number;
+    bytes: number;
+    max_entries: number;
+    max_bytes: number;
+    hits: number;
+    misses: number;
+    hit_ratio: number | null;
+    evictions: number;
+    expirations: number;
+    loads: number;
+    load_time_ms: number;
+    avg_load_ms: number | null;
 }
 
 export interface NormalizedTable {
@@ -43,3 +76,10 @@ export interface NormalizedTable {
     rows: number;
     size: string;
 }
+
+export interface NormalizedSchema {
+    totalTables: number;
+    size: string;
+    tables: NormalizedTable[];
+    page: number;
+}
@@ -0,0 +1,104 @@
+import pytest
+
+from app.services.ddl_analyzer import DdlAnalyzer
+
+
+def _resolve(sql, search_path=("public",), cached_schemas=None):
+    return DdlAnalyzer().analyze(sql).resolve(list(search_path), cached_schemas)
+
+
+def test_read_only_statements_are_not_schema_changes():
+    analysis = DdlAnalyzer().analyze("SELECT 1; INSERT INTO t VALUES (1); CREATE INDEX i ON t (a)")
+
+    assert not analysis.is_schema_change
+
+
+@pytest.mark.parametrize(
+    "sql, affected",
+    [
+        ("CREATE TABLE IF NOT EXISTS shop.users (id int)", [("shop", "users")]),
+        ('CREATE UNLOGGED TABLE "Shop"."Users" (id int)', [("Shop", "Users")]),
+        ("CREATE OR REPLACE VIEW v AS SELECT 1", [("public", "v")]),
+        ("CREATE MATERIALIZED VIEW s.mv AS SELECT 1", [("s", "mv")]),
+        ("ALTER TABLE IF EXISTS ONLY s.t ADD COLUMN c int", [("s", "t")]),
+        ("DROP TABLE IF EXISTS a, s.b CASCADE", [("public", "a"), ("s", "b")]),
+        ("TRUNCATE ONLY s.a, b", [("s", "a"), ("public", "b")]),
+        ("COMMENT ON COLUMN s.t.c IS 'x'", [("s", "t")]),
+        ("COMMENT ON CONSTRAINT c ON s.t IS 'x'", [("s", "t")]),
+        ("CREATE SCHEMA IF NOT EXISTS sales", [("sales", None)]),
+        ("DROP SCHEMA a, b", [("a", None), ("b", None)]),
+        ("CREATE TABLE db.s.t (id int)", [("s", "t")]),
+    ],
+)
+def test_affected_relations(sql, affected):
+    assert _resolve(sql) == affected
+
+
+def test_rename_touches_old_and_new_name():
+    assert _resolve("ALTER TABLE s.old RENAME TO new") == [("s", "old"), ("s", "new")]
+
+
+def test_set_schema_moves_the_table():
+    assert _resolve("ALTER TABLE a.t SET SCHEMA b") == [("a", "t"), ("b", "t")]
+
+
+def test_alter_schema_rename():
+    assert _resolve("ALTER SCHEMA old RENAME TO new") == [("old", None), ("new", None)]
+
+
+def test_partition_of_touches_parent():
+    sql = "CREATE TABLE s.p1 PARTITION OF s.parent FOR VALUES IN (1)"
+
+    assert _resolve(sql) == [("s", "p1"), ("s", "parent")]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "ALTER TYPE mood ADD VALUE 'meh'",
+        "CREATE EXTENSION hstore",
+        "DROP OWNED BY someone",
+        "DROP TYPE mood CASCADE",
+    ],
+)
+def test_global_changes_mark_everything(sql):
+    analysis = DdlAnalyzer().analyze(sql)
+
+    assert analysis.everything
+    assert analysis.resolve(["public"]) == []
+
+
+def test_drop_type_without_cascade_is_ignored():
+    assert not DdlAnalyzer().analyze("DROP TYPE mood").is_schema_change
+
+
+def test_search_path_set_in_script():
+    sql = (
+        "SET search_path TO sales, public; CREATE TABLE t (id int); "
+        "SET search_path = DEFAULT; DROP TABLE u"
+    )
+    analysis = DdlAnalyzer().analyze(sql)
+
+    assert analysis.needs_search_path
+    assert analysis.resolve(["other"]) == [("sales", "t"), ("other", "u")]
+
+
+def test_search_path_string_form_skips_user():
+    analysis = DdlAnalyzer().analyze("""SET search_path = '"$user", app'; DROP TABLE t""")
+
+    assert not analysis.needs_search_path
+    assert analysis.resolve(["public"]) == [("app", "t")]
+
+
+def test_unqualified_drop_uses_cached_schema():
+    cached = {"t": ["b"]}.get
+
+    assert _resolve("DROP TABLE t", ["a", "b"], cached) == [("b", "t")]
+    # A new table always lands in the first schema
+    assert _resolve("CREATE TABLE t (id int)", ["a", "b"], cached) == [("a", "t")]
+
+
+def test_keywords_inside_literals_are_not_ddl():
+    sql = "SELECT 'DROP TABLE t' AS q; /* ALTER TABLE u */ SELECT $$TRUNCATE v$$"
+
+    assert not DdlAnalyzer().analyze(sql).is_schema_change
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.generation_cache import GenerationCache, normalize_question
+
+
+def _settings(**overrides):
+    values = dict(
+        model_name="model-a",
+        temperature=0.1,
+        top_p=0.9,
+        seed=1,
+        system_prompt=None,
+        context=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.parametrize(
+    "question",
+    ["How many users?", "  how   MANY users ", "¿How many\tusers?", "How many users?!."],
+)
+def test_normalize_question(question):
+    assert normalize_question(question) == "how many users"
+
+
+def test_normalize_question_keeps_inner_punctuation():
+    assert normalize_question("Users, then orders?") == "users, then orders"
+    assert normalize_question(None) == ""
+
+
+def test_key_ignores_question_formatting():
+    cache = GenerationCache()
+
+    assert cache.make_key("How many users?", _settings(), "agent", "c1") == cache.make_key(
+        "  how many USERS ", _settings(), "agent", "c1"
+    )
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        dict(user_input="How many orders?"),
+        dict(settings=_settings(temperature=0.7)),
+        dict(settings=_settings(model_name="model-b")),
+        dict(mode="agent+validate"),
+        dict(connection_key="c2"),
+    ],
+)
+def test_key_depends_on_settings_mode_and_connection(changed):
+    cache = GenerationCache()
+    args = dict(
+        user_input="How many users?", settings=_settings(), mode="agent", connection_key="c1"
+    )
+
+    assert cache.make_key(**args) != cache.make_key(**{**args, **changed})
+
+
+def test_invalidate_connection_bumps_schema_version():
+    cache = GenerationCache()
+    key = cache.make_key("q", _settings(), "agent", "c1")
+    other = cache.make_key("q", _settings(), "agent", "c2")
+    cache.store(key, {"sql": "SELECT 1"}, "c1")
+    cache.store(other, {"sql": "SELECT 2"}, "c2")
+
+    cache.invalidate_connection("c1")
+
+    assert cache.get(key) is None
+    assert cache.make_key("q", _settings(), "agent", "c1") != key
+    # A run that started before the change stores under the old key, never read again
+    cache.store(key, {"sql": "stale"}, "c1")
+    assert cache.get(cache.make_key("q", _settings(), "agent", "c1")) is None
+    assert cache.get(other) == {"sql": "SELECT 2"}
+
+
+def test_invalidate_all_bumps_every_version():
+    cache = GenerationCache()
+    keys = [cache.make_key("q", _settings(), "agent", conn) for conn in ("c1", None)]
+    for key, conn in zip(keys, ("c1", None)):
+        cache.store(key, {"sql": "SELECT 1"}, conn)
+
+    cache.invalidate_all()
+
+    assert cache.get_status()["entries"] == 0
+    assert [cache.make_key("q", _settings(), "agent", conn) for conn in ("c1", None)] != keys
+
+
+def test_results_are_copied():
+    cache = GenerationCache()
+    result = {"sql": "SELECT 1", "tables": ["a"]}
+    cache.store("k", result, "c1")
+    result["tables"].append("b")
+
+    cached = cache.get("k")
+    cached["tables"].append("c")
+
+    assert cache.get("k") == {"sql": "SELECT 1", "tables": ["a"]}
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = GenerationCache(max_entries=2, ttl_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.generation_cache.time.time", lambda: now[0])
+
+    cache.store("a", {"sql": "a"}, None)
+    cache.store("b", {"sql": "b"}, None)
+    assert cache.get("a") is not None
+    cache.store("c", {"sql": "c"}, None)
+
+    assert cache.get("b") is None
+    assert cache.get_status()["evictions"] == 1
+
+    now[0] += 11
+    assert cache.get("a") is None
@@ -0,0 +1,50 @@
+from app.utils.json_stream_scanner import IncrementalJSONScanner
+
+
+def test_block_split_across_chunks():
+    scanner = IncrementalJSONScanner()
+    chunks = ['TOOL_CALL {"name": "list_', 'tables", "arguments": {"sch', 'ema": "public"}}']
+    chunks.append(" tail")
+
+    done = [scanner.feed(chunk) for chunk in chunks]
+
+    assert done == [False, False, True, True]
+    assert scanner.block == '{"name": "list_tables", "arguments": {"schema": "public"}}'
+
+
+def test_braces_inside_strings_are_ignored():
+    scanner = IncrementalJSONScanner()
+
+    assert scanner.feed('FINAL_SQL {"sql": "SELECT \'}\' || \\"{\\"", ') is False
+    assert scanner.feed('"explanation": "uses ] and }"}') is True
+    assert scanner.block.endswith('"uses ] and }"}')
+
+
+def test_non_agent_json_is_skipped():
+    scanner = IncrementalJSONScanner()
+
+    assert scanner.feed('Plan: {"step": 1} then [1, 2] ') is False
+    assert scanner.feed('FINAL_SQL {"sql": "SELECT 1"}') is True
+    assert scanner.block == '{"sql": "SELECT 1"}'
+
+
+def test_list_of_tool_calls():
+    scanner = IncrementalJSONScanner()
+
+    assert scanner.feed('TOOL_CALL [{"name": "a"}, {"name": "b"}]') is True
+    assert scanner.block == '[{"name": "a"}, {"name": "b"}]'
+
+
+def test_empty_or_invalid_lists_are_not_blocks():
+    scanner = IncrementalJSONScanner()
+
+    assert scanner.feed('[] [{"x": 1}] {"name": ') is False
+    assert scanner.block is None
+
+
+def test_further_chunks_do_not_change_the_block():
+    scanner = IncrementalJSONScanner()
+    scanner.feed('{"sql": "SELECT 1"}')
+
+    assert scanner.feed('{"sql": "SELECT 2"}') is True
+    assert scanner.block == '{"sql": "SELECT 1"}'
@@ -0,0 +1,119 @@
+from app.services.metadata_cache import MetadataCache, NamespacedMetadataCache, _estimate_size
+
+
+def _meta(columns=1):
+    return {
+        "columns": [{"column_name": f"c{i}", "data_type": "int"} for i in range(columns)],
+        "primary_keys": [],
+        "foreign_keys": [],
+    }
+
+
+def test_entry_limit_evicts_least_recently_used():
+    cache = MetadataCache(max_entries=2)
+    cache.store_table("s", "a", _meta())
+    cache.store_table("s", "b", _meta())
+    cache.get_table("s", "a")
+
+    cache.store_table("s", "c", _meta())
+
+    assert cache.get_table("s", "b") is None
+    assert cache.get_table("s", "a") is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_byte_limit_evicts_until_under_budget():
+    size = _estimate_size(_meta(5))
+    cache = MetadataCache(max_bytes=size * 2)
+    for table in ("a", "b", "c"):
+        cache.store_table("s", table, _meta(5))
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == size * 2
+    assert cache.get_table("s", "a") is None
+
+
+def test_replacing_an_entry_does_not_double_count_bytes():
+    cache = MetadataCache()
+    cache.store_table("s", "a", _meta(5))
+    cache.store_table("s", "a", _meta(1))
+
+    assert cache.get_stats()["bytes"] == _estimate_size(_meta(1))
+    assert cache.get_status()["schemas"] == {
+        "s": {"tables": 1, "size_bytes": _estimate_size(_meta(1))}
+    }
+
+
+def test_schema_index_follows_stores_evictions_and_invalidations():
+    cache = MetadataCache(max_entries=3)
+    cache.store_many({("a", "t"): _meta(), ("a", "u"): _meta(), ("b", "t"): _meta()})
+
+    assert sorted(cache.schemas_with_table("t")) == ["a", "b"]
+
+    cache.store_table("c", "v", _meta())  # evicts a.t
+    assert cache.schemas_with_table("t") == ["b"]
+
+    cache.invalidate_schema("a")
+    summary = cache.get_status()["schemas"]
+    assert set(summary) == {"b", "c"}
+    assert sum(info["size_bytes"] for info in summary.values()) == cache.get_stats()["bytes"]
+
+    cache.invalidate_table("b", "t")
+    assert cache.schemas_with_table("t") == []
+
+
+def test_schema_status_pages_tables():
+    cache = MetadataCache(ttl_seconds=60)
+    cache.store_many({("s", f"t{i}"): _meta() for i in range(5)})
+
+    status = cache.get_status("s", page=2, limit=2)
+
+    assert status["total_tables"] == 5
+    assert list(status["tables"]) == ["t2", "t3"]
+    assert status["tables"]["t2"]["columns"] == 1
+    assert status["tables"]["t2"]["expires_in"] <= 60
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.metadata_cache.time.time", lambda: now[0])
+    cache = MetadataCache(ttl_seconds=10)
+    cache.store_table("s", "a", _meta())
+
+    now[0] += 11
+
+    assert cache.get_table("s", "a") is None
+    assert cache.get_stats()["expirations"] == 1
+    assert cache.get_status()["schemas"] == {}
+
+
+def test_snapshot_only_while_complete(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.metadata_cache.time.time", lambda: now[0])
+    cache = MetadataCache(ttl_seconds=10)
+
+    cache.store_many({("s", "a"): _meta(), ("s", "b"): _meta()})
+    assert cache.snapshot() is None
+
+    cache.store_many({("s", "a"): _meta(), ("s", "b"): _meta()}, complete=True)
+    assert set(cache.snapshot()) == {("s", "a"), ("s", "b")}
+
+    now[0] += 11
+    assert cache.snapshot() is None
+
+    cache.invalidate_all()
+    cache.store_many({("s", "a"): _meta(), ("s", "b"): _meta()}, complete=True)
+    assert cache.snapshot() is not None
+    cache.invalidate_table("s", "a")
+    assert cache.snapshot() is None
+
+
+def test_namespaces_are_separate():
+    active = ["one"]
+    cache = NamespacedMetadataCache(current_key=lambda: active[0])
+    cache.store_table("s", "a", _meta())
+
+    active[0] = "two"
+    assert cache.get_table("s", "a") is None
+    assert cache.namespace("one").get_table("s", "a") is not None
@@ -0,0 +1,280 @@
+import json
+import os
+import socket
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.llm_backends import (
+    LLMBackendError,
+    LLMTimeoutError,
+    LLMUnavailableError,
+    OllamaHTTPBackend,
+    OllamaSubprocessBackend,
+)
+from app.services.llm_service import LocalLLMConnector
+
+TOOL_CALL = '{"name": "list_tables", "arguments": {"schema": "public"}}'
+
+
+class StubOllama(ThreadingHTTPServer):
+    """Minimal Ollama API: records every request body and streams NDJSON."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubOllamaHandler)
+        self.requests = []
+        self.stream_aborted = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body))
+
+        if body.get("stream"):
+            self._stream(body)
+        elif self.path == "/api/generate":
+            self._send_json(
+                {
+                    "response": f"  echo: {body['prompt']}  ",
+                    "context": [1, 2, 3],
+                    "prompt_eval_count": 7,
+                    "eval_count": 3,
+                    "done": True,
+                }
+            )
+        elif self.path == "/api/chat":
+            last = body["messages"][-1]["content"]
+            self._send_json(
+                {
+                    "message": {"role": "assistant", "content": f"chat: {last}"},
+                    "eval_count": 2,
+                    "done": True,
+                }
+            )
+        else:
+            self.send_error(404)
+
+    def _send_json(self, data: dict):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, body: dict):
+        field = "response" if self.path == "/api/generate" else "message"
+
+        def chunk(data: bytes) -> bytes:
+            return f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n"
+
+        def line(text: str, done: bool = False) -> bytes:
+            piece = text if field == "response" else {"role": "assistant", "content": text}
+            return chunk(json.dumps({field: piece, "done": done}).encode("utf-8") + b"\n")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        # Broken streams, selected by the prompt
+        failure = body.get("prompt")
+        if failure in ("truncated line", "stall", "drop"):
+            self.wfile.write(line("SELECT"))
+            self.wfile.flush()
+            self.close_connection = True
+            try:
+                if failure == "truncated line":
+                    self.wfile.write(chunk(b'{"response": " 1", "do\n') + b"0\r\n\r\n")
+                elif failure == "stall":
+                    time.sleep(2)
+                else:
+                    # Announces 256 bytes, sends a few and hangs up
+                    self.wfile.write(b"100\r\npartial")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+
+        # The block arrives split across chunks, then the model keeps talking
+        pieces = ["TOOL_CALL ", TOOL_CALL[:20], TOOL_CALL[20:]]
+        pieces += [" and some more text"] * 500
+        try:
+            for piece in pieces:
+                self.wfile.write(line(piece))
+                self.wfile.flush()
+                time.sleep(0.005)
+            self.wfile.write(line("", done=True) + b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.stream_aborted.set()
+            self.close_connection = True
+
+
+@pytest.fixture
+def stub_server():
+    server = StubOllama()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def backend(stub_server):
+    backend = OllamaHTTPBackend(base_url=stub_server.url, keep_alive="1m")
+    yield backend
+    backend.close()
+
+
+def _unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_generate(stub_server, backend):
+    response = backend.generate("model-a", "hello", {"temperature": 0.1}, timeout=5)
+
+    assert response.text == "echo: hello"
+    assert response.backend == "http"
+    assert response.context == [1, 2, 3]
+    assert response.prompt_eval_count == 7
+    assert response.eval_count == 3
+
+    path, body = stub_server.requests[0]
+    assert path == "/api/generate"
+    assert body == {
+        "model": "model-a",
+        "prompt": "hello",
+        "stream": False,
+        "options": {"temperature": 0.1},
+        "keep_alive": "1m",
+    }
+
+
+def test_chat(stub_server, backend):
+    messages = [
+        {"role": "system", "content": "be brief"},
+        {"role": "user", "content": "list tables"},
+    ]
+    response = backend.chat("model-a", messages, {}, timeout=5)
+
+    assert response.text == "chat: list tables"
+    assert response.eval_count == 2
+
+    path, body = stub_server.requests[0]
+    assert path == "/api/chat"
+    assert body["messages"] == messages
+    assert body["stream"] is False
+
+
+@pytest.mark.parametrize("mode", ["generate", "chat"])
+def test_stream_stops_after_first_block(stub_server, backend, mode):
+    connector = LocalLLMConnector(
+        "model-a", timeout=10, backend=backend, fallback_to_subprocess=False
+    )
+
+    if mode == "generate":
+        response = connector.generate_until_block("list the tables")
+    else:
+        response = connector.chat_until_block([{"role": "user", "content": "list the tables"}])
+
+    assert response.text.startswith(f"TOOL_CALL {TOOL_CALL}")
+    # Cut right after the block instead of waiting for the rest of the stream
+    assert len(response.text) < 200
+    assert stub_server.requests[0][1]["stream"] is True
+    # Closing the response drops the connection, which is what cancels Ollama
+    assert stub_server.stream_aborted.wait(5)
+
+
+@pytest.mark.parametrize(
+    "failure, error",
+    [
+        ("truncated line", LLMBackendError),
+        ("stall", LLMTimeoutError),
+        ("drop", LLMUnavailableError),
+    ],
+)
+def test_broken_stream_raises_backend_errors(stub_server, backend, failure, error):
+    stream = backend.stream_generate("model-a", failure, {}, timeout=0.5)
+
+    assert next(stream) == "SELECT"
+    with pytest.raises(error):
+        list(stream)
+
+
+def test_unreachable_server_raises_unavailable():
+    backend = OllamaHTTPBackend(base_url=f"127.0.0.1:{_unused_port()}")
+    try:
+        with pytest.raises(LLMUnavailableError):
+            backend.generate("model-a", "hello", {}, timeout=5)
+    finally:
+        backend.close()
+
+
+def _install_ollama(tmp_path, monkeypatch, body: str) -> None:
+    """Put an `ollama` shell script on PATH that runs `body` after reading stdin."""
+    script = tmp_path / "ollama"
+    script.write_text("#!/bin/sh\ncat > /dev/null\n" + body)
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+@pytest.fixture
+def fake_ollama_binary(tmp_path, monkeypatch):
+    """An `ollama` executable on PATH that answers `ollama run` with a fixed block."""
+    _install_ollama(tmp_path, monkeypatch, f"printf '%s' 'TOOL_CALL {TOOL_CALL}'\n")
+
+
+@pytest.mark.parametrize("early_stop", [False, True])
+def test_falls_back_to_subprocess_backend(fake_ollama_binary, early_stop):
+    backend = OllamaHTTPBackend(base_url=f"http://127.0.0.1:{_unused_port()}")
+    connector = LocalLLMConnector(
+        "model-a",
+        timeout=10,
+        backend=backend,
+        fallback_to_subprocess=True,
+        early_stop=early_stop,
+    )
+    assert isinstance(connector.fallback_backend, OllamaSubprocessBackend)
+
+    try:
+        text = connector.run_text("list the tables")
+    finally:
+        backend.close()
+
+    assert text == f"TOOL_CALL {TOOL_CALL}"
+
+
+def test_subprocess_stream_keeps_split_characters(tmp_path, monkeypatch):
+    # A multibyte character across the 4096-byte read boundary, and more
+    # stderr output than a pipe buffer holds
+    padding = "a" * 4095
+    _install_ollama(
+        tmp_path,
+        monkeypatch,
+        "head -c 200000 /dev/zero | tr '\\0' x >&2\n"
+        f"printf '%s' '{padding}ñandú'\n",
+    )
+
+    backend = OllamaSubprocessBackend()
+    text = "".join(backend.stream_generate("model-a", "hello", {}, timeout=10))
+
+    assert text == f"{padding}ñandú"
@@ -0,0 +1,65 @@
+from datetime import date
+
+import pytest
+
+from app.services.result_pagination import (
+    _query_fingerprint,
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+)
+
+
+class _Session:
+    """Connected session whose engine must not be reached."""
+
+    engine = None
+
+    def is_connected(self):
+        return True
+
+
+def test_cursor_round_trip():
+    payload = {"q": "abc", "k": [42, "é", None]}
+
+    cursor = encode_cursor(payload)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == payload
+
+
+def test_cursor_encodes_non_json_values_as_text():
+    assert decode_cursor(encode_cursor({"k": [date(2024, 1, 2)]})) == {"k": ["2024-01-02"]}
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "aGVsbG8"])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_fingerprint_depends_on_query_and_order():
+    base = _query_fingerprint("SELECT 1", ["id"])
+
+    assert base == _query_fingerprint("SELECT 1", ["id"])
+    assert base != _query_fingerprint("SELECT 2", ["id"])
+    assert base != _query_fingerprint("SELECT 1", None)
+
+
+def test_cursor_of_another_query_is_rejected():
+    cursor = encode_cursor({"q": _query_fingerprint("SELECT * FROM a", None), "o": 10})
+
+    with pytest.raises(ValueError, match="does not belong"):
+        fetch_page(_Session(), "SELECT * FROM b", cursor=cursor)
+
+
+def test_cursor_with_other_order_is_rejected():
+    cursor = encode_cursor({"q": _query_fingerprint("SELECT * FROM a", ["id"]), "k": [1]})
+
+    with pytest.raises(ValueError, match="does not belong"):
+        fetch_page(_Session(), "SELECT * FROM a", cursor=cursor, order_by=["name"])
+
+
+def test_multiple_statements_are_rejected():
+    with pytest.raises(ValueError, match="single statement"):
+        fetch_page(_Session(), "SELECT 1; DROP TABLE a")
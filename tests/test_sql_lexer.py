@@ -0,0 +1,101 @@
+import pytest
+
+from app.utils.sql_lexer import SqlLexer, Token, has_multiple_statements
+
+
+@pytest.fixture
+def lexer():
+    return SqlLexer()
+
+
+def test_tokenize_kinds(lexer):
+    tokens = lexer.tokenize("SELECT a.\"Id\", 'it''s', 1.5e3, $1::int FROM t")
+
+    assert tokens == [
+        Token("word", "SELECT"),
+        Token("word", "a"),
+        Token("punct", "."),
+        Token("ident", "Id"),
+        Token("punct", ","),
+        Token("string", "it's"),
+        Token("punct", ","),
+        Token("number", "1.5e3"),
+        Token("punct", ","),
+        Token("param", "$1"),
+        Token("punct", "::"),
+        Token("word", "int"),
+        Token("word", "FROM"),
+        Token("word", "t"),
+    ]
+
+
+def test_token_name_folds_unquoted_identifiers(lexer):
+    word, ident = lexer.tokenize('Users "Users"')
+
+    assert word.name == "users"
+    assert ident.name == "Users"
+    assert word.is_word("users")
+    assert not ident.is_word("users")
+
+
+def test_comments_are_skipped(lexer):
+    tokens = lexer.tokenize("SELECT 1 -- ; DROP\n/* outer /* nested; */ still */ + 2")
+
+    assert [t.value for t in tokens] == ["SELECT", "1", "+", "2"]
+
+
+def test_escape_and_unicode_strings(lexer):
+    tokens = lexer.tokenize("E'a\\'b;' U&\"d;x\"")
+
+    assert tokens == [Token("string", "a\\'b;"), Token("ident", "d;x")]
+
+
+def test_dollar_quoting(lexer):
+    tokens = lexer.tokenize("SELECT $fn$ ; 'x' $$ $fn$, $$;$$")
+
+    assert tokens == [
+        Token("word", "SELECT"),
+        Token("string", " ; 'x' $$ "),
+        Token("punct", ","),
+        Token("string", ";"),
+    ]
+
+
+def test_unterminated_literal_runs_to_end(lexer):
+    tokens = lexer.tokenize("SELECT 'open; DROP TABLE t")
+
+    assert [t.kind for t in tokens] == ["word", "string"]
+    assert len(lexer.split_statements("SELECT 'open; DROP TABLE t")) == 1
+
+
+def test_split_statements(lexer):
+    statements = lexer.split_statements("SELECT ';'; ;\nSELECT 2;")
+
+    assert [[t.value for t in stmt] for stmt in statements] == [["SELECT", ";"], ["SELECT", "2"]]
+
+
+def test_split_keeps_begin_atomic_body(lexer):
+    sql = (
+        "CREATE FUNCTION f() RETURNS int LANGUAGE sql BEGIN ATOMIC "
+        "SELECT CASE WHEN true THEN 1 END; SELECT 2; END; SELECT 3"
+    )
+
+    statements = lexer.split_statements(sql)
+
+    assert len(statements) == 2
+    assert statements[0][-1].is_word("end")
+    assert [t.value for t in statements[1]] == ["SELECT", "3"]
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT 1;", False),
+        ("SELECT ';' -- ; x", False),
+        ("SELECT $$;$$", False),
+        ("SELECT 1; SELECT 2", True),
+        ("SELECT 1 /* c */; DELETE FROM t", True),
+    ],
+)
+def test_has_multiple_statements(sql, expected):
+    assert has_multiple_statements(sql) is expected